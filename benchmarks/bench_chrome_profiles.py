@@ -0,0 +1,244 @@
+"""
+Chrome launch-profile benchmark.
+
+    python benchmarks/bench_chrome_profiles.py                  # vary one dimension at a time
+    python benchmarks/bench_chrome_profiles.py --full           # every combination
+    python benchmarks/bench_chrome_profiles.py --profiles default lean "headless=new,process=single"
+
+Every profile from chrome_profiles.py is launched `--repeats` times against a
+local copy of an appointment-site-like page served on 127.0.0.1, measuring
+
+    cold start      webdriver.Chrome(...) until the session exists
+    first nav       the first driver.get() of the page
+    RSS / PSS       whole Chrome process tree after a few more navigations
+    screenshot      median get_screenshot_as_png() latency
+
+and the medians are printed fastest first. The printed names are valid
+CHROME_PROFILE values. Needs selenium and Chrome; Linux only for memory
+(/proc).
+"""
+
+import argparse
+import http.server
+import itertools
+import json
+import os
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import chrome_profiles  # noqa: E402
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Terminvereinbarung</title>
+<style>
+body {{ font-family: sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; }} td, th {{ border: 1px solid #ccc; padding: 4px 8px; }}
+</style></head>
+<body>
+<h1>Terminvereinbarung</h1>
+<form method="get">
+<select id="Office">{offices}</select>
+<select id="CalendarId">{calendars}</select>
+<table><tr><th>Mittwoch, 21.05.2025</th></tr>{slots}</table>
+{fields}
+<input type="submit" value="Weiter">
+</form>
+{filler}
+</body></html>
+"""
+
+
+def _write_site(directory: str) -> str:
+    offices = "".join(f"<option value='{i}'>OFFICE {i}</option>" for i in range(60))
+    calendars = "".join(f"<option value='{i}'>Visa category {i}</option>" for i in range(40))
+    slots = "".join(
+        f"<tr><td><input type='radio' name='Slot' id='s{i}' value='5/21/2025 {8 + i // 4}:{i % 4 * 15:02d}:00 AM'>"
+        f"<label for='s{i}'>{8 + i // 4:02d}:{i % 4 * 15:02d}</label></td></tr>"
+        for i in range(24))
+    fields = "".join(f"<p><label>Field {i}</label><input id='F{i}' type='text'></p>" for i in range(20))
+    filler = "".join(f"<p>Hinweis {i}: " + "Lorem ipsum dolor sit amet. " * 8 + "</p>" for i in range(40))
+    path = os.path.join(directory, "index.html")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(PAGE.format(offices=offices, calendars=calendars, slots=slots, fields=fields, filler=filler))
+    return path
+
+
+class _QuietHandler(http.server.SimpleHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_site() -> tuple:
+    """Serve the test page from a temp dir. Returns (url, server)."""
+    directory = tempfile.mkdtemp(prefix="chrome-bench-")
+    _write_site(directory)
+    handler = lambda *a, **kw: _QuietHandler(*a, directory=directory, **kw)  # noqa: E731
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/index.html", server
+
+
+# ─── MEMORY OF A PROCESS TREE (/proc) ────────────────────────────────────
+
+def _parent_map() -> dict:
+    parents = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                stat = f.read()
+        except OSError:
+            continue
+        # the command name is in parentheses and may contain spaces
+        fields = stat[stat.rfind(")") + 2:].split()
+        parents[int(entry)] = int(fields[1])
+    return parents
+
+
+def _read_kib(path: str, key: str) -> int:
+    try:
+        with open(path) as f:
+            for line in f:
+                if line.startswith(key):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def tree_memory_mib(root_pid: int) -> tuple:
+    """(RSS, PSS) in MiB summed over root_pid and all its descendants."""
+    parents = _parent_map()
+    pids, frontier = {root_pid}, [root_pid]
+    while frontier:
+        pid = frontier.pop()
+        for child, parent in parents.items():
+            if parent == pid and child not in pids:
+                pids.add(child)
+                frontier.append(child)
+    rss = sum(_read_kib(f"/proc/{p}/status", "VmRSS:") for p in pids)
+    pss = sum(_read_kib(f"/proc/{p}/smaps_rollup", "Pss:") for p in pids)
+    return rss / 1024, pss / 1024
+
+
+# ─── ONE PROFILE ─────────────────────────────────────────────────────────
+
+def measure_profile(choices: dict, url: str, repeats: int, navigations: int) -> dict:
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+    from selenium.webdriver.chrome.service import Service
+    from selenium.webdriver.common.by import By
+
+    samples = []
+    for _ in range(repeats):
+        options = Options()
+        for arg in chrome_profiles.chrome_arguments(choices):
+            options.add_argument(arg)
+
+        t0 = time.perf_counter()
+        driver = webdriver.Chrome(service=Service(), options=options)
+        cold_start = time.perf_counter() - t0
+        try:
+            t0 = time.perf_counter()
+            driver.get(url)
+            first_nav = time.perf_counter() - t0
+
+            for i in range(navigations):
+                driver.get(f"{url}?n={i}")
+                driver.find_element(By.ID, "Office")
+            time.sleep(1)  # let background work settle before reading memory
+            rss, pss = tree_memory_mib(driver.service.process.pid)
+
+            shots = []
+            for _ in range(5):
+                t0 = time.perf_counter()
+                driver.get_screenshot_as_png()
+                shots.append(time.perf_counter() - t0)
+        finally:
+            driver.quit()
+        samples.append((cold_start, first_nav, rss, pss, statistics.median(shots)))
+
+    cold, nav, rss, pss, shot = (statistics.median(column) for column in zip(*samples))
+    return {
+        "cold_start_ms": round(cold * 1000),
+        "first_nav_ms": round(nav * 1000),
+        "rss_mib": round(rss),
+        "pss_mib": round(pss),
+        "screenshot_ms": round(shot * 1000),
+    }
+
+
+def profiles_to_run(args) -> list:
+    if args.profiles:
+        return [chrome_profiles.resolve(name) for name in args.profiles]
+    defaults = chrome_profiles.DEFAULT_CHOICES
+    if args.full:
+        dims = list(chrome_profiles.DIMENSIONS)
+        return [dict(zip(dims, combo))
+                for combo in itertools.product(*(chrome_profiles.DIMENSIONS[d] for d in dims))]
+    # one factor at a time around the default, plus the presets
+    runs = [dict(defaults)]
+    for dimension, options in chrome_profiles.DIMENSIONS.items():
+        runs.extend({**defaults, dimension: choice} for choice in options if choice != defaults[dimension])
+    runs.extend(chrome_profiles.resolve(p) for p in chrome_profiles.PRESETS if p != "default")
+    unique = {}
+    for choices in runs:
+        unique.setdefault(chrome_profiles.profile_name(choices), choices)
+    return list(unique.values())
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--profiles", nargs="+", help="profile names to run (presets or dimension=choice lists)")
+    parser.add_argument("--full", action="store_true", help="run every combination of the dimensions")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--navigations", type=int, default=5, help="page loads before memory is read")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args(argv)
+
+    url, server = serve_site()
+    runs = profiles_to_run(args)
+    results = {}
+    try:
+        for i, choices in enumerate(runs, 1):
+            name = chrome_profiles.profile_name(choices)
+            print(f"[{i}/{len(runs)}] {name}", flush=True)
+            try:
+                results[name] = measure_profile(choices, url, args.repeats, args.navigations)
+            except Exception as e:
+                results[name] = {"error": f"{type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"}
+    finally:
+        server.shutdown()
+
+    ok = {n: r for n, r in results.items() if "error" not in r}
+    ranked = sorted(ok.items(), key=lambda kv: kv[1]["cold_start_ms"] + kv[1]["first_nav_ms"])
+    print(f"\n{'profile':<48}{'cold ms':>9}{'nav ms':>8}{'RSS MiB':>9}{'PSS MiB':>9}{'shot ms':>9}")
+    for name, r in ranked:
+        print(f"{name:<48}{r['cold_start_ms']:>9}{r['first_nav_ms']:>8}"
+              f"{r['rss_mib']:>9}{r['pss_mib']:>9}{r['screenshot_ms']:>9}")
+    for name, r in results.items():
+        if "error" in r:
+            print(f"{name:<48}  failed: {r['error']}")
+
+    if ranked:
+        fastest = ranked[0][0]
+        smallest = min(ok, key=lambda n: ok[n]["pss_mib"])
+        print(f"\nFastest start: CHROME_PROFILE={fastest}")
+        print(f"Least memory:  CHROME_PROFILE={smallest}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+Micro-benchmarks for the pure helpers in helpers.py.
+
+    python benchmarks/bench_helpers.py                     # compare against baseline
+    python benchmarks/bench_helpers.py --update-baseline   # record a new baseline
+
+Each benchmark runs its function over the whole corpus; one "op" is one call.
+Reports ops/sec (best of several repeats) and tracemalloc peak bytes per op.
+Speed is compared as a multiple of a fixed reference operation timed in the
+same run, so a baseline recorded on another machine (a laptop, a CI runner)
+still applies. Exits with status 1 when a benchmark is relatively slower or
+allocates more than the stored baseline allows.
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+
+import helpers  # noqa: E402
+from benchmarks import corpus  # noqa: E402
+
+BASELINE_PATH = os.path.join(HERE, "baseline.json")
+REFERENCE = "_reference"
+
+_FORM_ERRORS = [t for t in corpus.ERROR_TEXTS if not helpers.is_noise(t)]
+_REAL_ERRORS = [t for t in corpus.ERROR_TEXTS if t.strip()]
+
+# name → (function, list of argument values)
+BENCHMARKS = {
+    "parse_and_format_date": (helpers.parse_and_format_date, corpus.DATES),
+    "parse_slot_datetime": (helpers.parse_slot_datetime, corpus.SLOT_TEXTS),
+    "normalize_visible_text": (helpers.normalize_visible_text, corpus.VISIBLE_TEXTS),
+    "clean_captcha_text": (helpers.clean_captcha_text, corpus.CAPTCHA_RESPONSES),
+    "is_noise": (helpers.is_noise, corpus.ERROR_TEXTS),
+    "looks_like_real_error": (helpers.looks_like_real_error, _REAL_ERRORS),
+    "classify_form_errors": (helpers.classify_form_errors, [_FORM_ERRORS]),
+}
+
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def _reference_op(text: str) -> list:
+    """Regex and str work that touches nothing in helpers.py: the yardstick."""
+    return _WHITESPACE.sub(" ", text).strip().casefold().split(" ")
+
+
+def _time_pass(func, inputs, loops: int) -> float:
+    start = time.perf_counter()
+    for _ in range(loops):
+        for arg in inputs:
+            func(arg)
+    return time.perf_counter() - start
+
+
+def measure_speed(func, inputs, min_seconds: float, repeats: int) -> float:
+    """Best-of-`repeats` ops/sec, each repeat running for at least `min_seconds`."""
+    loops = 1
+    while _time_pass(func, inputs, loops) < min_seconds / 10:
+        loops *= 2
+    best = 0.0
+    for _ in range(repeats):
+        elapsed = 0.0
+        n = 0
+        while elapsed < min_seconds:
+            elapsed += _time_pass(func, inputs, loops)
+            n += loops
+        best = max(best, n * len(inputs) / elapsed)
+    return best
+
+
+def measure_allocations(func, inputs) -> int:
+    """Peak traced bytes for a single pass over `inputs`, divided per call."""
+    func(inputs[0])  # warm caches (re, str interning) outside the trace
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        base, _ = tracemalloc.get_traced_memory()
+        for arg in inputs:
+            func(arg)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return max(0, peak - base) // len(inputs)
+
+
+def measure_relative(func, inputs, min_seconds: float, repeats: int) -> tuple:
+    """
+    (best ops/sec, median speed relative to _reference_op). Each repeat times
+    the reference right before `func`, so load on the box hits both alike.
+    """
+    best, ratios = 0.0, []
+    for _ in range(repeats):
+        reference = measure_speed(_reference_op, corpus.VISIBLE_TEXTS, min_seconds, 1)
+        ops = measure_speed(func, inputs, min_seconds, 1)
+        best = max(best, ops)
+        ratios.append(ops / reference)
+    return best, statistics.median(ratios)
+
+
+def run(min_seconds: float, repeats: int) -> dict:
+    reference = measure_speed(_reference_op, corpus.VISIBLE_TEXTS, min_seconds, repeats)
+    results = {REFERENCE: {"ops_per_sec": round(reference)}}
+    for name, (func, inputs) in BENCHMARKS.items():
+        ops, relative = measure_relative(func, inputs, min_seconds, repeats)
+        results[name] = {
+            "ops_per_sec": round(ops),
+            "relative_speed": round(relative, 4),
+            "alloc_bytes_per_op": measure_allocations(func, inputs),
+        }
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """Return human readable regression lines (empty when everything is fine)."""
+    regressions = []
+    for name, cur in results.items():
+        base = baseline.get(name)
+        if not base or name == REFERENCE:
+            continue
+        # absolute ops/sec only mean something on the machine that recorded them
+        if "relative_speed" in base:
+            min_rel = base["relative_speed"] * (1 - tolerance)
+            if cur["relative_speed"] < min_rel:
+                regressions.append(
+                    f"{name}: {cur['relative_speed']:.3f}x reference < {min_rel:.3f}x "
+                    f"(baseline {base['relative_speed']:.3f}x)"
+                )
+        # small absolute slack so a handful of bytes doesn't flip the result
+        max_alloc = base["alloc_bytes_per_op"] * (1 + tolerance) + 64
+        if cur["alloc_bytes_per_op"] > max_alloc:
+            regressions.append(
+                f"{name}: {cur['alloc_bytes_per_op']:,} B/op > {max_alloc:,.0f} "
+                f"(baseline {base['alloc_bytes_per_op']:,})"
+            )
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--update-baseline", action="store_true",
+                        help="write the results to baseline.json instead of comparing")
+    parser.add_argument("--tolerance", type=float, default=0.30,
+                        help="allowed relative slowdown / allocation growth (default 0.30)")
+    parser.add_argument("--seconds", type=float, default=0.2,
+                        help="minimum run time per repeat (default 0.2)")
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    args = parser.parse_args(argv)
+
+    # parse_and_format_date logs conversions; keep that out of the numbers
+    logging.disable(logging.INFO)
+
+    results = run(args.seconds, args.repeats)
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    print(f"{'benchmark':<26}{'ops/sec':>14}{'x ref':>9}{'baseline':>10}{'B/op':>8}{'base':>8}")
+    for name, cur in results.items():
+        base = baseline.get(name, {})
+        if name == REFERENCE:
+            print(f"{'(reference)':<26}{cur['ops_per_sec']:>14,}")
+            continue
+        print(f"{name:<26}{cur['ops_per_sec']:>14,}{cur['relative_speed']:>9.3f}"
+              f"{base.get('relative_speed', 0):>10.3f}"
+              f"{cur['alloc_bytes_per_op']:>8,}{base.get('alloc_bytes_per_op', 0):>8,}")
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline written to {args.baseline}")
+        return 0
+
+    if not baseline:
+        print("\nNo baseline yet — run with --update-baseline first.")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\n" + "!" * 60)
+        print("  PERFORMANCE REGRESSION")
+        for line in regressions:
+            print(f"  ✗ {line}")
+        print("!" * 60)
+        return 1
+
+    print(f"\n✓ No regressions (tolerance {args.tolerance:.0%})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
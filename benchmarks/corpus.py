@@ -0,0 +1,81 @@
+"""
+Realistic inputs for the helper benchmarks.
+
+Dates come in the shapes people actually type into PERSONAL_DATA (German
+dotted, ISO, US and EU slashed, dashed). Error texts are what the BMEIA form
+renders in German and English, mixed with the labels/hints that get scraped
+alongside them.
+"""
+
+DATES = [
+    "20.02.2024", "1.3.1996", "31.12.2029",
+    "2024-04-23", "1998-5-18",
+    "3/20/1996", "3/24/1998", "02/13/2022", "04/23/2029",
+    "18/05/1998", "18/03/2024", "18/03/2029", "05/06/2001",
+    "13-1-2020", "1-13-2020", "07-08-1990",
+    " 04/23/2024 ", "29.02.2024",
+]
+
+# radio values / labels / row text from the appointment list page
+SLOT_TEXTS = [
+    "5/21/2025 9:00:00 AM", "12/1/2025 12:15:00 PM", "6/3/2025 2:30:00 PM",
+    "21.05.2025 09:00", "03.06.2025 14:30:00", "2025-06-02T08:00:00",
+    "09:00 - 09:15 Mittwoch, 21.05.2025", "Termin 08:30 am 2.6.2025",
+    "Slot 4", "",
+]
+
+VISIBLE_TEXTS = [
+    "TEHERAN",
+    "  Teheran  ",
+    "Residence permit - NO STUDENTS / PUPILS but including dependents (spouses and children) of students",
+    "Residence permit – NO STUDENTS / PUPILS but including dependents (spouses and children) of students",
+    "Aufenthaltstitel — KEINE STUDIERENDEN / SCHÜLER,\n  aber inkl. Angehörige",
+    "Beglaubigung / Apostille",
+    "Visum D  \t (Arbeit)",
+    "Schengen-Visum (Visum C)",
+    "",
+]
+
+CAPTCHA_RESPONSES = [
+    "ABC123",
+    "a b c 1 2 3",
+    "`X7KQ9P`",
+    "**4F7GH2**\n",
+    "The text is: K8 M2 PQ",
+    "  qw3rty  ",
+    "",
+]
+
+ERROR_TEXTS = [
+    # German validation summary
+    "Das Feld Nachname ist erforderlich.",
+    "Das Feld Geburtsdatum ist nicht gültig.",
+    "Der Text aus dem Bild stimmt nicht mit Ihrer Eingabe überein.",
+    "Folgende Angaben fehlen oder sind fehlerhaft:",
+    "Bitte geben Sie eine gültige E-Mail-Adresse ein.",
+    "Bitte wählen Sie ein Land aus.",
+    "Reisepass Nr. darf nicht leer sein.",
+    # English validation summary
+    "The Lastname field is required.",
+    "The value '3/20/1996' is not valid for DateOfBirth.",
+    "The text from the picture does not match your input.",
+    "The following information is missing or erroneous:",
+    "Please enter a valid email address.",
+    "Security code is incorrect.",
+    # Synthesised from input.input-validation-error
+    "Field 'CaptchaText' has validation error (current value: 'AB12')",
+    "Field 'TraveldocumentDateOfIssue' has validation error (current value: '02/13/2022')",
+    "Field 'Email' has validation error (current value: '(empty)')",
+    # Noise scraped next to the errors
+    "Nachname", "Vorname", "Geburtsdatum", "Reisepass Nr.", "Straße",
+    "Staatsangehörigkeit bei Geburt", "Gültig bis", "Sicherheitscode",
+    "Last name", "Date of birth", "Passport number", "Valid until",
+    "(z.B. 20.02.2024)", "(e.g. 20.02.2024)", "TT.MM.JJJJ", "dd.mm.yyyy",
+    "Anzahl der Personen 1", "Number of persons 1",
+    "Startzeit 08:00", "Appointment 20.05.2025",
+    "Weiter", "Next", "Zurück", "*", "!", "**", "",
+    # Unrelated page text
+    "Botschaft Teheran",
+    "Ein Fehler ist aufgetreten. Bitte versuchen Sie es später erneut.",
+    "An error occurred while processing your request.",
+]
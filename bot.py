@@ -1,133 +1,195 @@
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support.ui import Select
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, NoSuchElementException, StaleElementReferenceException
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
 import time
+
+# Reference point for the startup-time report (see mark_startup)
+PROCESS_START = time.perf_counter()
+
 import asyncio
 import logging
 import re
 import difflib
+import signal
+import threading
+import uuid
 import warnings
-from aiogram import Bot, Dispatcher, types, F
-from aiogram.types import InputFile, FSInputFile, Message
-from aiogram.filters import Command
 
 from dotenv import load_dotenv
 import os
 import sys
 
+from clients import (
+    TELEGRAM_TIMEOUT_SECONDS, ApiClient, CircuitOpenError, GeminiClient, telegram_trips,
+)
+from captcha_relay import CAPTCHA_TIMEOUT_SECONDS, CaptchaRelay, operators_from_env
+from clock import Clock, ClockWait
+from controls import (
+    MAX_INTERVAL_SECONDS, MIN_INTERVAL_SECONDS, Controls, ControlStore, parse_interval,
+)
+from cycle_stats import CycleHistory, CycleRecord, PersonResult
+from logging_setup import setup_logging
+from profiling import CycleProfiler, MAX_PROFILE_CYCLES
+from screenshots import ScreenshotService
+from tracing import tracer, configure_tracing
+from worker import BufferedUpload, Channel, CheckerSupervisor, FileUpload, WorkerBot, forward_logging
+from persons import Person, PersonsStore
+import chrome_profiles
+from browser_profile import RESOURCE_TIMING_JS, BrowserProfileStore
+from driver_backends import create_backend
+import page_state
+from slots import SLOT_CLICK_JS, SLOT_EXTRACTION_JS, Slot, SlotTracker, format_duration, rank_slots
+from storage import data_path, load_json, atomic_write_json
+from helpers import (
+    normalize_visible_text, clean_captcha_text,
+    is_noise, looks_like_real_error, classify_form_errors,
+)
+
 warnings.filterwarnings("ignore", category=FutureWarning, module="google.generativeai")
 
-try:
-    import google.generativeai as genai
-    from PIL import Image
-    GEMINI_AVAILABLE = True
-except ImportError as e:
-    GEMINI_AVAILABLE = False
-    logging.warning(f"Gemini or PIL not installed. CAPTCHA solving will be disabled. Error: {e}")
+# ─── Heavy imports, loaded on first use ───
+# Selenium, google.generativeai and PIL together cost seconds of import time,
+# none of which is needed to start answering Telegram; aiogram is only needed
+# by the bot process (the spawned worker re-imports this module). The names
+# below are filled in by _load_aiogram() / _load_selenium() / _load_gemini().
+Bot = Dispatcher = Router = F = Command = AiohttpSession = BufferedInputFile = Message = None
+webdriver = By = Select = EC = Options = None
+TimeoutException = NoSuchElementException = StaleElementReferenceException = None
+genai = Image = None
+GEMINI_AVAILABLE = None  # unknown until _load_gemini() runs
+
+_import_lock = threading.Lock()
+
+
+def _load_aiogram():
+    global Bot, Dispatcher, Router, F, Command, AiohttpSession, BufferedInputFile, Message
+    from aiogram import Bot, Dispatcher, Router, F
+    from aiogram.types import BufferedInputFile, Message
+    from aiogram.filters import Command
+    from aiogram.client.session.aiohttp import AiohttpSession
+
+
+def _load_selenium():
+    global webdriver, By, Select, EC, Options
+    global TimeoutException, NoSuchElementException, StaleElementReferenceException
+    with _import_lock:
+        if webdriver is not None:
+            return
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support.ui import Select
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.common.exceptions import (
+            TimeoutException, NoSuchElementException, StaleElementReferenceException,
+        )
+        from selenium.webdriver.chrome.options import Options
+        from selenium import webdriver
+
+
+def _load_gemini() -> bool:
+    global genai, Image, GEMINI_AVAILABLE
+    with _import_lock:
+        if GEMINI_AVAILABLE is None:
+            try:
+                import google.generativeai as genai
+                from PIL import Image
+                GEMINI_AVAILABLE = True
+            except ImportError as e:
+                GEMINI_AVAILABLE = False
+                logging.warning(f"Gemini or PIL not installed. CAPTCHA solving will be disabled. Error: {e}")
+    return GEMINI_AVAILABLE
 
-load_dotenv()
 
-logging.basicConfig(level=logging.INFO,
-                   format='%(asctime)s - %(levelname)s - %(message)s')
+load_dotenv()
 
 TOKEN = os.getenv("TOKEN")
 CHAT_ID = os.getenv("CHAT_ID")
-bot = Bot(token=TOKEN)
-dp = Dispatcher()
+HEALTH_PORT = int(os.getenv("PORT", 8080))
+
+# Bot, Dispatcher and the handlers' router are created in main().
+bot = None
+# bot process: every call the worker asks for
+telegram_api = ApiClient("telegram", TELEGRAM_TIMEOUT_SECONDS, trips=telegram_trips)
 
 TEST_FILL_ONLY_CAPTCHA = os.getenv("TEST_FILL_ONLY_CAPTCHA", "false").lower() in ("1", "true", "yes")
 
-checker_instance = None
+checker_instance = None      # worker process: the running AppointmentChecker
+checker_supervisor = None    # bot process: owns the worker, holds its last status
+worker_channel = None        # worker process: pipe to the bot process
+captcha_relay = None         # bot process: manual CAPTCHA prompts to the operators
+control_store = None         # bot process: /pause, /interval ... settings (controls.json)
 main_loop = None
 
-# ─── Polling interval in seconds ───
-CHECK_INTERVAL_SECONDS = 60  # 1 minutes
-
-
-def parse_and_format_date(raw: str) -> str:
-    if not raw or not raw.strip():
-        return ""
+# ─── Startup-time report ───
+startup_marks = {}  # milestone → seconds since PROCESS_START
 
-    raw = raw.strip()
-    day = month = year = None
-
-    m = re.match(r"^(\d{1,2})\.(\d{1,2})\.(\d{4})$", raw)
-    if m:
-        day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
-
-    if day is None:
-        m = re.match(r"^(\d{4})-(\d{1,2})-(\d{1,2})$", raw)
-        if m:
-            year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
-
-    if day is None:
-        m = re.match(r"^(\d{1,2})/(\d{1,2})/(\d{4})$", raw)
-        if m:
-            a, b, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
-            if a > 12:
-                day, month = a, b
-            elif b > 12:
-                month, day = a, b
-            else:
-                day, month = a, b
-
-    if day is None:
-        m = re.match(r"^(\d{1,2})-(\d{1,2})-(\d{4})$", raw)
-        if m:
-            a, b, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
-            if a > 12:
-                day, month = a, b
-            elif b > 12:
-                month, day = a, b
-            else:
-                day, month = a, b
 
-    if day is None or month is None or year is None:
-        raise ValueError(f"Cannot parse date '{raw}' – unrecognised format")
+def mark_startup(milestone: str):
+    """Record the first time `milestone` is reached."""
+    if milestone not in startup_marks:
+        startup_marks[milestone] = round(time.perf_counter() - PROCESS_START, 3)
+        logging.info(f"⏱ Startup: {milestone} after {startup_marks[milestone]:.2f}s")
 
-    if not (1 <= month <= 12):
-        raise ValueError(
-            f"Invalid month {month} in date '{raw}'. "
-            f"Parsed day={day}, month={month}, year={year}."
-        )
-    if not (1 <= day <= 31):
-        raise ValueError(
-            f"Invalid day {day} in date '{raw}'. "
-            f"Parsed day={day}, month={month}, year={year}."
-        )
 
-    days_in_month = {
-        1: 31, 2: 29, 3: 31, 4: 30, 5: 31, 6: 30,
-        7: 31, 8: 31, 9: 30, 10: 31, 11: 30, 12: 31,
-    }
-    if day > days_in_month.get(month, 31):
-        raise ValueError(f"Day {day} is too large for month {month} in date '{raw}'.")
+def startup_report(worker_marks: dict = None) -> str:
+    marks = {**(worker_marks or {}), **startup_marks}
+    if not marks:
+        return "no milestones yet"
+    return ", ".join(f"{k} {v:.1f}s" for k, v in sorted(marks.items(), key=lambda kv: kv[1]))
 
-    formatted = f"{day:02d}.{month:02d}.{year}"
-    if formatted != raw:
-        logging.info(f"Date converted: '{raw}' → '{formatted}'")
-    return formatted
+# ─── Polling interval in seconds ───
+CHECK_INTERVAL_SECONDS = 60  # default; /interval overrides it at runtime (controls.py)
+# how long a loaded slot page without radio buttons may take to render them
+RADIO_SETTLE_SECONDS = 3
 
 
 class AppointmentChecker:
-    def __init__(self):
+    # ─── What we are checking ───
+    OFFICE = "TEHERAN"
+    CALENDAR_ID = "13713913"  # "24533100"
+    # fallback when the CalendarId option value changes
+    CALENDAR_TEXT = "Residence permit - NO STUDENTS / PUPILS but including dependents (spouses and children) of students"  # "Beglaubigung / Apostille"
+
+    def __init__(self, clock: Clock = None):
+        # every wait goes through self.clock so tests can swap in SimulatedClock
+        self.clock = clock or Clock()
         self.url = "https://appointment.bmeia.gv.at"
-        self.setup_driver()
-        self.wait = WebDriverWait(self.driver, 10)
-        self.screenshot_path = "filled_form_with_captcha.png"
-        self.confirmation_screenshot_path = "confirmation_page.png"
+        # Chrome is launched by prelaunch_driver() / the first cycle, not here
+        self.driver = None
+        self._driver_fresh = False  # launched but not used by a cycle yet
+        self.chrome_profile = None
+        self.driver_backend = create_backend()  # local Chrome or a Selenium endpoint
+        self.browser_store = BrowserProfileStore()  # shared disk cache, per-session user-data-dir
+        self._session_dir = None
+        self.screenshots = ScreenshotService()
+        self._gemini = None  # GeminiClient, built on first use
+        self.slot_tracker = SlotTracker()  # last seen slots, diffed every check
+        # ─── Page classifier (see page_state.py) ───
+        self.page_state = None           # label of the last probed page
+        self._last_probe = {}
+        self._page_token = None          # identifies the document probed last
+        self._trouble_state = None       # maintenance / rate_limited streak
+        self._trouble_streak = 0
         self.manual_captcha_queue = asyncio.Queue()
         self.waiting_for_manual_captcha = False
+        self._captcha_request_id = None  # prompt the relay answers to
         self.current_person_index = 0
         # ─── Track which persons have been booked ───
         self.persons_booked = []  # list of booleans, one per person
-        self.booking_results = []  # store results per person
+        self.booking_results = {}  # person key → PersonResult of their last check
+        # recent cycles + p50/p95 aggregates for /status; fed spans by run_appointment_checker
+        self.cycle_history = CycleHistory()
         self.check_count = 0  # how many polling cycles so far
+        self.profiler = CycleProfiler()  # armed via /profile
+        # ─── Graceful stop: no new person/cycle once set (see request_stop) ───
+        self.stop_requested = False
+        self._wake_event = asyncio.Event()  # ends the sleep between cycles early
+        # ─── Runtime controls (controls.py), applied between cycles ───
+        self.controls = ControlStore(CHECK_INTERVAL_SECONDS).controls
+        self._pending_controls = None
+        self._check_now = False
+        self._last_cycle = None  # (clock.monotonic() at its end, backoff); None = next cycle is due now
+        self._previous_shutdown_seconds = None
+        # ─── Persons: file on the data volume, reloaded between cycles ───
+        self.persons_store = PersonsStore(defaults=self.ALL_PERSONS)
+        self._reported_persons_error = False
+        self._apply_persons(self.persons_store.persons)
 
     # ─── PERSONAL DATA FOR PERSON 1 ──────────────────────────────────────
     PERSONAL_DATA_Test = {
@@ -197,8 +259,41 @@ class AppointmentChecker:
         "TraveldocumentIssuingAuthority": "1",
     }
 
+    # Built-in defaults; a persons.json on the data volume overrides them (see persons.py)
     ALL_PERSONS = [PERSONAL_DATA_1, PERSONAL_DATA_2]
 
+    def _apply_persons(self, records: list):
+        """Swap in a new persons list, carrying booked state over by passport number."""
+        old_records = getattr(self, "person_records", [])
+        booked_keys = {r.key for r, b in zip(old_records, self.persons_booked) if b}
+        self.person_records = records
+        self.ALL_PERSONS = [r.data for r in records]
+        self.persons_booked = [r.key in booked_keys for r in records]
+        self.current_person_index = 0
+
+    async def _reload_persons_if_changed(self):
+        """Between cycles: pick up edits to the persons file and report them."""
+        changed = self.persons_store.check_for_changes()
+        if not self.persons_store.last_error:
+            # fixed (even back to the current list): report the next rejection again
+            self._reported_persons_error = False
+        if not changed:
+            if self.persons_store.last_error and not self._reported_persons_error:
+                self._reported_persons_error = True
+                try:
+                    await bot.send_message(
+                        CHAT_ID, f"⚠️ Persons file rejected, keeping current list:\n{self.persons_store.last_error}")
+                except Exception:
+                    pass
+            return
+        self._apply_persons(self.persons_store.persons)
+        self.publish_status()
+        try:
+            await bot.send_message(
+                CHAT_ID, "👥 Persons updated:\n" + "\n".join(self.persons_store.last_diff))
+        except Exception:
+            pass
+
     def _get_person_label(self, index: int = None) -> str:
         if index is None:
             index = self.current_person_index
@@ -217,8 +312,110 @@ class AppointmentChecker:
                 unbooked.append(i)
         return unbooked
 
-    async def _request_manual_captcha(self, captcha_image_path: str) -> str:
+    # ─── WORKER STATE ────────────────────────────────────────────────────
+
+    def status_snapshot(self) -> dict:
+        """Everything /status, /persons and /health show, as plain picklable data."""
+        store = self.persons_store
+        return {
+            "running": True,
+            "pid": os.getpid(),
+            "check_count": self.check_count,
+            "current_person": self._get_person_label() if self.ALL_PERSONS else "-",
+            "waiting_for_manual_captcha": self.waiting_for_manual_captcha,
+            "persons": [(p.name, booked) for p, booked in zip(self.person_records, self.persons_booked)],
+            "persons_source": store.source,
+            "persons_last_diff": list(store.last_diff),
+            "persons_last_error": store.last_error,
+            "screenshots": self.screenshots.stats(),
+            "slots": self.slot_tracker.stats(),
+            "browser_cache": self.browser_store.stats.summary(),
+            "driver_backend": self.driver_backend.summary(),
+            "apis": {"gemini": self._gemini.api.summary()} if self._gemini else {},
+            "controls": self.controls.to_dict(),
+            "cycles": self.cycle_history.summary(),
+            "last_results": [self.booking_results[p.key].describe() if p.key in self.booking_results else None
+                             for p in self.person_records],
+            "next_check_in": max(0, round(self._seconds_until_next_check())),
+            "startup": dict(startup_marks),
+        }
+
+    def export_state(self) -> dict:
+        """What a restarted worker needs to carry on where this one stopped."""
+        return {
+            "booked": [p.key for p, booked in zip(self.person_records, self.persons_booked) if booked],
+            "check_count": self.check_count,
+        }
+
+    def restore_state(self, state: dict):
+        booked = set(state.get("booked", ()))
+        self.persons_booked = [p.key in booked for p in self.person_records]
+        self.check_count = state.get("check_count", 0)
+        self._previous_shutdown_seconds = state.get("shutdown_seconds")
+
+    def request_stop(self):
+        """Finish the current person (a submit in flight completes), then leave the polling loop."""
+        self.stop_requested = True
+        self._wake_event.set()
+
+    def set_controls(self, controls: Controls):
+        """New /pause, /resume or /interval settings; taken at the top of the next loop."""
+        self._pending_controls = controls
+        self._wake_event.set()
+
+    def check_now(self):
+        """/checknow: run a cycle as soon as the current one (if any) is done."""
+        self._check_now = True
+        self._wake_event.set()
+
+    def _apply_controls(self):
+        pending, self._pending_controls = self._pending_controls, None
+        if pending is None:
+            return
+        old = self.controls
+        self.controls = pending
+        if pending.interval_seconds != old.interval_seconds:
+            logging.info(f"⏱ Interval changed to {pending.interval_seconds}s")
+        if pending.paused != old.paused:
+            logging.info("⏸ Checking paused" if pending.paused else "▶️ Checking resumed")
+        self.publish_status()
+
+    def _seconds_until_next_check(self) -> float:
+        """Counted from the end of the last cycle with the current interval."""
+        if self._last_cycle is None:
+            return 0
+        ended, backoff = self._last_cycle
+        return ended + max(self.controls.interval_seconds, backoff) - self.clock.monotonic()
+
+    async def _sleep_until_next_check(self, seconds: float = None):
+        """
+        Sleep between cycles (forever when `seconds` is None); returns early on
+        a stop request or a control command.
+        """
+        try:
+            await self.clock.wait_for(self._wake_event.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+        self._wake_event.clear()
+
+    def publish_status(self):
+        """Push status and state to the bot process (no-op outside the worker)."""
+        if worker_channel is not None:
+            worker_channel.send("status", self.status_snapshot())
+            worker_channel.send("state", self.export_state())
+
+    async def _send_capture(self, capture, caption: str):
+        """Encode a capture off the event loop and send it as a Telegram photo."""
+        data, filename = await self.screenshots.encode_async(capture)
+        await bot.send_photo(CHAT_ID, BufferedUpload(data, filename), caption=caption)
+        self.screenshots.record_sent(len(data))
+
+    async def _request_manual_captcha(self, captcha_image_path: str = None) -> str:
+        """Ask the operators (captcha_relay.py) for the code; "" on timeout."""
+        request_id = uuid.uuid4().hex[:8]
+        self._captcha_request_id = request_id
         self.waiting_for_manual_captcha = True
+        self.publish_status()  # the bot process routes replies by this flag
 
         while not self.manual_captcha_queue.empty():
             try:
@@ -226,140 +423,78 @@ class AppointmentChecker:
             except asyncio.QueueEmpty:
                 break
 
+        answered = False
         try:
-            person_label = self._get_person_label()
-            msg = (
-                f"🤖 Automatic CAPTCHA solving failed for {person_label}.\n\n"
-                "Please look at the CAPTCHA image and send me the code.\n"
-                "Format: Just send the letters/numbers you see (e.g., 'ABC123')\n"
-                "⏰ You have 1 minutes to respond."
-            )
-            await bot.send_message(CHAT_ID, msg)
-
-            sent_image = False
-            if os.path.exists(captcha_image_path):
-                try:
-                    photo = FSInputFile(captcha_image_path)
-                    await bot.send_photo(CHAT_ID, photo, caption="👆 Enter this CAPTCHA code")
-                    sent_image = True
-                except Exception as e:
-                    logging.error(f"Failed to send CAPTCHA image: {e}")
-
-            if not sent_image and os.path.exists(self.screenshot_path):
+            data = filename = None
+            if captcha_image_path and os.path.exists(captcha_image_path):
+                with open(captcha_image_path, "rb") as f:
+                    data = f.read()
+                filename = os.path.basename(captcha_image_path)
+            else:
+                # only now is the whole form worth a screenshot
+                capture = await asyncio.to_thread(self.screenshots.capture, self.driver, "manual_captcha_form")
+                if capture:
+                    data, filename = await self.screenshots.encode_async(capture)
+            await bot.request_captcha(request_id, self._get_person_label(), data, filename,
+                                      CAPTCHA_TIMEOUT_SECONDS)
+            if data is not None:
+                self.screenshots.record_sent(len(data))
+
+            logging.info(f"Waiting for manual CAPTCHA input (max {CAPTCHA_TIMEOUT_SECONDS}s)...")
+
+            with tracer.span("captcha.solve", solver="manual") as span:
                 try:
-                    photo = FSInputFile(self.screenshot_path)
-                    await bot.send_photo(CHAT_ID, photo,
-                                         caption="👆 CAPTCHA visible in form. Please send the code.")
-                except Exception as e:
-                    logging.error(f"Failed to send fallback screenshot: {e}")
-
-            logging.info("Waiting for manual CAPTCHA input (max 2 min)...")
-
-            try:
-                manual_code = await asyncio.wait_for(self.manual_captcha_queue.get(), timeout=120)
-                logging.info(f"Received manual CAPTCHA: {manual_code}")
-                return manual_code.strip().upper()
-            except asyncio.TimeoutError:
-                logging.error("Timeout waiting for manual CAPTCHA input")
-                await bot.send_message(CHAT_ID, "⏰ Timeout! No CAPTCHA received in 1 minutes.")
-                return ""
+                    manual_code = await self.clock.wait_for(self.manual_captcha_queue.get(),
+                                                            timeout=CAPTCHA_TIMEOUT_SECONDS)
+                    answered = True
+                    logging.info(f"Received manual CAPTCHA: {manual_code}")
+                    return manual_code.strip().upper()
+                except asyncio.TimeoutError:
+                    span.set_error("timeout")
+                    logging.error("Timeout waiting for manual CAPTCHA input")
+                    await bot.send_message(
+                        CHAT_ID, f"⏰ Timeout! No CAPTCHA received in {format_duration(CAPTCHA_TIMEOUT_SECONDS)}.")
+                    return ""
 
         except Exception as e:
             logging.error(f"Error requesting manual CAPTCHA: {e}")
             return ""
         finally:
+            if not answered:
+                try:
+                    await bot.cancel_captcha(request_id, "⏰ Expired")
+                except Exception:
+                    pass
+            self._captcha_request_id = None
             self.waiting_for_manual_captcha = False
+            self.publish_status()
 
-    def receive_manual_captcha(self, captcha_code: str):
-        global main_loop
-        if self.waiting_for_manual_captcha and main_loop:
-            asyncio.run_coroutine_threadsafe(
-                self.manual_captcha_queue.put(captcha_code), main_loop
-            )
+    def receive_manual_captcha(self, request_id: str, captcha_code: str) -> bool:
+        """A relayed answer; ignored unless it answers the prompt being waited on."""
+        if self.waiting_for_manual_captcha and request_id == self._captcha_request_id:
+            self.manual_captcha_queue.put_nowait(captcha_code)
             return True
         return False
 
     # ─── FORM ERROR ANALYSIS ─────────────────────────────────────────────
 
     def _get_all_form_errors(self) -> dict:
-        result = {
-            "captcha_errors": [],
-            "field_errors": [],
-            "general_errors": [],
-            "raw_errors": [],
-        }
-
         all_error_texts: list[str] = []
 
-        noise_patterns = [
-            r"^[!\*\?\.\,\;\:\-\_\#\+]$",
-            r"^nachname$", r"^vorname$", r"^geburtsdatum$",
-            r"^reisepass\s*nr\.?$", r"^geschlecht$", r"^stra[sß]e$",
-            r"^postleitzahl$", r"^plz$", r"^ort$", r"^stadt$", r"^land$",
-            r"^telefon$", r"^e-?mail$", r"^geburtsname$",
-            r"^staatsangeh[öo]rigkeit", r"^geburtsland$", r"^geburtsort$",
-            r"^ausstellungsdatum$", r"^g[üu]ltig\s*bis$",
-            r"^ausstellende\s*beh[öo]rde$", r"^reisedokument",
-            r"^sicherheitscode$", r"^captcha$",
-            r"^last\s*name$", r"^first\s*name$", r"^date\s*of\s*birth$",
-            r"^passport\s*(no\.?|number)$", r"^sex$", r"^gender$",
-            r"^street$", r"^postal\s*code$", r"^zip\s*code$", r"^city$",
-            r"^country$", r"^telephone$", r"^phone$", r"^email$",
-            r"^place\s*of\s*birth$", r"^nationality$",
-            r"^issuing\s*authority$", r"^valid\s*until$",
-            r"^date\s*of\s*issue$", r"^security\s*code$",
-            r"^\(z\.?b\.?\s*\d", r"^\(e\.?g\.?\s*\d",
-            r"^dd\.mm\.yyyy$", r"^tt\.mm\.jjjj$",
-            r"^anzahl\s*der\s*personen\s*\d",
-            r"^number\s*of\s*persons\s*\d",
-            r"^startzeit\s", r"^start\s*time\s",
-            r"^termin\s", r"^appointment\s",
-            r"^weiter$", r"^next$", r"^zur[üu]ck$", r"^back$",
-            r"^submit$", r"^abschicken$",
-            r"^\*+$", r"^\s*$",
-        ]
-
-        def _is_noise(text: str) -> bool:
-            if not text or len(text.strip()) == 0:
-                return True
-            stripped = text.strip()
-            if len(stripped) <= 2 and not stripped.isalnum():
-                return True
-            lower = stripped.lower()
-            for pattern in noise_patterns:
-                if re.match(pattern, lower):
-                    return True
-            return False
-
-        def _looks_like_real_error(text: str) -> bool:
-            lower = text.strip().lower()
-            error_indicators = [
-                "fehlt", "fehlerhaft", "ungültig", "erforderlich", "stimmt nicht",
-                "nicht überein", "ist nicht gültig", "bitte geben", "bitte wählen",
-                "pflichtfeld", "muss ausgefüllt", "darf nicht leer",
-                "is required", "is not valid", "is invalid", "does not match",
-                "is incorrect", "cannot be empty", "must be", "please enter",
-                "please select", "missing", "erroneous", "error", "failed",
-                "validation", "not match",
-                "text aus dem bild", "text from the picture",
-                "folgende angaben fehlen", "following information is missing",
-            ]
-            return any(indicator in lower for indicator in error_indicators)
-
         try:
             for sel in [".validation-summary-errors li", "div.validation-summary-errors ul li"]:
                 for el in self.driver.find_elements(By.CSS_SELECTOR, sel):
                     txt = el.text.strip()
-                    if txt and txt not in all_error_texts and not _is_noise(txt):
+                    if txt and txt not in all_error_texts and not is_noise(txt):
                         all_error_texts.append(txt)
             try:
                 for container in self.driver.find_elements(By.CSS_SELECTOR, ".validation-summary-errors"):
                     full_text = container.text.strip()
-                    if full_text and _looks_like_real_error(full_text):
+                    if full_text and looks_like_real_error(full_text):
                         for line in full_text.splitlines():
                             line = line.strip()
                             if (line and line not in all_error_texts
-                                    and not _is_noise(line) and _looks_like_real_error(line)):
+                                    and not is_noise(line) and looks_like_real_error(line)):
                                 all_error_texts.append(line)
             except Exception:
                 pass
@@ -370,7 +505,7 @@ class AppointmentChecker:
             for sel in ["span.field-validation-error", ".field-validation-error"]:
                 for el in self.driver.find_elements(By.CSS_SELECTOR, sel):
                     txt = el.text.strip()
-                    if txt and txt not in all_error_texts and not _is_noise(txt):
+                    if txt and txt not in all_error_texts and not is_noise(txt):
                         all_error_texts.append(txt)
         except Exception:
             pass
@@ -380,7 +515,7 @@ class AppointmentChecker:
                 for el in self.driver.find_elements(By.CSS_SELECTOR, sel):
                     txt = el.text.strip()
                     if (txt and txt not in all_error_texts
-                            and not _is_noise(txt) and _looks_like_real_error(txt)):
+                            and not is_noise(txt) and looks_like_real_error(txt)):
                         all_error_texts.append(txt)
         except Exception:
             pass
@@ -399,46 +534,7 @@ class AppointmentChecker:
         except Exception:
             pass
 
-        result["raw_errors"] = list(all_error_texts)
-
-        captcha_keywords = [
-            "captcha", "sicherheitscode", "security code", "verification code",
-            "text from the picture", "text aus dem bild",
-            "bild stimmt nicht", "does not match",
-            "code is incorrect", "code is invalid",
-            "stimmt nicht mit ihrer eingabe", "nicht überein", "captchatext",
-        ]
-        captcha_field_patterns = [
-            r"field\s*'?\s*captcha", r"captcha.*validation\s*error", r"captchatext",
-        ]
-        field_keywords = [
-            "is not valid", "is required", "ist erforderlich", "fehlt",
-            "missing", "erroneous", "invalid", "ungültig", "pflichtfeld",
-            "muss ausgefüllt", "darf nicht leer", "bitte geben", "bitte wählen",
-            "please enter", "please select", "cannot be empty",
-        ]
-
-        for txt in all_error_texts:
-            lower = txt.lower()
-            is_captcha = any(kw in lower for kw in captcha_keywords)
-            if not is_captcha:
-                for pat in captcha_field_patterns:
-                    if re.search(pat, lower):
-                        is_captcha = True
-                        break
-
-            if is_captcha:
-                result["captcha_errors"].append(txt)
-            elif any(kw in lower for kw in field_keywords):
-                if "captcha" not in lower and "captchatext" not in lower:
-                    result["field_errors"].append(txt)
-                else:
-                    result["captcha_errors"].append(txt)
-            else:
-                if _looks_like_real_error(txt):
-                    result["general_errors"].append(txt)
-
-        return result
+        return classify_form_errors(all_error_texts)
 
     def _is_only_captcha_error(self, errors: dict) -> bool:
         return (
@@ -450,18 +546,12 @@ class AppointmentChecker:
     def _analyse_and_log_errors(self) -> dict:
         errors = self._get_all_form_errors()
         if errors["raw_errors"]:
-            logging.error("═══ FORM ERRORS DETECTED ═══")
-            for i, e in enumerate(errors["raw_errors"], 1):
-                logging.error(f"  [{i}] {e}")
-            if errors["captcha_errors"]:
-                logging.error(f"  → CAPTCHA errors: {errors['captcha_errors']}")
-            if errors["field_errors"]:
-                logging.error(f"  → Field errors: {errors['field_errors']}")
-            if errors["general_errors"]:
-                logging.error(f"  → General errors: {errors['general_errors']}")
+            logging.error(
+                f"Form errors: captcha={errors['captcha_errors']} "
+                f"field={errors['field_errors']} general={errors['general_errors']}"
+            )
             if self._is_only_captcha_error(errors):
-                logging.info("  ✓ ONLY CAPTCHA errors — will retry")
-            logging.error("═══════════════════════════")
+                logging.info("✓ ONLY CAPTCHA errors — will retry")
         else:
             logging.info("No visible form errors found on page.")
         return errors
@@ -481,6 +571,8 @@ class AppointmentChecker:
     # ─── CAPTCHA SUBMISSION ──────────────────────────────────────────────
 
     async def _submit_form_with_captcha_handling(self, max_auto_attempts: int = 3) -> tuple:
+        # every Selenium / Gemini step blocks, so each runs in a thread; the
+        # loop stays free to receive a relayed CAPTCHA answer or a shutdown
         captcha_retry_count = 0
         max_captcha_retries = 3
         auto_attempts_failed = 0
@@ -492,74 +584,64 @@ class AppointmentChecker:
             person_label = self._get_person_label()
             logging.info(f"=== FORM SUBMISSION ATTEMPT {attempt} for {person_label} ===")
 
+            if auto_attempts_failed < max_auto_attempts and not self._gemini_ready():
+                logging.info("Gemini unavailable (no API key or circuit open) — skipping automatic CAPTCHA attempts")
+                auto_attempts_failed = max_auto_attempts
+
             if auto_attempts_failed >= max_auto_attempts:
                 logging.info("Switching to manual CAPTCHA input...")
-                self._refresh_captcha()
-                time.sleep(2)
+                await asyncio.to_thread(self._refresh_captcha)
+                await self.clock.asleep(2)
 
                 manual_captcha_path = "captcha_for_manual.png"
-                if not self._capture_captcha_screenshot(manual_captcha_path):
-                    manual_captcha_path = self.screenshot_path
+                if not await asyncio.to_thread(self._capture_captcha_screenshot, manual_captcha_path):
+                    manual_captcha_path = None
 
                 manual_code = await self._request_manual_captcha(manual_captcha_path)
                 if not manual_code:
                     return False, "Timeout waiting for manual CAPTCHA input", None
 
                 try:
-                    captcha_input = self.driver.find_element(By.ID, "CaptchaText")
-                    captcha_input.clear()
-                    time.sleep(0.3)
-                    captcha_input.send_keys(manual_code)
+                    await asyncio.to_thread(self._type_captcha, manual_code)
                 except Exception as e:
                     return False, f"Failed to fill manual CAPTCHA: {e}", None
             else:
                 logging.info(f"Automatic CAPTCHA attempt {auto_attempts_failed + 1}/{max_auto_attempts}")
                 captcha_img_path = f"captcha_auto_{auto_attempts_failed}.png"
-                if not self._capture_captcha_screenshot(captcha_img_path):
+                if not await asyncio.to_thread(self._capture_captcha_screenshot, captcha_img_path):
                     auto_attempts_failed += 1
                     if auto_attempts_failed >= max_auto_attempts:
                         continue
-                    self._refresh_captcha()
-                    time.sleep(2)
+                    await asyncio.to_thread(self._refresh_captcha)
+                    await self.clock.asleep(2)
                     continue
 
-                captcha_text = self._verify_captcha_text(captcha_img_path, max_retries=2)
+                captcha_text = await asyncio.to_thread(self._verify_captcha_text, captcha_img_path, 2)
                 if not captcha_text:
                     auto_attempts_failed += 1
                     if auto_attempts_failed >= max_auto_attempts:
                         continue
-                    self._refresh_captcha()
-                    time.sleep(2)
+                    await asyncio.to_thread(self._refresh_captcha)
+                    await self.clock.asleep(2)
                     continue
 
                 try:
-                    captcha_input = self.driver.find_element(By.ID, "CaptchaText")
-                    captcha_input.clear()
-                    time.sleep(0.3)
-                    captcha_input.send_keys(captcha_text)
+                    await asyncio.to_thread(self._type_captcha, captcha_text)
                 except Exception as e:
                     auto_attempts_failed += 1
                     continue
 
-            try:
-                self.driver.save_screenshot(self.screenshot_path)
-            except Exception:
-                pass
-
-            initial_url = self.driver.current_url
-            if not self._click_submit_button():
+            initial_url = await asyncio.to_thread(lambda: self.driver.current_url)
+            if not await asyncio.to_thread(self._click_submit_button):
                 return False, "Failed to click submit button", None
 
-            time.sleep(5)
+            await self.clock.asleep(5)
 
-            current_url = self.driver.current_url
-            url_changed = current_url != initial_url
-            form_still_present = self._check_for_form_on_page()
-            errors = self._analyse_and_log_errors()
+            (url_changed, form_still_present, errors,
+             is_confirmation, confirmation_text) = await asyncio.to_thread(self._read_submission, initial_url)
             has_any_error = bool(errors["raw_errors"])
             only_captcha = self._is_only_captcha_error(errors)
             has_field_errors = bool(errors["field_errors"])
-            is_confirmation, confirmation_text = self._check_for_confirmation_page()
 
             # CASE 1: Field errors
             if has_field_errors:
@@ -585,62 +667,47 @@ class AppointmentChecker:
                     attempt -= 1
                     continue
 
-                try:
-                    self.driver.find_element(By.ID, "CaptchaText").clear()
-                except Exception:
-                    pass
+                await asyncio.to_thread(self._clear_captcha_input)
 
-                if not self._refresh_captcha():
+                if not await asyncio.to_thread(self._refresh_captcha):
                     return False, "Failed to refresh CAPTCHA", None
-                time.sleep(2)
+                await self.clock.asleep(2)
 
                 retry_path = f"captcha_retry_{captcha_retry_count}.png"
-                if not self._capture_captcha_screenshot(retry_path):
+                if not await asyncio.to_thread(self._capture_captcha_screenshot, retry_path):
                     auto_attempts_failed += 1
                     continue
 
-                new_text = self._verify_captcha_text(retry_path, max_retries=2)
+                new_text = await asyncio.to_thread(self._verify_captcha_text, retry_path, 2)
                 if not new_text:
                     auto_attempts_failed += 1
                     continue
 
                 try:
-                    ci = self.driver.find_element(By.ID, "CaptchaText")
-                    ci.clear()
-                    time.sleep(0.3)
-                    ci.send_keys(new_text)
+                    await asyncio.to_thread(self._type_captcha, new_text)
                 except Exception:
                     auto_attempts_failed += 1
                     continue
 
-                if not self._click_submit_button():
+                if not await asyncio.to_thread(self._click_submit_button):
                     return False, "Failed to click submit on CAPTCHA retry", None
-                time.sleep(5)
+                await self.clock.asleep(5)
 
-                current_url = self.driver.current_url
-                url_changed = current_url != initial_url
-                form_still_present = self._check_for_form_on_page()
-                errors = self._analyse_and_log_errors()
+                (url_changed, form_still_present, errors,
+                 is_confirmation, confirmation_text) = await asyncio.to_thread(self._read_submission, initial_url)
                 only_captcha = self._is_only_captcha_error(errors)
                 has_field_errors = bool(errors["field_errors"])
-                is_confirmation, confirmation_text = self._check_for_confirmation_page()
 
                 if only_captcha and form_still_present:
-                    try:
-                        self.driver.find_element(By.ID, "CaptchaText").clear()
-                    except Exception:
-                        pass
+                    await asyncio.to_thread(self._clear_captcha_input)
                     continue
 
                 if has_field_errors:
                     return False, self._build_error_report(errors), None
 
                 if (is_confirmation or url_changed) and not form_still_present:
-                    try:
-                        self.driver.save_screenshot(self.confirmation_screenshot_path)
-                    except Exception:
-                        pass
-                    return True, confirmation_text or "Appointment confirmed", self.confirmation_screenshot_path
+                    capture = await asyncio.to_thread(self.screenshots.capture, self.driver, "confirmation")
+                    return True, confirmation_text or "Appointment confirmed", capture
 
                 if form_still_present and not bool(errors["raw_errors"]):
                     continue
@@ -651,11 +718,8 @@ class AppointmentChecker:
 
             # CASE 3: Confirmation
             if (is_confirmation or url_changed) and not form_still_present:
-                try:
-                    self.driver.save_screenshot(self.confirmation_screenshot_path)
-                except Exception:
-                    pass
-                return True, confirmation_text or "Appointment confirmed", self.confirmation_screenshot_path
+                capture = await asyncio.to_thread(self.screenshots.capture, self.driver, "confirmation")
+                return True, confirmation_text or "Appointment confirmed", capture
 
             # CASE 4: Unknown errors
             if form_still_present and has_any_error:
@@ -668,19 +732,36 @@ class AppointmentChecker:
 
             if form_still_present and not has_any_error:
                 auto_attempts_failed += 1
-                self._refresh_captcha()
-                time.sleep(2)
+                await asyncio.to_thread(self._refresh_captcha)
+                await self.clock.asleep(2)
                 continue
 
             if url_changed and not form_still_present:
-                try:
-                    self.driver.save_screenshot(self.confirmation_screenshot_path)
-                except Exception:
-                    pass
-                return True, "Page changed (appointment likely confirmed)", self.confirmation_screenshot_path
+                capture = await asyncio.to_thread(self.screenshots.capture, self.driver, "confirmation")
+                return True, "Page changed (appointment likely confirmed)", capture
 
         return False, f"Failed after {max_total_attempts} attempts", None
 
+    def _type_captcha(self, code: str):
+        captcha_input = self.driver.find_element(By.ID, "CaptchaText")
+        captcha_input.clear()
+        self.clock.sleep(0.3)
+        captcha_input.send_keys(code)
+
+    def _clear_captcha_input(self):
+        try:
+            self.driver.find_element(By.ID, "CaptchaText").clear()
+        except Exception:
+            pass
+
+    def _read_submission(self, initial_url: str) -> tuple:
+        """(url_changed, form_still_present, errors, is_confirmation, confirmation_text) after a submit."""
+        url_changed = self.driver.current_url != initial_url
+        form_still_present = self._check_for_form_on_page()
+        errors = self._analyse_and_log_errors()
+        is_confirmation, confirmation_text = self._check_for_confirmation_page()
+        return url_changed, form_still_present, errors, is_confirmation, confirmation_text
+
     def _build_error_report(self, errors: dict) -> str:
         lines = []
         if errors["field_errors"]:
@@ -713,28 +794,32 @@ class AppointmentChecker:
         return ""
 
     def _click_submit_button(self) -> bool:
-        for selector in [
-            "input[type='submit'][value='Weiter']",
-            "input[type='submit'][value='Next']",
-            "input[type='submit'][value='Submit']",
-            "button[type='submit']", "#btnSubmit",
-        ]:
+        with tracer.span("submit") as span:
+            for selector in [
+                "input[type='submit'][value='Weiter']",
+                "input[type='submit'][value='Next']",
+                "input[type='submit'][value='Submit']",
+                "button[type='submit']", "#btnSubmit",
+            ]:
+                try:
+                    btn = self.driver.find_element(By.CSS_SELECTOR, selector)
+                    if btn.is_displayed():
+                        self.driver.execute_script("arguments[0].scrollIntoView(true);", btn)
+                        self.clock.sleep(0.5)
+                        btn.click()
+                        span.set(selector=selector)
+                        return True
+                except NoSuchElementException:
+                    continue
+                except Exception:
+                    continue
             try:
-                btn = self.driver.find_element(By.CSS_SELECTOR, selector)
-                if btn.is_displayed():
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", btn)
-                    time.sleep(0.5)
-                    btn.click()
-                    return True
-            except NoSuchElementException:
-                continue
-            except Exception:
-                continue
-        try:
-            self.driver.execute_script("document.querySelector('form').submit();")
-            return True
-        except Exception:
-            return False
+                self.driver.execute_script("document.querySelector('form').submit();")
+                span.set(selector="form.submit()")
+                return True
+            except Exception as e:
+                span.set_error("submit_failed", str(e))
+                return False
 
     def _check_for_form_on_page(self) -> bool:
         try:
@@ -809,82 +894,87 @@ class AppointmentChecker:
                 pass
 
             self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", reload_btn)
-            time.sleep(0.5)
+            self.clock.sleep(0.5)
             self.driver.execute_script("arguments[0].click();", reload_btn)
 
             if old_src:
                 for i in range(10):
-                    time.sleep(0.5)
+                    self.clock.sleep(0.5)
                     try:
                         new_src = self.driver.find_element(By.ID, "Captcha_CaptchaImage").get_attribute("src")
                         if new_src != old_src:
-                            time.sleep(1.5)
+                            self.clock.sleep(1.5)
                             return True
                     except Exception:
                         continue
-            time.sleep(2.5)
+            self.clock.sleep(2.5)
             return True
         except Exception:
             return False
 
     def _capture_captcha_screenshot(self, image_path: str) -> bool:
-        try:
-            for by, sel in [
-                (By.ID, "Captcha_CaptchaImage"),
-                (By.CSS_SELECTOR, "img[id*='CaptchaImage']"),
-                (By.CSS_SELECTOR, "img[alt*='CAPTCHA']"),
-                (By.CSS_SELECTOR, "img[alt*='Retype']"),
-                (By.XPATH, "//img[contains(@id, 'Captcha')]"),
-            ]:
-                try:
-                    elem = self.driver.find_element(by, sel)
-                    if elem.is_displayed():
-                        self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", elem)
-                        time.sleep(0.5)
-                        elem.screenshot(image_path)
-                        if os.path.exists(image_path) and os.path.getsize(image_path) > 0:
-                            return True
-                except Exception:
-                    continue
-            return False
-        except Exception:
-            return False
+        with tracer.span("captcha.capture") as span:
+            try:
+                for retries, (by, sel) in enumerate([
+                    (By.ID, "Captcha_CaptchaImage"),
+                    (By.CSS_SELECTOR, "img[id*='CaptchaImage']"),
+                    (By.CSS_SELECTOR, "img[alt*='CAPTCHA']"),
+                    (By.CSS_SELECTOR, "img[alt*='Retype']"),
+                    (By.XPATH, "//img[contains(@id, 'Captcha')]"),
+                ]):
+                    try:
+                        elem = self.driver.find_element(by, sel)
+                        if elem.is_displayed():
+                            self.driver.execute_script("arguments[0].scrollIntoView({block:'center'});", elem)
+                            self.clock.sleep(0.5)
+                            elem.screenshot(image_path)
+                            if os.path.exists(image_path) and os.path.getsize(image_path) > 0:
+                                span.set(selector=sel, retries=retries,
+                                         bytes=os.path.getsize(image_path))
+                                return True
+                    except Exception:
+                        continue
+                span.set_error("element_not_found")
+                return False
+            except Exception as e:
+                span.set_error("capture_failed", str(e))
+                return False
 
     def _clean_captcha_text(self, text: str) -> str:
-        if not text:
-            return ""
-        cleaned = "".join(text.split())
-        cleaned = "".join(c for c in cleaned if c.isalnum())
-        return cleaned.upper()
+        return clean_captcha_text(text)
+
+    def _gemini_client(self) -> GeminiClient:
+        """None without the Gemini SDK or GOOGLE_API_KEY."""
+        if self._gemini is None and _load_gemini():
+            api_key = os.getenv("GOOGLE_API_KEY")
+            if api_key:
+                self._gemini = GeminiClient(genai, api_key, clock=self.clock)
+        return self._gemini
+
+    def _gemini_ready(self) -> bool:
+        gemini = self._gemini_client()
+        return gemini is not None and gemini.api.available
 
     def _extract_captcha_text_gemini(self, image_path: str) -> str:
-        if not GEMINI_AVAILABLE:
+        gemini = self._gemini_client()
+        if gemini is None or not os.path.exists(image_path):
             return ""
         try:
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                return ""
-            genai.configure(api_key=api_key)
-            if not os.path.exists(image_path):
-                return ""
             image = Image.open(image_path)
-            models = self._get_available_gemini_models()
-            if not models:
-                return ""
             prompt = (
                 "Look at this CAPTCHA image and extract the text.\n"
                 "Return ONLY the characters concatenated WITHOUT spaces.\n"
                 "Example: 'ABC123'. No explanation, no formatting."
             )
-            for model_name in models:
+            for model_name in gemini.models():
                 if 'gemma' in model_name.lower() and 'it' in model_name.lower():
                     continue
                 try:
-                    model = genai.GenerativeModel(model_name)
-                    response = model.generate_content([prompt, image])
-                    cleaned = self._clean_captcha_text(response.text.strip())
+                    cleaned = self._clean_captcha_text(gemini.generate(model_name, [prompt, image]).strip())
                     if cleaned:
                         return cleaned
+                except CircuitOpenError:
+                    return ""  # Gemini is down: the remaining models would fail the same way
                 except Exception:
                     continue
             return ""
@@ -892,112 +982,77 @@ class AppointmentChecker:
             return ""
 
     def _verify_captcha_text(self, image_path: str, max_retries: int = 5) -> str:
-        for attempt in range(1, max_retries + 1):
-            text1 = self._extract_captcha_text_gemini(image_path)
-            if not text1:
-                if attempt < max_retries and self._refresh_captcha():
-                    self._capture_captcha_screenshot(image_path)
-                continue
-            time.sleep(0.5)
-            text2 = self._extract_captcha_text_gemini(image_path)
-            if not text2:
-                if attempt < max_retries and self._refresh_captcha():
-                    self._capture_captcha_screenshot(image_path)
-                continue
-            if text1 == text2:
-                return text1
-            else:
-                if attempt < max_retries and self._refresh_captcha():
-                    self._capture_captcha_screenshot(image_path)
-        return ""
-
-    def _get_available_gemini_models(self) -> list:
-        try:
-            api_key = os.getenv("GOOGLE_API_KEY")
-            if not api_key:
-                return []
-            genai.configure(api_key=api_key)
-            available = []
-            try:
-                for model in genai.list_models():
-                    if 'generateContent' in model.supported_generation_methods:
-                        available.append(model.name.replace("models/", ""))
-            except Exception:
-                pass
-            if not available:
-                return ["gemini-2.0-flash", "gemini-1.5-flash-latest",
-                        "gemini-1.5-pro-latest", "gemini-1.5-flash", "gemini-pro-vision"]
-            return available
-        except Exception:
-            return ["gemini-1.5-flash", "gemini-pro-vision"]
+        with tracer.span("captcha.solve", solver="gemini") as span:
+            for attempt in range(1, max_retries + 1):
+                span.set(retries=attempt - 1)
+                if not self._gemini_ready():
+                    span.set_error("gemini_unavailable")
+                    return ""
+                text1 = self._extract_captcha_text_gemini(image_path)
+                if not text1:
+                    if attempt < max_retries and self._refresh_captcha():
+                        self._capture_captcha_screenshot(image_path)
+                    continue
+                self.clock.sleep(0.5)
+                text2 = self._extract_captcha_text_gemini(image_path)
+                if not text2:
+                    if attempt < max_retries and self._refresh_captcha():
+                        self._capture_captcha_screenshot(image_path)
+                    continue
+                if text1 == text2:
+                    return text1
+                else:
+                    if attempt < max_retries and self._refresh_captcha():
+                        self._capture_captcha_screenshot(image_path)
+            span.set_error("unsolved")
+            return ""
 
     # ─── FILL FORM ───────────────────────────────────────────────────────
 
-    async def fill_personal_form(self, person_data: dict = None) -> tuple:
+    async def fill_personal_form(self, person: Person = None) -> tuple:
         try:
-            if person_data is None:
-                person_data = self.ALL_PERSONS[self.current_person_index]
-            data = person_data
-            person_label = self._get_person_label()
+            if person is None:
+                person = self.person_records[self.current_person_index]
+            if not await asyncio.to_thread(self._fill_form_fields, person):
+                return False, ["Form page did not load"], None
 
-            date_fields = {
-                "DateOfBirth": data["DateOfBirth"],
-                "TraveldocumentDateOfIssue": data["TraveldocumentDateOfIssue"],
-                "TraveldocumentValidUntil": data["TraveldocumentValidUntil"],
-            }
-            formatted_dates = {}
-            for field, raw_date in date_fields.items():
-                try:
-                    formatted_dates[field] = parse_and_format_date(raw_date)
-                except ValueError as ve:
-                    error_msg = f"❌ INVALID DATE for {person_label} '{field}': {ve}"
-                    try:
-                        await bot.send_message(CHAT_ID, error_msg)
-                    except Exception:
-                        pass
-                    return False, [error_msg], None
+            with tracer.span("form.submit") as span:
+                success, message, screenshot = await self._submit_form_with_captcha_handling(max_auto_attempts=3)
+                if not success:
+                    span.set_error("not_booked", message)
+            return success, [message], screenshot
 
-            try:
-                self.wait.until(EC.presence_of_element_located((By.ID, "Lastname")))
-            except TimeoutException:
-                return False, ["Form page did not load"], None
+        except Exception as e:
+            return False, [f"Error: {str(e)}"], None
 
-            text_fields = [
-                ("Lastname", data["Lastname"]),
-                ("Firstname", data["Firstname"]),
-                ("DateOfBirth", formatted_dates["DateOfBirth"]),
-                ("TraveldocumentNumber", data["TraveldocumentNumber"]),
-                ("Street", data["Street"]),
-                ("Postcode", data["Postcode"]),
-                ("City", data["City"]),
-                ("Telephone", data["Telephone"]),
-                ("Email", data["Email"]),
-                ("LastnameAtBirth", data["LastnameAtBirth"]),
-                ("PlaceOfBirth", data["PlaceOfBirth"]),
-                ("TraveldocumentDateOfIssue", formatted_dates["TraveldocumentDateOfIssue"]),
-                ("TraveldocumentValidUntil", formatted_dates["TraveldocumentValidUntil"]),
-            ]
+    def _fill_form_fields(self, person: Person) -> bool:
+        """Type `person` into the form (blocking); False if the form never loaded."""
+        # dates were normalised and checked when the persons file was loaded
+        text_fields = person.text_fields
+        dropdowns = person.dropdowns
+
+        try:
+            self._wait().until(EC.presence_of_element_located((By.ID, "Lastname")))
+        except TimeoutException:
+            return False
+
+        with tracer.span("form.fill") as span:
+            failed = []
             for elem_id, value in text_fields:
                 try:
                     el = self.driver.find_element(By.ID, elem_id)
                     el.clear()
-                    time.sleep(0.1)
+                    self.clock.sleep(0.1)
                     el.send_keys(value)
                 except Exception:
+                    failed.append(elem_id)
                     logging.exception(f"Failed to fill {elem_id}")
 
-            dropdowns = [
-                ("Sex", data["Sex"]),
-                ("Country", data["Country"]),
-                ("NationalityAtBirth", data["NationalityAtBirth"]),
-                ("CountryOfBirth", data["CountryOfBirth"]),
-                ("NationalityForApplication", data["NationalityForApplication"]),
-                ("TraveldocumentIssuingAuthority", data["TraveldocumentIssuingAuthority"]),
-            ]
             for sel_id, val in dropdowns:
                 try:
                     Select(self.driver.find_element(By.ID, sel_id)).select_by_value(val)
                 except Exception:
+                    failed.append(sel_id)
                     logging.exception(f"Failed to select {sel_id}")
 
             try:
@@ -1010,23 +1065,23 @@ class AppointmentChecker:
             except Exception:
                 pass
 
-            try:
-                self.driver.save_screenshot(self.screenshot_path)
-            except Exception:
-                pass
-
-            success, message, screenshot = await self._submit_form_with_captcha_handling(max_auto_attempts=3)
-            return success, [message], screenshot
-
-        except Exception as e:
-            return False, [f"Error: {str(e)}"], None
+            span.set(fields=len(text_fields) + len(dropdowns))
+            if failed:
+                span.set_error("field_fill_failed")
+                span.set(failed_fields=failed)
+        return True
 
     # ─── NAVIGATION HELPERS ──────────────────────────────────────────────
 
+    def _wait(self, timeout: float = 10) -> ClockWait:
+        """WebDriverWait equivalent that polls on self.clock."""
+        return ClockWait(self.clock, self.driver, timeout,
+                         ignored_exceptions=(NoSuchElementException,), timeout_exception=TimeoutException)
+
     def _click_css_with_retry(self, css_selector: str, attempts: int = 3) -> bool:
         for _ in range(attempts):
             try:
-                el = WebDriverWait(self.driver, 3).until(
+                el = self._wait(3).until(
                     EC.element_to_be_clickable((By.CSS_SELECTOR, css_selector)))
                 el.click()
                 return True
@@ -1054,12 +1109,12 @@ class AppointmentChecker:
                 continue
         return False
 
-    def _get_select_by_id_with_retry(self, element_id: str, attempts: int = 3) -> Select:
+    def _get_select_by_id_with_retry(self, element_id: str, attempts: int = 3) -> "Select":
         last_exc = None
         for _ in range(attempts):
             try:
-                el = self.wait.until(EC.presence_of_element_located((By.ID, element_id)))
-                self.wait.until(
+                el = self._wait().until(EC.presence_of_element_located((By.ID, element_id)))
+                self._wait().until(
                     lambda d: len(d.find_elements(By.CSS_SELECTOR, f"#{element_id} option")) > 1)
                 return Select(el)
             except StaleElementReferenceException as e:
@@ -1076,12 +1131,9 @@ class AppointmentChecker:
         return False
 
     def _normalize_visible_text(self, text: str) -> str:
-        if text is None:
-            return ""
-        text = text.replace("\u2013", "-").replace("\u2014", "-")
-        return re.sub(r"\s+", " ", text).strip().upper()
+        return normalize_visible_text(text)
 
-    def _select_option_fuzzy(self, select: Select, target_text: str) -> bool:
+    def _select_option_fuzzy(self, select: "Select", target_text: str) -> bool:
         target_norm = self._normalize_visible_text(target_text)
         for option in select.options:
             if self._normalize_visible_text(option.text) == target_norm:
@@ -1105,159 +1157,290 @@ class AppointmentChecker:
 
     def setup_driver(self):
         chrome_options = Options()
-        chrome_options.add_argument("--headless")
-        chrome_options.add_argument("--no-sandbox")
-        chrome_options.add_argument("--disable-dev-shm-usage")
-        chrome_options.add_argument("--window-size=1920,1080")
-        chrome_options.add_argument("--disable-gpu")
-        chrome_options.add_argument("--disable-software-rasterizer")
-        chrome_options.add_argument("--log-level=3")
-        self.driver = webdriver.Chrome(service=Service(), options=chrome_options)
+        # flag set chosen by CHROME_PROFILE (see chrome_profiles.py / bench_chrome_profiles.py)
+        profile = chrome_profiles.apply(chrome_options)
+        if profile != self.chrome_profile:
+            self.chrome_profile = profile
+            logging.info(f"Chrome launch profile: {profile}")
+        if self.driver_backend.local:
+            # a remote browser can't see our filesystem
+            self._session_dir = self.browser_store.attach(
+                chrome_options, disk_cache=chrome_profiles.resolve(profile)["cache"] != "off")
+        self.driver = self.driver_backend.start(chrome_options)
+        if self.profiler.armed:
+            self.profiler.instrument_driver(self.driver)
+        self._driver_fresh = True
+
+    def prelaunch_driver(self):
+        """Start Chrome ahead of the first cycle (blocking — run it in a thread)."""
+        _load_selenium()
+        if self.driver is None:
+            self.setup_driver()
+            mark_startup("driver_ready")
+
+    def _quit_driver(self):
+        """Quit the browser and drop its session (cookies, storage); the disk cache stays."""
+        if self.driver is not None:
+            self.driver_backend.quit(self.driver)
+        self.driver = None
+        self.browser_store.release(self._session_dir)
+        self._session_dir = None
 
     def _restart_driver(self):
         """Quit and recreate the browser to get a clean session."""
-        try:
-            self.driver.quit()
-        except Exception:
-            pass
+        if self.driver is not None and self._driver_fresh:
+            # a prelaunched browser that no cycle has touched is already clean
+            self._driver_fresh = False
+            return
+        if self.driver is not None and self.driver_backend.reuses_sessions:
+            with tracer.span("driver.reset") as span:
+                reused = self.driver_backend.reset(self.driver, self.url)
+                span.set(reused=reused)
+            if reused:
+                logging.info("✓ Browser session reset (reused)")
+                return
+        self._quit_driver()
         self.setup_driver()
-        self.wait = WebDriverWait(self.driver, 10)
+        self._driver_fresh = False
         logging.info("✓ Browser restarted with fresh session")
 
     # ─── NAVIGATE TO APPOINTMENT LIST ────────────────────────────────────
 
+    def _record_cache_use(self, span):
+        """Cache hits and load time of the page just loaded (Resource Timing, one call)."""
+        try:
+            load = self.browser_store.stats.record(self.driver.execute_script(RESOURCE_TIMING_JS) or {})
+            span.set(cache_hits=load["hits"], cache_misses=load["misses"], load_ms=load["load_ms"])
+        except Exception as e:
+            logging.debug(f"Resource timing unavailable: {e}")
+
+    def _wait_for_page(self, step: str, timeout: float = 10) -> str:
+        """
+        Probe the page until it classifies as something other than loading /
+        unknown, or `timeout` passes. Error pages return on the first probe.
+        """
+        deadline = self.clock.monotonic() + timeout
+        probes = 0
+        while True:
+            try:
+                probe = self.driver.execute_script(page_state.PAGE_PROBE_JS, page_state.PROBE_IDS) or {}
+            except Exception:
+                probe = {}  # mid-navigation
+            probes += 1
+            state = page_state.classify_page(probe, step, self._page_token)
+            if state not in (page_state.LOADING, page_state.UNKNOWN) or self.clock.monotonic() >= deadline:
+                break
+            self.clock.sleep(0.25)
+
+        if state == page_state.LOADING:
+            state = page_state.UNKNOWN
+        self.page_state = state
+        self._last_probe = probe
+        if probe.get("page"):
+            self._page_token = probe["page"]
+        if state != page_state.EXPECTED:
+            logging.warning(f"Page at step '{step}' is {state} "
+                            f"(title '{probe.get('title', '')}', HTTP {probe.get('status') or '?'})")
+        return state
+
+    def _expect_page(self, step: str, span) -> bool:
+        state = self._wait_for_page(step)
+        span.set(page=state)
+        if state != page_state.EXPECTED:
+            span.set_error(f"page_{state}")
+            return False
+        return True
+
     def _navigate_to_appointment_list(self) -> bool:
+        self.page_state = None
+        self._page_token = None
         try:
             btn = "input[type='submit'][value='Next'], input[type='submit'][value='Weiter']"
 
-            self.driver.get(self.url)
+            with tracer.span("navigate.load", url=self.url) as span:
+                self.driver.get(self.url)
+                self._record_cache_use(span)
+                if not self._expect_page("office", span):
+                    return False
             logging.info("Navigated to appointment website")
 
-            self.driver.switch_to.default_content()
-            if not self._select_option_fuzzy_with_retry("Office", "TEHERAN"):
-                return False
-            logging.info("Selected office: TEHERAN")
+            with tracer.span("navigate.office", selector="#Office") as span:
+                self.driver.switch_to.default_content()
+                if not self._select_option_fuzzy_with_retry("Office", self.OFFICE):
+                    span.set_error("option_not_found")
+                    return False
+                logging.info(f"Selected office: {self.OFFICE}")
 
-            if not self._click_css_any_context(btn):
-                return False
+                if not self._click_css_any_context(btn):
+                    span.set_error("click_failed")
+                    return False
+                if not self._expect_page("calendar", span):
+                    return False
             logging.info("→ Next")
 
             # Step 2: Visa type
-            visa_value ="13713913" #"24533100" 
-            visa_text =  "Residence permit - NO STUDENTS / PUPILS but including dependents (spouses and children) of students" # "Beglaubigung / Apostille"
+            visa_value = self.CALENDAR_ID
+            visa_text = self.CALENDAR_TEXT
 
-            try:
-                visa_select = self._get_select_by_id_with_retry("CalendarId")
-            except Exception:
-                return False
-
-            try:
-                has_value = any(o.get_attribute("value") == visa_value for o in visa_select.options)
-            except StaleElementReferenceException:
-                has_value = False
+            with tracer.span("navigate.visa", selector="#CalendarId", value=visa_value) as span:
+                try:
+                    visa_select = self._get_select_by_id_with_retry("CalendarId")
+                except Exception as e:
+                    span.set_error("element_not_found", str(e))
+                    return False
 
-            if has_value:
-                for _ in range(3):
-                    try:
-                        self._get_select_by_id_with_retry("CalendarId", 1).select_by_value(visa_value)
-                        break
-                    except StaleElementReferenceException:
-                        continue
+                try:
+                    has_value = any(o.get_attribute("value") == visa_value for o in visa_select.options)
+                except StaleElementReferenceException:
+                    has_value = False
+
+                if has_value:
+                    for retries in range(3):
+                        try:
+                            self._get_select_by_id_with_retry("CalendarId", 1).select_by_value(visa_value)
+                            span.set(retries=retries)
+                            break
+                        except StaleElementReferenceException:
+                            continue
+                    else:
+                        span.set_error("stale_element")
+                        return False
                 else:
+                    span.set(fuzzy=True)
+                    if not self._select_option_fuzzy_with_retry("CalendarId", visa_text):
+                        span.set_error("option_not_found")
+                        return False
+
+                if not self._click_css_any_context(btn):
+                    span.set_error("click_failed")
                     return False
-            else:
-                if not self._select_option_fuzzy_with_retry("CalendarId", visa_text):
+                if not self._expect_page("persons", span):
                     return False
-
-            if not self._click_css_any_context(btn):
-                return False
             logging.info("→ Next (visa)")
 
-            if not self._click_css_any_context(btn):
-                return False
+            with tracer.span("navigate.persons", selector=btn) as span:
+                if not self._click_css_any_context(btn):
+                    span.set_error("click_failed")
+                    return False
+                if not self._expect_page("info", span):
+                    return False
             logging.info("→ Number of persons")
 
-            if not self._click_css_any_context(btn):
-                return False
+            with tracer.span("navigate.info", selector=btn) as span:
+                if not self._click_css_any_context(btn):
+                    span.set_error("click_failed")
+                    return False
+                if not self._expect_page("slots", span):
+                    return False
             logging.info("→ Information page")
 
             return True
         except Exception as e:
-            logging.error(f"Navigation error: {e}", exc_info=True)
+            logging.error(f"Navigation error: {type(e).__name__}: {e}")
             return False
 
     # ─── CHECK IF APPOINTMENTS AVAILABLE (without booking) ───────────────
 
+    def _extract_slots(self) -> list:
+        """Every slot on the page in one WebDriver call (see slots.SLOT_EXTRACTION_JS)."""
+        return [Slot.from_dict(d) for d in self.driver.execute_script(SLOT_EXTRACTION_JS) or []]
+
     def _check_appointments_available(self) -> tuple:
         """
         Check if there are any available appointment slots on the current page.
-        Returns (has_appointments: bool, radio_buttons: list)
+        Returns (has_appointments: bool, slots: list of Slot), with slots None
+        when the page couldn't be read (no radios and no "no appointments" text).
         """
-        time.sleep(3)
+        with tracer.span("availability", selector="input[type='radio']") as span:
+            self.driver.switch_to.default_content()
+            if self.page_state == page_state.EXPECTED and self._last_probe.get("radios") == 0:
+                # the page has loaded without radios (frames included); the slot
+                # list may still be rendered by script, so give it a moment
+                try:
+                    self._wait(RADIO_SETTLE_SECONDS).until(
+                        lambda d: (d.execute_script(page_state.PAGE_PROBE_JS, page_state.PROBE_IDS) or {}).get("radios"))
+                except TimeoutException:
+                    span.set(slots=0, from_probe=True)
+                    logging.info("No appointment radio buttons on the slot page")
+                    return False, []
+                span.set(late_radios=True)
 
-        self.driver.switch_to.default_content()
-        for frame in self.driver.find_elements(By.TAG_NAME, "iframe"):
-            try:
-                self.driver.switch_to.frame(frame)
-                if self.driver.find_elements(By.CSS_SELECTOR, "input[type='radio']"):
-                    break
-            except Exception:
-                self.driver.switch_to.default_content()
+            for frame in self.driver.find_elements(By.TAG_NAME, "iframe"):
+                try:
+                    self.driver.switch_to.frame(frame)
+                    if self.driver.find_elements(By.CSS_SELECTOR, "input[type='radio']"):
+                        span.set(in_iframe=True)
+                        break
+                except Exception:
+                    self.driver.switch_to.default_content()
 
-        try:
-            radio_buttons = WebDriverWait(self.driver, 8).until(
-                EC.presence_of_all_elements_located(
-                    (By.CSS_SELECTOR, "input[type='radio']")
+            try:
+                self._wait(8).until(
+                    EC.presence_of_all_elements_located(
+                        (By.CSS_SELECTOR, "input[type='radio']")
+                    )
                 )
-            )
-            if radio_buttons:
-                return True, radio_buttons
-            return False, []
-        except TimeoutException:
-            page_src = self.driver.page_source.lower()
-            if any(kw in page_src for kw in [
-                "no appointments", "keine termin", "nicht verfügbar",
-                "not available", "keine freien", "no free"
-            ]):
-                logging.info("No appointments available (page says so)")
-            else:
+                slots = self._extract_slots()
+                span.set(slots=len(slots), dated=sum(s.when is not None for s in slots))
+                if slots:
+                    return True, slots
+                # radios, but nothing readable: don't take that for an empty list
+                return False, None
+            except TimeoutException:
+                span.set(slots=0)
+                page_src = self.driver.page_source.lower()
+                if any(kw in page_src for kw in [
+                    "no appointments", "keine termin", "nicht verfügbar",
+                    "not available", "keine freien", "no free"
+                ]):
+                    logging.info("No appointments available (page says so)")
+                    span.set(page_says_none=True)
+                    return False, []
                 logging.info("No appointment radio buttons found (timeout)")
-            return False, []
+                return False, None
 
     # ─── SELECT SLOT AND BOOK ────────────────────────────────────────────
 
-    async def _select_and_book_appointment(self, radio_buttons) -> tuple:
+    async def _select_and_book_appointment(self, slots: list) -> tuple:
+        """Book the first of `slots` (already ranked for the current person)."""
         person_label = self._get_person_label()
+        person = self.person_records[self.current_person_index]
 
-        for attempt in range(3):
-            try:
-                if not radio_buttons:
-                    return False, [], None
+        opened, info = await asyncio.to_thread(self._open_booking_form, slots, person)
+        if not opened:
+            return False, info, None
 
-                first_radio = radio_buttons[0]
+        ok, info, ss = await self.fill_personal_form(person)
 
-                details = "First available appointment"
-                try:
-                    rid = first_radio.get_attribute("id")
-                    rval = first_radio.get_attribute("value")
-                    lbl = self.driver.find_element(By.CSS_SELECTOR, f"label[for='{rid}']")
-                    details = f"{lbl.text} on {rval}"
-                except Exception:
-                    pass
+        if ok:
+            logging.info(f"✓ Appointment booked for {person_label}: {info}")
+        else:
+            logging.error(f"Booking failed for {person_label}: {info}")
+        return ok, info, ss
 
-                try:
-                    self.driver.execute_script("arguments[0].scrollIntoView(true);", first_radio)
-                    first_radio.click()
-                except Exception:
-                    try:
-                        rid = first_radio.get_attribute('id')
-                        self.driver.find_element(By.CSS_SELECTOR, f"label[for='{rid}']").click()
-                    except Exception:
-                        if attempt < 2:
-                            continue
-                        return False, [], None
+    def _open_booking_form(self, slots: list, person: Person) -> tuple:
+        """
+        Choose the best slot and continue to the personal-data form (blocking
+        — run it in a thread). Returns (opened, info), `info` being the
+        messages to report when the form could not be reached.
+        """
+        person_label = self._get_person_label()
 
-                time.sleep(3)
+        for attempt in range(3):
+            try:
+                if not slots:
+                    return False, []
+
+                slot = slots[0]
+                if not self.driver.execute_script(SLOT_CLICK_JS, slot.index):
+                    # the page changed under us: read it again and take the best remaining slot
+                    slots = rank_slots(self._extract_slots(), person.slot_prefs)
+                    if attempt < 2:
+                        continue
+                    return False, []
+                logging.info(f"Selected slot {slot.describe()} for {person_label}")
+
+                self.clock.sleep(3)
 
                 weiter = self._click_css_any_context(
                     "input[type='submit'][value='Weiter'], input[type='submit'][value='Next']"
@@ -1270,9 +1453,11 @@ class AppointmentChecker:
                     except Exception:
                         pass
                 if not weiter:
-                    return False, [], None
+                    return False, []
 
-                time.sleep(2)
+                state = self._wait_for_page("form")
+                if state not in (page_state.EXPECTED, page_state.UNKNOWN):
+                    return False, [f"Site is {state} after choosing the slot"]
 
                 self.driver.switch_to.default_content()
                 for frame in self.driver.find_elements(By.TAG_NAME, "iframe"):
@@ -1284,187 +1469,279 @@ class AppointmentChecker:
                         self.driver.switch_to.default_content()
 
                 try:
-                    self.wait.until(EC.presence_of_element_located((By.ID, "Lastname")))
+                    self._wait().until(EC.presence_of_element_located((By.ID, "Lastname")))
                     logging.info(f"✓ Form loaded for {person_label}")
                 except TimeoutException:
-                    return False, [], None
-
-                person_data = self.ALL_PERSONS[self.current_person_index]
-                ok, info, ss = await self.fill_personal_form(person_data)
-
-                if ok:
-                    logging.info(f"✓ Appointment booked for {person_label}: {info}")
-                else:
-                    logging.error(f"Booking failed for {person_label}: {info}")
-                return ok, info, ss
+                    return False, []
+                return True, []
 
             except StaleElementReferenceException:
-                time.sleep(2)
+                self.clock.sleep(2)
                 continue
             except Exception as e:
                 logging.error(f"Attempt {attempt+1} error for {person_label}: {e}")
                 if attempt < 2:
-                    time.sleep(2)
+                    self.clock.sleep(2)
                     continue
-                return False, [], None
+                return False, []
 
-        return False, [], None
+        return False, []
+
+    # ─── SITE TROUBLE (maintenance / rate limiting) ──────────────────────
+
+    async def _enter_site_trouble(self, state: str) -> int:
+        """Count consecutive cycles ending on `state`; notify on the first. Returns the backoff."""
+        if state == self._trouble_state:
+            self._trouble_streak += 1
+        else:
+            self._trouble_state, self._trouble_streak = state, 1
+        backoff = page_state.backoff_seconds(state, self._trouble_streak)
+        logging.warning(f"Site is {state} ({self._trouble_streak}x in a row) — backing off {backoff}s")
+        if self._trouble_streak == 1:
+            try:
+                await bot.send_message(
+                    CHAT_ID, f"🚧 Appointment site is {state.replace('_', ' ')}. "
+                             f"Pausing checks for {backoff // 60} min.")
+            except Exception:
+                pass
+        return backoff
+
+    async def _leave_site_trouble(self):
+        if self._trouble_state is None:
+            return
+        logging.info(f"Site is reachable again after {self._trouble_streak} {self._trouble_state} cycle(s)")
+        try:
+            await bot.send_message(CHAT_ID, "✅ Appointment site is reachable again.")
+        except Exception:
+            pass
+        self._trouble_state, self._trouble_streak = None, 0
 
     # ─── SINGLE CHECK CYCLE (one navigation + check + possibly book) ─────
 
-    async def _run_single_check_cycle(self) -> dict:
+    def _record_person(self, cycle: CycleRecord, person_idx: int, outcome: str,
+                       ok: bool = False, detail: str = ""):
+        result = PersonResult(person_idx, outcome, ok, detail[:200])
+        cycle.persons.append(result)
+        self.booking_results[self.person_records[person_idx].key] = result
+
+    async def _run_single_check_cycle(self) -> CycleRecord:
         """
         Run one complete check cycle:
         1. Navigate to appointment list
         2. Check if slots available
         3. If yes, try to book for each unbooked person
 
-        Returns dict with:
-            'appointments_found': bool
-            'bookings_made': list of (person_index, success, info, screenshot)
-            'error': str or None
+        Returns the CycleRecord: a PersonResult per person checked, whether
+        any slots were found and the backoff (maintenance / rate limiting).
         """
-        result = {
-            "appointments_found": False,
-            "bookings_made": [],
-            "error": None,
-        }
+        result = CycleRecord(self.check_count, started=self.clock.time())
 
         unbooked = self._get_unbooked_indices()
         if not unbooked:
             return result
 
         for person_idx in unbooked:
+            if self.stop_requested:
+                # shutting down: whatever was in flight for the previous person has finished
+                logging.info("Stop requested — skipping the remaining persons this cycle")
+                break
             self.current_person_index = person_idx
             person_label = self._get_person_label()
 
-            logging.info(f"")
-            logging.info(f"{'─'*50}")
-            logging.info(f"  Checking for {person_label}")
-            logging.info(f"{'─'*50}")
-
-            try:
-                # Restart browser for clean session each attempt
-                self._restart_driver()
-
-                if not self._navigate_to_appointment_list():
-                    logging.error(f"Navigation failed for {person_label}")
-                    result["bookings_made"].append(
-                        (person_idx, False, [f"Navigation failed"], None)
-                    )
-                    continue
-
-                has_appointments, radio_buttons = self._check_appointments_available()
-
-                if not has_appointments:
-                    logging.info(f"No appointments available for {person_label}")
-                    result["bookings_made"].append(
-                        (person_idx, False, ["No appointments available"], None)
-                    )
-                    continue
-
-                # Appointments found!
-                result["appointments_found"] = True
-                logging.info(f"🎉 Appointments FOUND for {person_label}!")
+            logging.info(f"── Checking for {person_label}")
 
+            with tracer.span("person", person=person_idx + 1) as span:
                 try:
-                    await bot.send_message(
-                        CHAT_ID,
-                        f"🎉 Appointments found! Attempting to book for {person_label}..."
-                    )
-                except Exception:
-                    pass
+                    # Restart browser for clean session each attempt. The
+                    # Selenium steps block, so they run in a thread and the
+                    # loop stays free for shutdown, CAPTCHA replies and /status.
+                    await asyncio.to_thread(self._restart_driver)
+
+                    if not await asyncio.to_thread(self._navigate_to_appointment_list):
+                        logging.error(f"Navigation failed for {person_label}")
+                        span.set_error("navigation")
+                        self._record_person(result, person_idx, "navigation", detail=f"page {self.page_state}")
+                        if self.page_state in (page_state.MAINTENANCE, page_state.RATE_LIMITED):
+                            # the site is down or pushing back: other persons would hit the same page
+                            result.backoff = await self._enter_site_trouble(self.page_state)
+                            break
+                        continue
+                    await self._leave_site_trouble()
+
+                    has_appointments, slots = await asyncio.to_thread(self._check_appointments_available)
+                    if slots is None:
+                        # an unreadable page is not an empty list: leave the slot tracker alone
+                        logging.warning(f"Could not read the slot list for {person_label}")
+                        span.set_error("slots_unreadable")
+                        self._record_person(result, person_idx, "error", detail="slot list unreadable")
+                        continue
+                    diff = self.slot_tracker.update(self.OFFICE, self.CALENDAR_ID, slots, self.clock.time())
+                    span.set(slots_appeared=len(diff.appeared), slots_vanished=len(diff.vanished))
+                    if diff:
+                        logging.info(f"Slot changes at {self.OFFICE}/{self.CALENDAR_ID}: "
+                                     f"+{len(diff.appeared)} -{len(diff.vanished)}, {diff.visible} visible")
+                        try:
+                            await bot.send_message(CHAT_ID, diff.describe())
+                        except Exception:
+                            pass
+
+                    if not has_appointments:
+                        logging.info(f"No appointments available for {person_label}")
+                        span.set(outcome="no_slots")
+                        self._record_person(result, person_idx, "no_slots")
+                        continue
 
-                ok, info, ss = await self._select_and_book_appointment(radio_buttons)
-                result["bookings_made"].append((person_idx, ok, info, ss))
+                    # Appointments found!
+                    result.appointments_found = True
+                    prefs = self.person_records[person_idx].slot_prefs
+                    usable = rank_slots(slots, prefs)
+                    span.set(usable_slots=len(usable))
+                    if not usable:
+                        logging.info(f"{len(slots)} slot(s) found, none usable for {person_label} "
+                                     f"({prefs.describe()})")
+                        span.set(outcome="no_usable_slots")
+                        self._record_person(result, person_idx, "no_usable_slots", detail=prefs.describe())
+                        continue
 
-                if ok:
-                    self.persons_booked[person_idx] = True
-                    logging.info(f"✅ {person_label} BOOKED!")
+                    logging.info(f"🎉 Appointments FOUND for {person_label}! "
+                                 f"{len(usable)}/{len(slots)} usable, best {usable[0].describe()}")
 
                     try:
-                        person_data = self.ALL_PERSONS[person_idx]
-                        msg = (
-                            f"✅✅✅ {person_label} BOOKED! ✅✅✅\n\n"
-                            f"👤 {person_data['Firstname']} {person_data['Lastname']}\n"
-                            f"📧 {person_data['Email']}\n"
-                        )
-                        if info:
-                            msg += f"📋 {info[0] if isinstance(info, list) else info}\n"
-                        await bot.send_message(CHAT_ID, msg)
-
-                        if ss and os.path.exists(ss):
-                            await bot.send_photo(
-                                CHAT_ID, FSInputFile(ss),
-                                caption=f"✅ Confirmation for {person_label}"
-                            )
-                    except Exception:
-                        pass
-                else:
-                    logging.error(f"❌ Booking FAILED for {person_label}")
-                    try:
-                        detail = "\n".join(str(t) for t in info) if isinstance(info, list) else str(info)
                         await bot.send_message(
-                            CHAT_ID,
-                            f"❌ Booking failed for {person_label}:\n{detail}\n\n"
-                            f"Will retry on next cycle..."
-                        )
+                            CHAT_ID, f"🎯 Booking {usable[0].describe()} for {person_label}...")
                     except Exception:
                         pass
 
-            except Exception as e:
-                logging.error(f"Error checking for {person_label}: {e}", exc_info=True)
-                result["bookings_made"].append(
-                    (person_idx, False, [f"Error: {str(e)}"], None)
-                )
-                continue
+                    ok, info, ss = await self._select_and_book_appointment(usable)
+                    first_info = info[0] if isinstance(info, list) and info else info
+                    self._record_person(result, person_idx, "booked" if ok else "booking_failed",
+                                        ok=ok, detail=str(first_info or ""))
+
+                    span.set(outcome="booked" if ok else "booking_failed")
+                    if ok:
+                        self.persons_booked[person_idx] = True
+                        self.publish_status()  # a worker crash must not forget a booking
+                        logging.info(f"✅ {person_label} BOOKED!")
+
+                        try:
+                            person_data = self.ALL_PERSONS[person_idx]
+                            msg = (
+                                f"✅✅✅ {person_label} BOOKED! ✅✅✅\n\n"
+                                f"👤 {person_data['Firstname']} {person_data['Lastname']}\n"
+                                f"📧 {person_data['Email']}\n"
+                            )
+                            if info:
+                                msg += f"📋 {info[0] if isinstance(info, list) else info}\n"
+                            await bot.send_message(CHAT_ID, msg)
+
+                            if ss:
+                                await self._send_capture(ss, f"✅ Confirmation for {person_label}")
+                        except Exception:
+                            pass
+                    else:
+                        logging.error(f"❌ Booking FAILED for {person_label}")
+                        span.set_error("booking_failed")
+                        try:
+                            detail = "\n".join(str(t) for t in info) if isinstance(info, list) else str(info)
+                            await bot.send_message(
+                                CHAT_ID,
+                                f"❌ Booking failed for {person_label}:\n{detail}\n\n"
+                                f"Will retry on next cycle..."
+                            )
+                        except Exception:
+                            pass
+
+                except Exception as e:
+                    logging.error(f"Error checking for {person_label}: {e}", exc_info=True)
+                    span.set_error(type(e).__name__, str(e))
+                    self._record_person(result, person_idx, "error", detail=f"{type(e).__name__}: {e}")
+                    continue
 
         return result
 
+    async def _run_profiled_cycle(self) -> CycleRecord:
+        """Run one cycle under the armed profiler and send the report when it's done."""
+        self.profiler.start_cycle(getattr(self, "driver", None))
+        try:
+            return await self._run_single_check_cycle()
+        finally:
+            report = self.profiler.end_cycle()
+            if report:
+                try:
+                    await bot.send_document(
+                        CHAT_ID,
+                        BufferedUpload(report.encode("utf-8"),
+                                       filename=f"profile_cycle_{self.check_count}.txt"),
+                        caption="🔬 Profile report",
+                    )
+                except Exception as e:
+                    logging.error(f"Failed to send profile report: {e}")
+
     # ─── MAIN POLLING LOOP ───────────────────────────────────────────────
 
     async def run_polling_loop(self):
         """
-        Main loop: check every CHECK_INTERVAL_SECONDS until ALL persons are booked.
+        Main loop: check every controls.interval_seconds until ALL persons are booked.
         """
-        # Initialize booking status
-        self.persons_booked = [False] * len(self.ALL_PERSONS)
-        self.check_count = 0
-
-        logging.info(f"")
-        logging.info(f"{'='*60}")
-        logging.info(f"  APPOINTMENT POLLING STARTED")
-        logging.info(f"  Checking every {CHECK_INTERVAL_SECONDS} seconds ({CHECK_INTERVAL_SECONDS//60} min)")
-        logging.info(f"  Booking for {len(self.ALL_PERSONS)} person(s):")
-        for i, p in enumerate(self.ALL_PERSONS):
-            logging.info(f"    {i+1}. {p['Firstname']} {p['Lastname']}")
-        logging.info(f"{'='*60}")
+        # persons_booked / check_count come from __init__ or restore_state()
+        logging.info(
+            f"APPOINTMENT POLLING STARTED — every {self.controls.interval_seconds}s"
+            f"{' (paused)' if self.controls.paused else ''} for "
+            + ", ".join(f"{p['Firstname']} {p['Lastname']}" for p in self.ALL_PERSONS)
+        )
+
+        if self.check_count and self._all_persons_booked():
+            logging.info("All persons already booked according to the checkpoint — nothing to do")
+            return
 
         try:
-            persons_list = "\n".join(
-                f"  {i+1}. {p['Firstname']} {p['Lastname']}"
-                for i, p in enumerate(self.ALL_PERSONS)
-            )
-            await bot.send_message(
-                CHAT_ID,
-                f"🚀 Appointment polling started!\n\n"
-                f"⏱ Checking every {CHECK_INTERVAL_SECONDS//60} minutes\n"
-                f"👥 Booking for:\n{persons_list}\n\n"
-                f"I'll notify you when appointments are found and booked."
-            )
+            if self.check_count:
+                # a restarted worker or a redeploy: the chat already has the full announcement
+                note = f"♻️ Checker restarted, resuming after check #{self.check_count}"
+                if self._previous_shutdown_seconds is not None:
+                    note += f" (previous shutdown took {self._previous_shutdown_seconds:.1f}s)"
+                await bot.send_message(CHAT_ID, note + ".")
+            else:
+                persons_list = "\n".join(
+                    f"  {i+1}. {p['Firstname']} {p['Lastname']}"
+                    for i, p in enumerate(self.ALL_PERSONS)
+                )
+                await bot.send_message(
+                    CHAT_ID,
+                    f"🚀 Appointment polling started!\n\n"
+                    f"⏱ Checking every {format_duration(self.controls.interval_seconds)}\n"
+                    f"👥 Booking for:\n{persons_list}\n\n"
+                    f"I'll notify you when appointments are found and booked."
+                )
         except Exception:
             pass
 
-        while not self._all_persons_booked():
+        while True:
+            if self.stop_requested:
+                logging.info(f"Polling stopped on request after {self.check_count} check cycles")
+                return
+            # controls change only here, never in the middle of a cycle
+            self._apply_controls()
+            if not self._check_now:
+                if self.controls.paused:
+                    await self._sleep_until_next_check()
+                    continue
+                remaining = self._seconds_until_next_check()
+                if remaining > 0:
+                    logging.info(f"💤 Sleeping {remaining:.0f}s until next check...")
+                    await self._sleep_until_next_check(remaining)
+                    continue
+            self._check_now = False
+
+            await self._reload_persons_if_changed()
+            if self._all_persons_booked():
+                break
+
             self.check_count += 1
             unbooked = self._get_unbooked_indices()
             unbooked_names = [self._get_person_label(i) for i in unbooked]
 
-            logging.info(f"")
-            logging.info(f"{'='*60}")
-            logging.info(f"  CHECK CYCLE #{self.check_count}")
-            logging.info(f"  Still need to book: {', '.join(unbooked_names)}")
-            logging.info(f"{'='*60}")
+            logging.info(f"CHECK CYCLE #{self.check_count} — still need to book: {', '.join(unbooked_names)}")
 
             # Send periodic status every 10 checks (every ~20 min)
             if self.check_count % 10 == 0:
@@ -1479,29 +1756,49 @@ class AppointmentChecker:
                         CHAT_ID,
                         f"📊 Status update (check #{self.check_count}):\n\n"
                         f"{booked_str}\n"
-                        f"Still checking every {CHECK_INTERVAL_SECONDS//60} min..."
+                        f"Still checking every {format_duration(self.controls.interval_seconds)}..."
                     )
                 except Exception:
                     pass
 
+            wait_seconds = self.controls.interval_seconds
+            backoff = 0
+            cycle_result = None
+            cycle_t0 = self.clock.monotonic()
             try:
-                cycle_result = await self._run_single_check_cycle()
-
-                if not cycle_result["appointments_found"]:
+                with tracer.span("cycle", number=self.check_count,
+                                 unbooked=len(unbooked)) as span:
+                    if self.profiler.armed:
+                        cycle_result = await self._run_profiled_cycle()
+                    else:
+                        cycle_result = await self._run_single_check_cycle()
+                    span.set(appointments_found=cycle_result.appointments_found)
+                    if cycle_result.backoff:
+                        span.set(page=self.page_state, backoff=cycle_result.backoff)
+                cycle_result.duration_ms = round((self.clock.monotonic() - cycle_t0) * 1000, 1)
+                self.cycle_history.record(cycle_result)
+                mark_startup("first_cycle_completed")
+                self.publish_status()
+                backoff = cycle_result.backoff
+                wait_seconds = max(self.controls.interval_seconds, backoff)
+
+                if not cycle_result.appointments_found:
                     logging.info(
                         f"No appointments found in cycle #{self.check_count}. "
-                        f"Waiting {CHECK_INTERVAL_SECONDS}s before next check..."
+                        f"Waiting {wait_seconds}s before next check..."
                     )
                 else:
                     # Appointments were found — check if we need to wait or continue immediately
-                    any_new_booking = any(
-                        bm[1] for bm in cycle_result["bookings_made"]
-                    )
-                    if any_new_booking and not self._all_persons_booked():
+                    if cycle_result.booked_any and not self._all_persons_booked():
                         logging.info("Some bookings made. Checking immediately for remaining persons...")
-                        continue  # skip the wait, check again now
+                        wait_seconds = 0  # skip the wait, check again now
 
             except Exception as e:
+                if cycle_result is None:
+                    failed = CycleRecord(self.check_count, started=self.clock.time())
+                    failed.error = f"{type(e).__name__}: {e}"[:200]
+                    failed.duration_ms = round((self.clock.monotonic() - cycle_t0) * 1000, 1)
+                    self.cycle_history.record(failed)
                 logging.error(f"Error in check cycle #{self.check_count}: {e}", exc_info=True)
                 try:
                     await bot.send_message(
@@ -1514,17 +1811,11 @@ class AppointmentChecker:
             # Check if all booked after this cycle
             if self._all_persons_booked():
                 break
-
-            # Wait before next check
-            logging.info(f"💤 Sleeping {CHECK_INTERVAL_SECONDS}s until next check...")
-            await asyncio.sleep(CHECK_INTERVAL_SECONDS)
+            # the top of the loop sleeps until the next one is due (or a control command)
+            self._last_cycle = (self.clock.monotonic(), backoff) if wait_seconds else None
 
         # ─── All persons booked! ───
-        logging.info(f"")
-        logging.info(f"{'='*60}")
-        logging.info(f"  🎉🎉🎉 ALL PERSONS BOOKED! 🎉🎉🎉")
-        logging.info(f"  Total check cycles: {self.check_count}")
-        logging.info(f"{'='*60}")
+        logging.info(f"🎉 ALL PERSONS BOOKED after {self.check_count} check cycles")
 
         try:
             summary = "🎉🎉🎉 ALL APPOINTMENTS BOOKED! 🎉🎉🎉\n\n"
@@ -1536,10 +1827,7 @@ class AppointmentChecker:
             pass
 
     def cleanup(self):
-        try:
-            self.driver.quit()
-        except Exception:
-            pass
+        self._quit_driver()
 
 
 # ─────────────────────────────────────────────────────────────────────────────
@@ -1556,12 +1844,12 @@ async def send_notification(available_times, screenshot_path=None, confirmation_
         await bot.send_message(CHAT_ID, message)
         if screenshot_path and os.path.exists(screenshot_path):
             try:
-                await bot.send_photo(CHAT_ID, FSInputFile(screenshot_path), caption="📸 Form screenshot")
+                await bot.send_photo(CHAT_ID, FileUpload(screenshot_path), caption="📸 Form screenshot")
             except Exception:
                 pass
         if confirmation_screenshot and os.path.exists(confirmation_screenshot):
             try:
-                await bot.send_photo(CHAT_ID, FSInputFile(confirmation_screenshot), caption="✅ Confirmation")
+                await bot.send_photo(CHAT_ID, FileUpload(confirmation_screenshot), caption="✅ Confirmation")
             except Exception:
                 pass
     except Exception as e:
@@ -1572,92 +1860,510 @@ async def send_notification(available_times, screenshot_path=None, confirmation_
 # TELEGRAM HANDLERS
 # ─────────────────────────────────────────────────────────────────────────────
 
-@dp.message(Command("status"))
-async def handle_status(message: Message):
-    global checker_instance
-    if checker_instance:
-        waiting = checker_instance.waiting_for_manual_captcha
-        person_label = checker_instance._get_person_label()
-        checks = checker_instance.check_count
-
-        booked_str = ""
-        for i, p in enumerate(checker_instance.ALL_PERSONS):
-            booked = (i < len(checker_instance.persons_booked)
-                      and checker_instance.persons_booked[i])
-            status = "✅ Booked" if booked else "⏳ Waiting"
-            booked_str += f"  {status} - {p['Firstname']} {p['Lastname']}\n"
-
-        await message.reply(
-            f"🤖 Bot is running\n"
-            f"📊 Check cycles: {checks}\n"
-            f"👤 Currently: {person_label}\n"
-            f"🔒 CAPTCHA wait: {'Yes ⏳' if waiting else 'No'}\n\n"
-            f"👥 Booking status:\n{booked_str}"
-        )
-    else:
-        await message.reply("Bot is idle (no active checker).")
+def _api_summary_line(api: dict) -> str:
+    state = {"closed": "ok", "open": "⚡ circuit open", "half_open": "retrying"}[api["state"]]
+    line = f"{state}, {api['calls']} call(s), {api['errors']} error(s)"
+    if api["timeouts"]:
+        line += f" ({api['timeouts']} timeout(s))"
+    if api["rejected"]:
+        line += f", {api['rejected']} skipped"
+    if api["p50_ms"] is not None:
+        line += f", p50 {api['p50_ms']} / p95 {api['p95_ms']} ms"
+    return line
+
+
+async def handle_status(message: "Message"):
+    status = checker_supervisor.status if checker_supervisor else {}
+    if not status.get("running"):
+        await message.reply("Bot is idle (checker worker not running).")
+        return
 
+    booked_str = ""
+    for name, booked in status["persons"]:
+        booked_str += f"  {'✅ Booked' if booked else '⏳ Waiting'} - {name}\n"
+
+    shots = status["screenshots"]
+    slots = status["slots"]
+    slot_line = (f"{slots['visible']} visible, {slots['appeared']} appeared / "
+                 f"{slots['vanished']} vanished since start")
+    if slots["median_lifetime_s"] is not None:
+        slot_line += f", median lifetime {format_duration(slots['median_lifetime_s'])}"
+    cache = status["browser_cache"]
+    cache_line = "no page loads yet"
+    if cache["hit_ratio"] is not None:
+        cache_line = (f"{cache['hit_ratio']:.0%} hits, {cache['bytes_from_cache'] // 1024} KiB from cache, "
+                      f"load cold {cache['avg_cold_load_ms'] or '-'} / warm {cache['avg_warm_load_ms'] or '-'} ms")
+        if cache["saved_ms"] is not None:
+            cache_line += f", ~{cache['saved_ms'] / 1000:.0f}s saved"
+    backend = status["driver_backend"]
+    backend_line = (f"{backend['name']}, {backend['sessions']} session(s) "
+                    f"(start avg {backend['avg_session_ms'] or '-'} ms)")
+    if backend["resets"]:
+        backend_line += f", {backend['resets']} reuse(s) (reset avg {backend['avg_reset_ms']} ms)"
+    if backend["avg_ping_ms"] is not None:
+        backend_line += f", ping avg {backend['avg_ping_ms']} ms"
+    if backend["health_failures"]:
+        backend_line += f", {backend['health_failures']} failed health check(s)"
+    apis = {"telegram": telegram_api.summary(), **status["apis"]}
+    relay = captcha_relay.stats()
+    cycles = status["cycles"]
+    cycle_lines = "no cycles yet\n"
+    if cycles["cycles"]:
+        duration = cycles["cycle_duration"]
+        cycle_lines = (f"{cycles['cycles']} run, p50 {duration['p50_ms'] / 1000:.1f}s / "
+                       f"p95 {duration['p95_ms'] / 1000:.1f}s, {cycles['cycle_success_rate']:.0%} without errors")
+        if cycles["check_success_rate"] is not None:
+            cycle_lines += f", {cycles['check_success_rate']:.0%} of person checks ok"
+        cycle_lines += "\n"
+        if cycles["slowest_steps"]:
+            cycle_lines += "  slowest steps (p50 / p95): " + ", ".join(
+                f"{name} {step['p50_ms'] / 1000:.1f}/{step['p95_ms'] / 1000:.1f}s"
+                for name, step in cycles["slowest_steps"].items()) + "\n"
+        if cycles["top_errors"]:
+            cycle_lines += "  errors: " + ", ".join(
+                f"{name} ×{count}" for name, count in cycles["top_errors"].items()) + "\n"
+    controls = status["controls"]
+    schedule_line = f"every {format_duration(controls['interval_seconds'])}, "
+    schedule_line += "⏸ paused" if controls["paused"] else f"next check in {format_duration(status['next_check_in'])}"
+    relay_line = (f"{relay['operators']} operator(s), {relay['answered']}/{relay['requests']} answered, "
+                  f"{relay['expired']} expired")
+    if relay["median_latency_s"] is not None:
+        relay_line += (f", reply median {format_duration(relay['median_latency_s'])} "
+                       f"/ max {format_duration(relay['max_latency_s'])}")
+    api_lines = "".join(f"  {name}: {_api_summary_line(api)}\n" for name, api in apis.items())
+
+    await message.reply(
+        f"🤖 Bot is running (worker pid {status['pid']}, "
+        f"{checker_supervisor.restarts} restart(s))\n"
+        f"📊 Check cycles: {status['check_count']}\n"
+        f"⏯ Schedule: {schedule_line}\n"
+        f"📈 Cycles: {cycle_lines}"
+        f"👤 Currently: {status['current_person']}\n"
+        f"🔒 CAPTCHA wait: {'Yes ⏳' if status['waiting_for_manual_captcha'] else 'No'}\n"
+        f"🙋 CAPTCHA relay: {relay_line}\n"
+        f"📸 Screenshots: {shots['in_memory']} in memory "
+        f"({shots['in_memory_bytes'] // 1024} KiB), "
+        f"encode avg {shots['avg_encode_ms']:.0f} ms, "
+        f"{shots['bytes_sent'] // 1024} KiB sent\n"
+        f"📅 Slots: {slot_line}\n"
+        f"🗄 Browser cache: {cache_line}\n"
+        f"🌐 WebDriver: {backend_line}\n"
+        f"🔌 APIs:\n{api_lines}"
+        f"⏱ Startup: {startup_report(status['startup'])}\n\n"
+        f"👥 Booking status:\n{booked_str}"
+    )
+
+
+async def handle_persons(message: "Message"):
+    """/persons — current persons list, where it came from and the last reload diff."""
+    status = checker_supervisor.status if checker_supervisor else {}
+    if not status.get("running"):
+        await message.reply("Bot is idle (checker worker not running).")
+        return
 
-@dp.message(F.text)
-async def handle_manual_captcha(message: Message):
-    global checker_instance
+    lines = [f"👥 Persons ({status['persons_source']}):"]
+    for i, ((name, booked), last) in enumerate(zip(status["persons"], status["last_results"])):
+        lines.append(f"  {i + 1}. {name} {'✅' if booked else '⏳'}" + (f" — last check: {last}" if last else ""))
+    if status["persons_last_diff"]:
+        lines.append("\nLast change:")
+        lines.extend(f"  {line}" for line in status["persons_last_diff"])
+    if status["persons_last_error"]:
+        lines.append(f"\n⚠️ Last file rejected:\n{status['persons_last_error']}")
+    await message.reply("\n".join(lines))
 
-    if message.text.startswith('/'):
+
+async def handle_profile(message: "Message"):
+    """/profile [N] — profile the next N check cycles (default 3)."""
+    if str(message.chat.id) != str(CHAT_ID):
         return
+
+    parts = message.text.split()
+    try:
+        cycles = int(parts[1]) if len(parts) > 1 else 3
+    except ValueError:
+        await message.reply("Usage: /profile [cycles]")
+        return
+
+    cycles = max(1, min(cycles, MAX_PROFILE_CYCLES))
+    if not checker_supervisor or not checker_supervisor.send("profile", cycles):
+        await message.reply("Bot is idle (checker worker not running).")
+        return
+    await message.reply(f"🔬 Profiling the next {cycles} cycle(s). The report will follow as a document.")
+
+
+def _control_store() -> ControlStore:
+    global control_store
+    if control_store is None:
+        control_store = ControlStore(CHECK_INTERVAL_SECONDS)
+    return control_store
+
+
+async def _update_controls(message: "Message", **changes):
+    """Persist a control change and hand it to the worker. Returns the new Controls."""
+    try:
+        controls = _control_store().update(**changes)
+    except OSError as e:
+        await message.reply(f"❌ Could not save the setting: {e}")
+        return None
+    if not (checker_supervisor and checker_supervisor.send("controls", controls.to_dict())):
+        await message.reply("ℹ️ Checker worker not running — the setting applies when it starts.")
+    return controls
+
+
+async def handle_pause(message: "Message"):
+    """/pause — skip cycles until /resume; the browser stays warm."""
     if str(message.chat.id) != str(CHAT_ID):
         return
+    if await _update_controls(message, paused=True):
+        await message.reply("⏸ Checking paused after the current cycle. /resume to continue.")
 
-    if checker_instance and checker_instance.waiting_for_manual_captcha:
-        captcha_code = message.text.strip().upper()
-        if not captcha_code.isalnum():
-            await message.reply("❌ Invalid. Send only letters/numbers (e.g., 'ABC123')")
-            return
-        if checker_instance.receive_manual_captcha(captcha_code):
-            await message.reply(f"✅ CAPTCHA received: {captcha_code}\nSubmitting form...")
+
+async def handle_resume(message: "Message"):
+    if str(message.chat.id) != str(CHAT_ID):
+        return
+    controls = await _update_controls(message, paused=False)
+    if controls:
+        await message.reply(f"▶️ Checking resumed, every {format_duration(controls.interval_seconds)}.")
+
+
+async def handle_interval(message: "Message"):
+    """/interval [duration] — show or set the time between cycles (e.g. 90, 5m)."""
+    if str(message.chat.id) != str(CHAT_ID):
+        return
+    parts = message.text.split(maxsplit=1)
+    if len(parts) == 1:
+        current = _control_store().controls.interval_seconds
+        await message.reply(f"⏱ Checking every {format_duration(current)}. "
+                            f"Change with /interval <{format_duration(MIN_INTERVAL_SECONDS)}–"
+                            f"{format_duration(MAX_INTERVAL_SECONDS)}>, e.g. /interval 5m")
+        return
+    try:
+        seconds = parse_interval(parts[1])
+    except ValueError as e:
+        await message.reply(f"❌ {e}")
+        return
+    if await _update_controls(message, interval_seconds=seconds):
+        await message.reply(f"⏱ Interval set to {format_duration(seconds)}, counted from the last cycle.")
+
+
+async def handle_checknow(message: "Message"):
+    """/checknow — run a cycle now (after the current one, if one is running), even when paused."""
+    if str(message.chat.id) != str(CHAT_ID):
+        return
+    if not checker_supervisor or not checker_supervisor.send("check_now"):
+        await message.reply("Bot is idle (checker worker not running).")
+        return
+    await message.reply("🔎 A check cycle starts now (or right after the one in progress).")
+
+
+async def handle_manual_captcha(message: "Message"):
+    """An operator's answer to a relayed CAPTCHA prompt (see captcha_relay.py)."""
+    if message.text.startswith('/'):
+        return
+    relay = captcha_relay
+    if relay is None or not relay.is_operator(message.chat.id):
+        return
+
+    reply_to = message.reply_to_message.message_id if message.reply_to_message else None
+    prompt, reason = relay.match(message.chat.id, reply_to)
+    if prompt is None:
+        if reason == "closed":
+            await message.reply("⌛ That CAPTCHA was already answered or has expired.")
+        elif reason == "ambiguous":
+            await message.reply("↩️ Several CAPTCHAs are open — reply to the one you mean.")
         else:
-            await message.reply("⚠️ Not expecting CAPTCHA input right now.")
-    else:
-        await message.reply("ℹ️ Not waiting for CAPTCHA input.")
+            await message.reply("ℹ️ Not waiting for CAPTCHA input.")
+        return
+
+    captcha_code = message.text.strip().upper()
+    if not captcha_code.isalnum():
+        await message.reply("❌ Invalid. Send only letters/numbers (e.g., 'ABC123')")
+        return
+    who = message.from_user.full_name if message.from_user else str(message.chat.id)
+    latency = relay.claim(prompt, message.chat.id, who)
+    if latency is None:
+        await message.reply(f"⌛ Already answered by {prompt.answered_by}.")
+        return
+    if not checker_supervisor or not checker_supervisor.send("captcha_reply", prompt.request_id, captcha_code):
+        await message.reply("⚠️ Not expecting CAPTCHA input right now.")
+        return
+    await message.reply(f"✅ CAPTCHA received: {captcha_code} (after {format_duration(latency)})\n"
+                        "Submitting form...")
+    await relay.finish(prompt, message.chat.id, captcha_code, latency)
+
+
+COMMAND_HANDLERS = (
+    ("status", handle_status),
+    ("persons", handle_persons),
+    ("profile", handle_profile),
+    ("pause", handle_pause),
+    ("resume", handle_resume),
+    ("interval", handle_interval),
+    ("checknow", handle_checknow),
+)
+
+
+def _build_router() -> "Router":
+    """The handlers above on a fresh router (bot process, after _load_aiogram())."""
+    router = Router()
+    router.message.middleware(_mark_first_response)
+    for command, handler in COMMAND_HANDLERS:
+        router.message(Command(command))(handler)
+    # anything that isn't a command may be a CAPTCHA answer; registered last
+    router.message(F.text)(handle_manual_captcha)
+    return router
 
 
 # ─────────────────────────────────────────────────────────────────────────────
-# MAIN
+# CHECKER WORKER PROCESS
 # ─────────────────────────────────────────────────────────────────────────────
 
-async def run_appointment_checker():
-    """Run the appointment checker polling loop."""
+STATUS_PUBLISH_SECONDS = 5
+
+
+async def run_appointment_checker(state: dict = None):
+    """Run the appointment checker polling loop (inside the worker process)."""
     global checker_instance
 
     logging.info("=== APPOINTMENT CHECKER STARTED (POLLING MODE) ===")
     checker = AppointmentChecker()
+    if state:
+        checker.restore_state(state)
     checker_instance = checker
+    # one listener per running checker; removed again below
+    tracer.add_listener(checker.cycle_history.observe_span)
 
+    async def publish_periodically():
+        while True:
+            checker.publish_status()
+            await asyncio.sleep(STATUS_PUBLISH_SECONDS)
+
+    publisher = asyncio.create_task(publish_periodically())
     try:
+        # selenium import + Chrome launch happen in a thread while the loop keeps serving IPC
+        await asyncio.to_thread(checker.prelaunch_driver)
         await checker.run_polling_loop()
+    except asyncio.CancelledError:
+        logging.info("Checker stop requested")
     except Exception as e:
         logging.error(f"Polling loop error: {e}", exc_info=True)
         try:
-            await bot.send_message(CHAT_ID, f"❌ Fatal error: {e}")
+            await bot.send_message(CHAT_ID, f"❌ Fatal error: {e}\nRestarting the checker...")
         except Exception:
             pass
+        raise
     finally:
+        publisher.cancel()
+        checker.publish_status()
         logging.info("Cleaning up...")
         checker.cleanup()
+        tracer.remove_listener(checker.cycle_history.observe_span)
         checker_instance = None
         logging.info("=== CHECKER FINISHED ===")
 
 
-async def main():
+def _handle_worker_command(message: tuple, main_task: asyncio.Task):
+    """Commands from the bot process, run on the worker's event loop."""
+    kind = message[0]
+    checker = checker_instance
+    if kind == "_closed":
+        # the bot process is gone; nobody is left to deliver anything
+        main_task.cancel()
+    elif kind == "shutdown":
+        if checker is not None:
+            checker.request_stop()
+        # whatever is still running at the deadline is cancelled at its next await
+        main_loop.call_later(message[1], main_task.cancel)
+    elif checker is None:
+        return
+    elif kind == "captcha_reply":
+        if not checker.receive_manual_captcha(message[1], message[2]):
+            asyncio.ensure_future(bot.send_message(CHAT_ID, "⚠️ Not expecting CAPTCHA input right now."))
+    elif kind == "profile":
+        checker.profiler.arm(message[1])
+    elif kind == "controls":
+        checker.set_controls(Controls(**message[1]))
+    elif kind == "check_now":
+        checker.check_now()
+
+
+async def _worker_async(state: dict):
     global main_loop
+    main_loop = asyncio.get_running_loop()
+    trace_writer = configure_tracing()
+    trace_writer.start()
+    main_task = asyncio.current_task()
+    worker_channel.start_reader(main_loop, lambda message: _handle_worker_command(message, main_task))
+    try:
+        await run_appointment_checker(state)
+    finally:
+        await trace_writer.stop()
+
+
+def checker_worker_main(conn, state: dict, process_start: float, log_level: int):
+    """
+    Entry point of the checker worker process (started by CheckerSupervisor).
+
+    Telegram sends go through WorkerBot over `conn`; the bot process does the
+    actual API calls. Exit code 0 means "all booked" or a requested stop;
+    anything else makes the supervisor restart the worker with `state`.
+    """
+    global bot, worker_channel, PROCESS_START
+    # Ctrl-C reaches the whole process group; the bot process decides how to stop
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker_channel = Channel(conn)
+    forward_logging(worker_channel, log_level)
+    bot = WorkerBot(worker_channel)
+    if not state:
+        # first worker: report startup milestones relative to the bot process start
+        PROCESS_START = process_start
+    try:
+        asyncio.run(_worker_async(state))
+    except (asyncio.CancelledError, KeyboardInterrupt):
+        pass
+    except Exception:
+        sys.exit(1)
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# MAIN (bot process)
+# ─────────────────────────────────────────────────────────────────────────────
+
+# Fly sends SIGTERM on deploys and migrations and kills the machine
+# kill_timeout (fly.toml) seconds later; keep this comfortably below that.
+SHUTDOWN_DEADLINE_SECONDS = int(os.getenv("SHUTDOWN_DEADLINE_SECONDS", 20))
+
+
+def _checkpoint_path() -> str:
+    return os.getenv("CHECKPOINT_FILE") or data_path("checkpoint.json")
+
+
+def save_checkpoint(state: dict, **extra):
+    """Persist the worker's booking state so the next boot resumes instead of starting over."""
+    try:
+        atomic_write_json(_checkpoint_path(), {**state, **extra, "saved_at": round(time.time())})
+    except OSError as e:
+        logging.error(f"Failed to write checkpoint: {e}")
+
+
+async def _forward_worker_message(message: tuple):
+    """Perform a Telegram call the worker asked for (deadline + circuit breaker)."""
+    kind = message[0]
+    try:
+        if kind == "send_message":
+            _, chat_id, text = message
+            await telegram_api.acall(bot.send_message, chat_id, text)
+        elif kind == "send_photo":
+            _, chat_id, data, filename, caption = message
+            await telegram_api.acall(bot.send_photo, chat_id, BufferedInputFile(data, filename), caption=caption)
+        elif kind == "send_document":
+            _, chat_id, data, filename, caption = message
+            await telegram_api.acall(bot.send_document, chat_id, BufferedInputFile(data, filename), caption=caption)
+        elif kind == "captcha_request":
+            _, request_id, label, data, filename, timeout = message
+            await captcha_relay.open(request_id, label, data, filename, timeout)
+        elif kind == "captcha_cancel":
+            await captcha_relay.close(message[1], message[2])
+        else:
+            logging.warning(f"Unknown worker message: {kind}")
+    except CircuitOpenError:
+        pass  # Telegram is known to be down; counted as rejected in /status
+
+
+def start_health_server():
+    """Serve /health on HEALTH_PORT from a daemon thread (Flask is imported there)."""
+
+    def serve():
+        from flask import Flask, jsonify
+
+        app = Flask(__name__)
+
+        @app.route("/")
+        @app.route("/health")
+        def health():
+            supervisor = checker_supervisor
+            status = supervisor.status if supervisor else {}
+            return jsonify({
+                "status": "ok",
+                "uptime_seconds": round(time.perf_counter() - PROCESS_START, 1),
+                "worker_running": bool(supervisor and supervisor.alive),
+                "worker_restarts": supervisor.restarts if supervisor else 0,
+                "check_cycles": status.get("check_count", 0),
+                "startup": {**status.get("startup", {}), **startup_marks},
+            })
+
+        mark_startup("health_endpoint")
+        app.run(host="0.0.0.0", port=HEALTH_PORT, use_reloader=False)
+
+    threading.Thread(target=serve, name="health", daemon=True).start()
+
+
+async def _mark_first_response(handler, event, data):
+    result = await handler(event, data)
+    mark_startup("first_telegram_response")
+    return result
+
+
+async def main():
+    global main_loop, bot, checker_supervisor, captcha_relay
     main_loop = asyncio.get_event_loop()
-    polling_task = asyncio.create_task(dp.start_polling(bot))
-    checker_task = asyncio.create_task(run_appointment_checker())
 
+    stop_requested = asyncio.Event()
+
+    def on_signal(sig):
+        if stop_requested.is_set():
+            logging.warning(f"{sig.name} received again — already shutting down")
+        else:
+            logging.info(f"🛑 {sig.name} received — shutting down")
+        stop_requested.set()
+
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        main_loop.add_signal_handler(sig, on_signal, sig)
+
+    _load_aiogram()
+    mark_startup("aiogram_loaded")
+    # one aiohttp session (connection pool) for every Telegram call, with a bounded timeout
+    bot = Bot(token=TOKEN, session=AiohttpSession(timeout=TELEGRAM_TIMEOUT_SECONDS))
+    captcha_relay = CaptchaRelay(bot, telegram_api, operators_from_env(CHAT_ID))
+    dp = Dispatcher()
+    dp.include_router(_build_router())
+
+    start_health_server()
+    polling_task = asyncio.create_task(dp.start_polling(bot, handle_signals=False))
+    mark_startup("telegram_polling")
+
+    checkpoint = load_json(_checkpoint_path(), default={})
+    if checkpoint:
+        logging.info(f"Resuming from checkpoint: check #{checkpoint.get('check_count', 0)}, "
+                     f"{len(checkpoint.get('booked', []))} booked")
+    checker_supervisor = CheckerSupervisor(
+        checker_worker_main, _forward_worker_message,
+        args=(PROCESS_START, logging.getLogger().level),
+        on_state=save_checkpoint, state=checkpoint,
+    )
+    supervisor_task = asyncio.create_task(checker_supervisor.run())
+    stop_task = asyncio.create_task(stop_requested.wait())
+    shutdown_started = None
     try:
-        await checker_task
+        await asyncio.wait({supervisor_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+        if stop_requested.is_set():
+            shutdown_started = time.perf_counter()
+            logging.info(f"Letting the checker finish its current step "
+                         f"(deadline {SHUTDOWN_DEADLINE_SECONDS}s)...")
+            await checker_supervisor.stop(SHUTDOWN_DEADLINE_SECONDS)
+        # returns once every message the worker sent before exiting has been delivered
+        await supervisor_task
     except Exception as e:
-        logging.error(f"Checker task error: {e}", exc_info=True)
+        logging.error(f"Checker supervisor error: {e}", exc_info=True)
     finally:
+        stop_task.cancel()
+        await checker_supervisor.stop()
+        if shutdown_started is not None:
+            shutdown_seconds = round(time.perf_counter() - shutdown_started, 1)
+            save_checkpoint(checker_supervisor.state, shutdown_seconds=shutdown_seconds)
+            logging.info(f"🛑 Checker stopped and state checkpointed in {shutdown_seconds:.1f}s")
+        else:
+            save_checkpoint(checker_supervisor.state)
         logging.info("Stopping Telegram polling...")
         await dp.stop_polling()
         polling_task.cancel()
@@ -1669,15 +2375,23 @@ async def main():
             await bot.session.close()
         except Exception:
             pass
-        logging.info("=== ALL DONE ===")
+        if shutdown_started is not None:
+            logging.info(f"=== ALL DONE — shutdown took {time.perf_counter() - shutdown_started:.1f}s ===")
+        else:
+            logging.info("=== ALL DONE ===")
 
 
 if __name__ == "__main__":
+    log_listener = setup_logging()
+    exit_code = 0
     try:
         asyncio.run(main())
     except KeyboardInterrupt:
         logging.info("Terminated by user")
-        sys.exit(130)
+        exit_code = 130
     except Exception as e:
         logging.error(f"Crashed: {e}", exc_info=True)
-        sys.exit(1)
\ No newline at end of file
+        exit_code = 1
+    finally:
+        log_listener.stop()
+    sys.exit(exit_code)
\ No newline at end of file
@@ -0,0 +1,131 @@
+"""
+Warm browser cache shared across driver restarts.
+
+Every booking session gets a brand-new Chrome user-data-dir (cookies, local
+and session storage, history), deleted when the browser quits. The HTTP disk
+cache is not part of it: all sessions point --disk-cache-dir at one shared
+directory, so the site's scripts, styles and images are fetched once and then
+served from disk by every later browser. It lives on tmpfs (/dev/shm) when
+available, else on the data volume.
+
+After the first page load of a session the Resource Timing entries are read
+(RESOURCE_TIMING_JS) to count cache hits and to compare load times of cold
+and warm loads.
+
+Environment:
+    BROWSER_CACHE        on | off                  (default on)
+    BROWSER_CACHE_DIR    /dev/shm/appointment-chrome, or <data volume>/chrome-cache
+    BROWSER_CACHE_MB     64
+"""
+
+import logging
+import os
+import shutil
+import uuid
+
+from storage import data_path
+
+RESOURCE_TIMING_JS = """
+var nav = performance.getEntriesByType("navigation")[0];
+return {
+    load_ms: nav ? Math.round((nav.loadEventEnd || nav.domContentLoadedEventEnd) - nav.startTime) : 0,
+    resources: performance.getEntriesByType("resource").map(function (e) {
+        return [e.transferSize, e.decodedBodySize];
+    })
+};
+"""
+
+
+def _default_root() -> str:
+    if os.path.isdir("/dev/shm") and os.access("/dev/shm", os.W_OK):
+        return "/dev/shm/appointment-chrome"
+    return data_path("chrome-cache")
+
+
+class CacheStats:
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.bytes_from_cache = 0
+        self.cold_loads = 0
+        self.cold_ms = 0
+        self.warm_loads = 0
+        self.warm_ms = 0
+
+    def record(self, timing: dict) -> dict:
+        """Add one page load's Resource Timing data. Returns that load's numbers."""
+        hits = misses = cached_bytes = 0
+        for transfer_size, body_size in timing.get("resources") or ():
+            if transfer_size:
+                misses += 1
+            elif body_size:
+                # nothing went over the wire but there is a body: served from cache
+                hits += 1
+                cached_bytes += body_size
+            # both zero: cross-origin without Timing-Allow-Origin, can't tell
+        load_ms = timing.get("load_ms") or 0
+        self.hits += hits
+        self.misses += misses
+        self.bytes_from_cache += cached_bytes
+        if hits:
+            self.warm_loads += 1
+            self.warm_ms += load_ms
+        else:
+            self.cold_loads += 1
+            self.cold_ms += load_ms
+        return {"hits": hits, "misses": misses, "load_ms": load_ms}
+
+    def summary(self) -> dict:
+        total = self.hits + self.misses
+        avg_cold = self.cold_ms / self.cold_loads if self.cold_loads else None
+        avg_warm = self.warm_ms / self.warm_loads if self.warm_loads else None
+        saved = None
+        if avg_cold is not None and avg_warm is not None:
+            saved = round(max(0.0, avg_cold - avg_warm) * self.warm_loads)
+        return {
+            "hit_ratio": round(self.hits / total, 3) if total else None,
+            "bytes_from_cache": self.bytes_from_cache,
+            "avg_cold_load_ms": round(avg_cold) if avg_cold is not None else None,
+            "avg_warm_load_ms": round(avg_warm) if avg_warm is not None else None,
+            "saved_ms": saved,
+        }
+
+
+class BrowserProfileStore:
+    def __init__(self, root: str = None, cache_mb: int = None):
+        self.enabled = os.getenv("BROWSER_CACHE", "on").lower() not in ("0", "off", "false", "no")
+        self.root = root or os.getenv("BROWSER_CACHE_DIR") or _default_root()
+        self.cache_dir = os.path.join(self.root, "cache")
+        self.sessions_dir = os.path.join(self.root, "sessions")
+        self.cache_bytes = (cache_mb or int(os.getenv("BROWSER_CACHE_MB", 64))) * 1024 * 1024
+        self.stats = CacheStats()
+        if self.enabled:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                # sessions of a previous (crashed) process are never reused
+                shutil.rmtree(self.sessions_dir, ignore_errors=True)
+                os.makedirs(self.sessions_dir, exist_ok=True)
+            except OSError as e:
+                logging.warning(f"Browser cache disabled, cannot use {self.root}: {e}")
+                self.enabled = False
+
+    def attach(self, options, disk_cache: bool = True) -> str:
+        """
+        Give a new browser its own user-data-dir (and the shared disk cache
+        unless `disk_cache` is False). Returns the session dir, or None when
+        the store is disabled.
+        """
+        if not self.enabled:
+            return None
+        session_dir = os.path.join(self.sessions_dir, uuid.uuid4().hex[:12])
+        os.makedirs(session_dir)
+        options.add_argument(f"--user-data-dir={session_dir}")
+        if disk_cache:
+            options.add_argument(f"--disk-cache-dir={self.cache_dir}")
+            options.add_argument(f"--disk-cache-size={self.cache_bytes}")
+        return session_dir
+
+    def release(self, session_dir: str):
+        """Delete a session's cookies and storage once its browser has quit."""
+        if session_dir:
+            shutil.rmtree(session_dir, ignore_errors=True)
@@ -0,0 +1,186 @@
+"""
+Manual CAPTCHA relay (bot process).
+
+When automatic solving fails the worker sends ("captcha_request", ...) with
+the CAPTCHA image. The relay sends it to every operator in parallel as one
+photo whose caption is the prompt, with ForceReply so the operator's answer
+is a reply to that exact message. The first valid reply wins: it goes to the
+worker tagged with the request id, and every other operator's copy is
+edited to say who answered. A plain message (not a reply) is accepted too
+when exactly one prompt is open in that chat.
+
+Each prompt has its own timeout (the worker's); the relay records how long
+the humans took to answer.
+
+Environment:
+    CAPTCHA_OPERATORS         comma-separated chat ids (default CHAT_ID)
+    CAPTCHA_TIMEOUT_SECONDS   120
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from slots import format_duration
+
+CAPTCHA_TIMEOUT_SECONDS = int(os.getenv("CAPTCHA_TIMEOUT_SECONDS", 120))
+# the worker closes its own prompts; this only catches a worker that died waiting
+ORPHAN_GRACE_SECONDS = 30
+
+
+def operators_from_env(default_chat_id) -> list:
+    raw = os.getenv("CAPTCHA_OPERATORS", "")
+    operators = [part.strip() for part in raw.split(",") if part.strip()]
+    return operators or [str(default_chat_id)]
+
+
+class CaptchaPrompt:
+    __slots__ = ("request_id", "label", "sent_at", "timeout", "messages", "has_photo", "answered_by")
+
+    def __init__(self, request_id: str, label: str, timeout: float, has_photo: bool):
+        self.request_id = request_id
+        self.label = label
+        self.sent_at = time.monotonic()
+        self.timeout = timeout
+        self.messages = {}  # chat id → message id of that operator's copy
+        self.has_photo = has_photo
+        self.answered_by = None
+
+
+class CaptchaRelay:
+    def __init__(self, bot, api, operators: list, history: int = 100):
+        self.bot = bot
+        self.api = api  # clients.ApiClient for Telegram
+        self.operators = [str(o) for o in operators]
+        self.pending = {}        # request id → CaptchaPrompt
+        self._by_message = {}    # (chat id, message id) → request id, open prompts only
+        self._closed = deque(maxlen=50)  # (chat id, message id) of answered / expired prompts
+        self.requests = 0
+        self.answered = 0
+        self.expired = 0
+        self.latencies = deque(maxlen=history)  # seconds from prompt to accepted answer
+        self.answers_by_operator = {}
+
+    def is_operator(self, chat_id) -> bool:
+        return str(chat_id) in self.operators
+
+    # ─── OPEN / CLOSE ────────────────────────────────────────────────────
+
+    async def open(self, request_id: str, label: str, data: bytes, filename: str, timeout: float):
+        """Send the prompt to every operator at once."""
+        from aiogram.types import BufferedInputFile, ForceReply
+
+        prompt = CaptchaPrompt(request_id, label, timeout, has_photo=data is not None)
+        self.pending[request_id] = prompt
+        self.requests += 1
+        text = (
+            f"🤖 Automatic CAPTCHA solving failed for {label}.\n\n"
+            "Reply to this message with the letters/numbers you see (e.g. 'ABC123').\n"
+            f"⏰ You have {format_duration(timeout)} to respond."
+        )
+        markup = ForceReply(input_field_placeholder="CAPTCHA code")
+
+        async def send(chat_id: str):
+            if data is not None:
+                sent = await self.api.acall(self.bot.send_photo, chat_id, BufferedInputFile(data, filename),
+                                            caption=text, reply_markup=markup)
+            else:
+                sent = await self.api.acall(self.bot.send_message, chat_id, text + "\n(no image available)",
+                                            reply_markup=markup)
+            prompt.messages[chat_id] = sent.message_id
+            self._by_message[(chat_id, sent.message_id)] = request_id
+
+        results = await asyncio.gather(*(send(chat) for chat in self.operators), return_exceptions=True)
+        for chat, result in zip(self.operators, results):
+            if isinstance(result, Exception):
+                logging.warning(f"Could not send CAPTCHA prompt to {chat}: {type(result).__name__}: {result}")
+        logging.info(f"CAPTCHA prompt {request_id} sent to {len(prompt.messages)}/{len(self.operators)} operator(s)")
+        asyncio.get_running_loop().call_later(
+            timeout + ORPHAN_GRACE_SECONDS,
+            lambda: asyncio.ensure_future(self.close(request_id, "⏰ Expired")))
+
+    async def close(self, request_id: str, note: str) -> bool:
+        """Withdraw an unanswered prompt (worker timed out or gave up)."""
+        prompt = self.pending.get(request_id)
+        if prompt is None or prompt.answered_by is not None:
+            return False
+        self.expired += 1
+        self._forget(prompt)
+        await self._edit_all(prompt, f"{note} — CAPTCHA for {prompt.label}")
+        return True
+
+    def _forget(self, prompt: CaptchaPrompt):
+        self.pending.pop(prompt.request_id, None)
+        for chat_id, message_id in prompt.messages.items():
+            self._by_message.pop((chat_id, message_id), None)
+            self._closed.append((chat_id, message_id))
+
+    async def _edit_all(self, prompt: CaptchaPrompt, text: str, skip_chat: str = None):
+        async def edit(chat_id: str, message_id: int):
+            if prompt.has_photo:
+                await self.api.acall(self.bot.edit_message_caption, chat_id=chat_id, message_id=message_id,
+                                     caption=text)
+            else:
+                await self.api.acall(self.bot.edit_message_text, text, chat_id=chat_id, message_id=message_id)
+
+        await asyncio.gather(*(edit(chat, mid) for chat, mid in prompt.messages.items() if chat != skip_chat),
+                             return_exceptions=True)
+
+    # ─── REPLIES ─────────────────────────────────────────────────────────
+
+    def match(self, chat_id, reply_to_message_id: int = None) -> tuple:
+        """
+        (prompt, "ok") for the prompt a message answers, else (None, reason):
+        "closed" (reply to an answered/expired prompt), "ambiguous" (no reply-to
+        and several prompts open in this chat) or "none".
+        """
+        chat_id = str(chat_id)
+        if reply_to_message_id is not None:
+            request_id = self._by_message.get((chat_id, reply_to_message_id))
+            if request_id is not None:
+                return self.pending[request_id], "ok"
+            if (chat_id, reply_to_message_id) in self._closed:
+                return None, "closed"
+        open_here = [p for p in self.pending.values() if chat_id in p.messages]
+        if len(open_here) == 1:
+            return open_here[0], "ok"
+        return None, "ambiguous" if open_here else "none"
+
+    def claim(self, prompt: CaptchaPrompt, chat_id, who: str) -> float:
+        """
+        First valid answer wins (no await in here, so it is atomic on the loop).
+        Returns the operator's response time in seconds, or None if someone
+        else was faster.
+        """
+        if prompt.answered_by is not None or prompt.request_id not in self.pending:
+            return None
+        prompt.answered_by = who
+        latency = time.monotonic() - prompt.sent_at
+        self.answered += 1
+        self.latencies.append(latency)
+        chat_id = str(chat_id)
+        self.answers_by_operator[chat_id] = self.answers_by_operator.get(chat_id, 0) + 1
+        self._forget(prompt)
+        return latency
+
+    async def finish(self, prompt: CaptchaPrompt, chat_id, code: str, latency: float):
+        """Tell the other operators the prompt is taken."""
+        await self._edit_all(
+            prompt, f"✅ CAPTCHA for {prompt.label} answered by {prompt.answered_by} "
+                    f"after {format_duration(latency)}: {code}",
+            skip_chat=str(chat_id))
+
+    def stats(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "operators": len(self.operators),
+            "requests": self.requests,
+            "answered": self.answered,
+            "expired": self.expired,
+            "open": len(self.pending),
+            "median_latency_s": latencies[len(latencies) // 2] if latencies else None,
+            "max_latency_s": latencies[-1] if latencies else None,
+            "answers_by_operator": dict(self.answers_by_operator),
+        }
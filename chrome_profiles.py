@@ -0,0 +1,113 @@
+"""
+Named Chrome launch profiles.
+
+A profile is one choice per dimension below. It is named either by a preset
+("default", "lean") or by the choices that differ from the defaults, e.g.
+"headless=new,process=single,window=1280". benchmarks/bench_chrome_profiles.py
+measures combinations and prints those names; set the winner with
+
+    CHROME_PROFILE=headless=new,features=lean
+
+"default" is exactly the flag set setup_driver always used.
+"""
+
+import logging
+import os
+
+# always passed: running as root in a container, no GPU, quiet logs
+COMMON_ARGS = (
+    "--no-sandbox",
+    "--disable-dev-shm-usage",
+    "--disable-gpu",
+    "--disable-software-rasterizer",
+    "--log-level=3",
+)
+
+DIMENSIONS = {
+    "headless": {
+        "old": ("--headless",),
+        "new": ("--headless=new",),
+    },
+    "process": {
+        "default": (),
+        "per-site": ("--process-per-site",),
+        "single": ("--single-process", "--no-zygote"),
+    },
+    "features": {
+        "default": (),
+        "lean": (
+            "--disable-extensions",
+            "--disable-background-networking",
+            "--disable-component-update",
+            "--disable-default-apps",
+            "--disable-sync",
+            "--mute-audio",
+            "--disable-features=Translate,OptimizationHints,MediaRouter,InterestFeedContentSuggestions",
+        ),
+    },
+    "cache": {
+        "default": (),
+        "off": ("--disk-cache-size=1", "--media-cache-size=1", "--aggressive-cache-discard"),
+    },
+    "window": {
+        "1920": ("--window-size=1920,1080",),
+        "1280": ("--window-size=1280,800",),
+    },
+}
+
+DEFAULT_CHOICES = {"headless": "old", "process": "default", "features": "default",
+                   "cache": "default", "window": "1920"}
+
+PRESETS = {
+    "default": {},
+    "lean": {"headless": "new", "features": "lean", "window": "1280"},
+}
+
+
+def resolve(name: str) -> dict:
+    """Profile name → full {dimension: choice}. Raises ValueError for unknown names."""
+    name = (name or "default").strip()
+    if name in PRESETS:
+        return {**DEFAULT_CHOICES, **PRESETS[name]}
+
+    choices = dict(DEFAULT_CHOICES)
+    for part in name.split(","):
+        dimension, sep, choice = part.partition("=")
+        dimension, choice = dimension.strip(), choice.strip()
+        if not sep or dimension not in DIMENSIONS:
+            raise ValueError(f"unknown Chrome profile part '{part}' "
+                             f"(dimensions: {', '.join(DIMENSIONS)}; presets: {', '.join(PRESETS)})")
+        if choice not in DIMENSIONS[dimension]:
+            raise ValueError(f"unknown {dimension} '{choice}' (use {', '.join(DIMENSIONS[dimension])})")
+        choices[dimension] = choice
+    return choices
+
+
+def profile_name(choices: dict) -> str:
+    """Canonical name: only the choices that differ from the defaults."""
+    parts = [f"{d}={c}" for d, c in choices.items() if DEFAULT_CHOICES.get(d) != c]
+    return ",".join(parts) or "default"
+
+
+def chrome_arguments(choices: dict) -> list:
+    args = list(COMMON_ARGS)
+    for dimension in DIMENSIONS:
+        args.extend(DIMENSIONS[dimension][choices[dimension]])
+    return args
+
+
+def apply(options, name: str = None) -> str:
+    """
+    Add the arguments of profile `name` (default: CHROME_PROFILE) to a
+    selenium Options object. Falls back to "default" on an unknown name.
+    Returns the canonical name of the profile used.
+    """
+    name = name or os.getenv("CHROME_PROFILE", "default")
+    try:
+        choices = resolve(name)
+    except ValueError as e:
+        logging.error(f"CHROME_PROFILE: {e} — using the default profile")
+        choices = resolve("default")
+    for arg in chrome_arguments(choices):
+        options.add_argument(arg)
+    return profile_name(choices)
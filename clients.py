@@ -0,0 +1,263 @@
+"""
+Client layer for the external APIs (Telegram, Gemini).
+
+Every call to a dependency goes through its ApiClient:
+
+    telegram = ApiClient("telegram", timeout=10)
+    await telegram.acall(bot.send_message, chat_id, text)
+
+which gives it
+
+    a deadline      asyncio.wait_for for coroutines; sync SDK calls get the
+                    timeout passed in (GeminiClient does this) and are timed
+    a breaker       after BREAKER_FAILURES consecutive failures the dependency
+                    is skipped instantly (CircuitOpenError) for
+                    BREAKER_RESET_SECONDS, then one trial call is let through;
+                    any answer, even an error about the request itself,
+                    closes it again
+    metrics         calls, errors, timeouts, rejected calls and p50/p95
+                    latency, for /status
+
+Connections are reused by building each SDK client once: one aiohttp session
+for the Telegram Bot, and genai.configure() once per process for Gemini (it
+used to run before every CAPTCHA read and every model listing).
+
+Environment:
+    TELEGRAM_TIMEOUT_SECONDS   10
+    GEMINI_TIMEOUT_SECONDS     20
+    BREAKER_FAILURES           3
+    BREAKER_RESET_SECONDS      60
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+
+from clock import Clock
+
+TELEGRAM_TIMEOUT_SECONDS = float(os.getenv("TELEGRAM_TIMEOUT_SECONDS", 10))
+GEMINI_TIMEOUT_SECONDS = float(os.getenv("GEMINI_TIMEOUT_SECONDS", 20))
+BREAKER_FAILURES = int(os.getenv("BREAKER_FAILURES", 3))
+BREAKER_RESET_SECONDS = float(os.getenv("BREAKER_RESET_SECONDS", 60))
+
+GEMINI_MODELS_TTL = 3600  # seconds the listed models are trusted
+GEMINI_FALLBACK_MODELS = ["gemini-2.0-flash", "gemini-1.5-flash-latest",
+                          "gemini-1.5-pro-latest", "gemini-1.5-flash", "gemini-pro-vision"]
+
+
+class CircuitOpenError(Exception):
+    """The dependency failed repeatedly; the call was not attempted."""
+
+
+class CircuitBreaker:
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int = BREAKER_FAILURES,
+                 reset_seconds: float = BREAKER_RESET_SECONDS, clock: Clock = None):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.clock = clock or Clock()
+        self.failures = 0        # consecutive
+        self.opened_at = None
+        self.times_opened = 0
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return self.CLOSED
+        if self.clock.monotonic() - self.opened_at >= self.reset_seconds:
+            return self.HALF_OPEN
+        return self.OPEN
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == self.HALF_OPEN:
+            # one trial call; everyone else keeps seeing OPEN until it reports
+            self.opened_at = self.clock.monotonic()
+            return True
+        return state == self.CLOSED
+
+    def record_success(self) -> bool:
+        """Returns True when this closed an open breaker."""
+        self.failures = 0
+        was_open = self.opened_at is not None
+        self.opened_at = None
+        return was_open
+
+    def record_failure(self) -> bool:
+        """Returns True when this opened the breaker."""
+        self.failures += 1
+        if self.failures < self.failure_threshold:
+            return False
+        newly_opened = self.opened_at is None
+        if newly_opened:
+            self.times_opened += 1
+        self.opened_at = self.clock.monotonic()
+        return newly_opened
+
+
+class ApiClient:
+    """Deadline, circuit breaker and metrics around one external dependency."""
+
+    def __init__(self, name: str, timeout: float, trips=None, clock: Clock = None, history: int = 200):
+        self.name = name
+        self.timeout = timeout
+        # trips(exc) → False for errors that say nothing about the dependency's health
+        self.trips = trips or (lambda exc: True)
+        self.breaker = CircuitBreaker(clock=clock)
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.rejected = 0
+        self.last_error = None
+        self.latencies = deque(maxlen=history)  # ms, successful and failed calls
+
+    @property
+    def available(self) -> bool:
+        """False while the breaker is open (a half-open breaker counts as available)."""
+        return self.breaker.state != CircuitBreaker.OPEN
+
+    def _admit(self):
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError(f"{self.name} is unavailable (circuit open)")
+        self.calls += 1
+
+    def _succeeded(self, t0: float):
+        self.latencies.append((time.perf_counter() - t0) * 1000)
+        if self.breaker.record_success():
+            logging.info(f"✅ {self.name} is responding again — circuit closed")
+
+    def _failed(self, t0: float, exc: Exception, timed_out: bool = False):
+        self.latencies.append((time.perf_counter() - t0) * 1000)
+        self.errors += 1
+        if timed_out:
+            self.timeouts += 1
+        detail = str(exc).splitlines()[0] if str(exc) else ""
+        self.last_error = f"{type(exc).__name__}: {detail}"[:200] if detail else type(exc).__name__
+        if not (timed_out or self.trips(exc)):
+            # the dependency answered, it just didn't like this request
+            if self.breaker.record_success():
+                logging.info(f"✅ {self.name} is responding again — circuit closed")
+            return
+        if self.breaker.record_failure():
+            logging.warning(f"⚡ {self.name} failed {self.breaker.failures} times in a row — "
+                            f"skipping it for {self.breaker.reset_seconds:.0f}s ({self.last_error})")
+
+    def call(self, fn, *args, **kwargs):
+        """Run a blocking call. Its deadline must be passed to the SDK by the caller."""
+        self._admit()
+        t0 = time.perf_counter()
+        try:
+            result = fn(*args, **kwargs)
+        except Exception as e:
+            self._failed(t0, e)
+            raise
+        self._succeeded(t0)
+        return result
+
+    async def acall(self, fn, *args, **kwargs):
+        """Await `fn(*args, **kwargs)` with this client's deadline."""
+        self._admit()
+        t0 = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(fn(*args, **kwargs), timeout=self.timeout)
+        except asyncio.TimeoutError as e:
+            self._failed(t0, e, timed_out=True)
+            raise
+        except Exception as e:
+            self._failed(t0, e)
+            raise
+        self._succeeded(t0)
+        return result
+
+    def summary(self) -> dict:
+        latencies = sorted(self.latencies)
+        return {
+            "state": self.breaker.state,
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "rejected": self.rejected,
+            "times_opened": self.breaker.times_opened,
+            "p50_ms": round(latencies[len(latencies) // 2]) if latencies else None,
+            "p95_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]) if latencies else None,
+            "last_error": self.last_error,
+        }
+
+
+def _gemini_model_errors() -> tuple:
+    """Errors that concern one model or one request, not Gemini as a whole."""
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return ()
+    return (exceptions.NotFound, exceptions.InvalidArgument, exceptions.PermissionDenied)
+
+
+def telegram_trips(exc: Exception) -> bool:
+    """
+    Breaker predicate for Telegram: network errors, 5xx and flood control (429)
+    count; a refused request (bad chat id, message too long, ...) does not.
+    aiogram is imported here, not at module load, to keep it lazy.
+    """
+    try:
+        from aiogram.exceptions import (
+            TelegramAPIError, TelegramNetworkError, TelegramRetryAfter, TelegramServerError,
+        )
+    except ImportError:
+        return isinstance(exc, (OSError, asyncio.TimeoutError))
+    if isinstance(exc, (TelegramNetworkError, TelegramServerError, TelegramRetryAfter)):
+        return True
+    if isinstance(exc, TelegramAPIError):
+        return False
+    return isinstance(exc, (OSError, asyncio.TimeoutError))
+
+
+class GeminiClient:
+    """google.generativeai configured once, with cached models and a deadline per request."""
+
+    def __init__(self, genai, api_key: str, timeout: float = GEMINI_TIMEOUT_SECONDS, clock: Clock = None):
+        self.genai = genai
+        self.clock = clock or Clock()
+        model_errors = _gemini_model_errors()
+        self.api = ApiClient("gemini", timeout, trips=lambda exc: not isinstance(exc, model_errors),
+                             clock=self.clock)
+        genai.configure(api_key=api_key)
+        self._models = None
+        self._models_listed_at = None
+        self._model_objects = {}
+
+    def models(self) -> list:
+        """Models that support generateContent, listed at most once per GEMINI_MODELS_TTL."""
+        if self._models and self.clock.monotonic() - self._models_listed_at < GEMINI_MODELS_TTL:
+            return self._models
+        try:
+            listed = self.api.call(self._list_models)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logging.debug(f"Gemini list_models failed: {e}")
+            listed = []
+        if not listed:
+            return self._models or GEMINI_FALLBACK_MODELS
+        self._models = listed
+        self._models_listed_at = self.clock.monotonic()
+        return listed
+
+    def _list_models(self) -> list:
+        return [m.name.replace("models/", "")
+                for m in self.genai.list_models(request_options={"timeout": self.api.timeout})
+                if "generateContent" in m.supported_generation_methods]
+
+    def generate(self, model_name: str, contents: list) -> str:
+        model = self._model_objects.get(model_name)
+        if model is None:
+            model = self._model_objects[model_name] = self.genai.GenerativeModel(model_name)
+        response = self.api.call(model.generate_content, contents,
+                                 request_options={"timeout": self.api.timeout})
+        return response.text
@@ -0,0 +1,157 @@
+"""
+Clock / timer layer used by every wait in AppointmentChecker.
+
+`Clock` is the real thing (time.sleep, asyncio.sleep, asyncio.wait_for).
+`SimulatedClock` keeps virtual time instead: sleeps return immediately after
+advancing the clock, and `wait_for` times out as soon as nothing scheduled
+before the deadline can complete the awaitable. Hours of polling (status
+message every 10 checks, CAPTCHA retries, 120 s manual CAPTCHA timeouts) run
+in milliseconds and always in the same order.
+
+    clock = SimulatedClock()
+    checker = AppointmentChecker(clock=clock)
+    # operator answers the manual CAPTCHA 30 virtual seconds from now
+    clock.call_later(30, checker.manual_captcha_queue.put_nowait, "ABC123")
+
+Selenium waits go through `ClockWait`, a WebDriverWait that polls on the
+clock, so "element never appears" costs virtual seconds too.
+"""
+
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class Clock:
+    """Wall-clock implementation backed by `time` and `asyncio`."""
+
+    def time(self) -> float:
+        return time.time()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float):
+        time.sleep(seconds)
+
+    async def asleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+    async def wait_for(self, aw, timeout: float):
+        return await asyncio.wait_for(aw, timeout=timeout)
+
+
+class ClockWait:
+    """
+    WebDriverWait's `until()` on a Clock: call `condition(driver)` every `poll`
+    seconds until it returns something truthy, and raise
+    `timeout_exception(message)` once `timeout` seconds have passed.
+    Exceptions in `ignored_exceptions` count as "not yet".
+    """
+
+    def __init__(self, clock: Clock, driver, timeout: float, poll: float = 0.5,
+                 ignored_exceptions: tuple = (), timeout_exception=TimeoutError):
+        self.clock = clock
+        self.driver = driver
+        self.timeout = timeout
+        self.poll = poll
+        self.ignored_exceptions = tuple(ignored_exceptions)
+        self.timeout_exception = timeout_exception
+
+    def until(self, condition, message: str = ""):
+        deadline = self.clock.monotonic() + self.timeout
+        while True:
+            try:
+                value = condition(self.driver)
+                if value:
+                    return value
+            except self.ignored_exceptions:
+                pass
+            if self.clock.monotonic() >= deadline:
+                raise self.timeout_exception(message or f"condition not met within {self.timeout}s")
+            self.clock.sleep(self.poll)
+
+
+class SimulatedClock(Clock):
+    """
+    Deterministic virtual clock.
+
+    Time only moves when someone sleeps or when `wait_for` has to jump to the
+    next scheduled callback (or to its deadline). Callbacks registered with
+    `call_later` run synchronously, in due-time order, as the clock passes
+    them.
+    """
+
+    # event-loop iterations granted to an awaitable before time is advanced
+    SETTLE_ITERATIONS = 20
+
+    def __init__(self, start: float = 0.0, epoch: float = 1_700_000_000.0):
+        self._now = float(start)
+        self._epoch = epoch
+        self._timers = []
+        self._seq = itertools.count()
+        self.total_slept = 0.0
+
+    def time(self) -> float:
+        return self._epoch + self._now
+
+    def monotonic(self) -> float:
+        return self._now
+
+    def call_later(self, delay: float, callback, *args):
+        """Run `callback(*args)` once the virtual clock reaches now + delay."""
+        heapq.heappush(self._timers, (self._now + max(0.0, delay), next(self._seq), callback, args))
+
+    def advance(self, seconds: float):
+        """Move time forward, firing every callback that falls due on the way."""
+        self._advance_to(self._now + max(0.0, seconds))
+
+    def _advance_to(self, target: float):
+        while self._timers and self._timers[0][0] <= target:
+            when, _, callback, args = heapq.heappop(self._timers)
+            self._now = max(self._now, when)
+            callback(*args)
+        self._now = max(self._now, target)
+
+    def _next_timer(self):
+        return self._timers[0][0] if self._timers else None
+
+    def sleep(self, seconds: float):
+        self.total_slept += seconds
+        self.advance(seconds)
+
+    async def asleep(self, seconds: float):
+        self.total_slept += seconds
+        self.advance(seconds)
+        # still yield so other tasks (and the awaited side of call_later) run
+        await asyncio.sleep(0)
+
+    async def _settle(self, task) -> bool:
+        for _ in range(self.SETTLE_ITERATIONS):
+            if task.done():
+                return True
+            await asyncio.sleep(0)
+        return task.done()
+
+    async def wait_for(self, aw, timeout: float):
+        task = asyncio.ensure_future(aw)
+        deadline = None if timeout is None else self._now + timeout
+
+        while not await self._settle(task):
+            nxt = self._next_timer()
+            if nxt is None and deadline is None:
+                return await task
+            if nxt is None or (deadline is not None and nxt > deadline):
+                self._advance_to(deadline)
+                if await self._settle(task):
+                    break
+                task.cancel()
+                try:
+                    await task
+                except asyncio.CancelledError:
+                    pass
+                raise asyncio.TimeoutError()
+            self._advance_to(nxt)
+
+        return task.result()
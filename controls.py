@@ -0,0 +1,66 @@
+"""
+Runtime controls: /pause, /resume, /interval, /checknow.
+
+The bot process owns controls.json on the data volume: a command validates
+the change, writes the file atomically and sends ("controls", dict) to the
+worker. The worker only takes the new values at the top of its loop, so a
+cycle never sees half of a change, and it reads the file itself when it
+starts, so the settings survive restarts and redeploys.
+
+Pausing only skips cycles; the browser the worker has warmed up stays open.
+"""
+
+import logging
+import re
+
+from storage import atomic_write_json, data_path, load_json
+
+MIN_INTERVAL_SECONDS = 30     # the site rate-limits; don't go below this
+MAX_INTERVAL_SECONDS = 6 * 3600
+
+_DURATION_RE = re.compile(r"^(?:(\d+)h)?(?:(\d+)m)?(?:(\d+)s?)?$")
+
+
+def parse_interval(text: str) -> int:
+    """'90', '90s', '5m', '1h30m' → seconds. Raises ValueError outside the bounds."""
+    match = _DURATION_RE.match(text.strip().lower())
+    if not match or not any(match.groups()):
+        raise ValueError(f"can't read '{text}' as a duration (e.g. 90, 5m, 1h30m)")
+    hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    total = hours * 3600 + minutes * 60 + seconds
+    if not MIN_INTERVAL_SECONDS <= total <= MAX_INTERVAL_SECONDS:
+        raise ValueError(f"interval must be between {MIN_INTERVAL_SECONDS}s and {MAX_INTERVAL_SECONDS // 3600}h")
+    return total
+
+
+class Controls:
+    __slots__ = ("paused", "interval_seconds")
+
+    def __init__(self, paused: bool = False, interval_seconds: int = 60):
+        self.paused = paused
+        self.interval_seconds = interval_seconds
+
+    @classmethod
+    def from_dict(cls, d: dict, default_interval: int) -> "Controls":
+        interval = d.get("interval_seconds", default_interval)
+        if not isinstance(interval, int) or not MIN_INTERVAL_SECONDS <= interval <= MAX_INTERVAL_SECONDS:
+            logging.warning(f"Ignoring invalid interval {interval!r} in controls file")
+            interval = default_interval
+        return cls(paused=bool(d.get("paused", False)), interval_seconds=interval)
+
+    def to_dict(self) -> dict:
+        return {"paused": self.paused, "interval_seconds": self.interval_seconds}
+
+
+class ControlStore:
+    def __init__(self, default_interval: int, path: str = None):
+        self.path = path or data_path("controls.json")
+        raw = load_json(self.path, default={})
+        self.controls = Controls.from_dict(raw if isinstance(raw, dict) else {}, default_interval)
+
+    def update(self, **changes) -> Controls:
+        """Apply `changes` and persist them; returns the new Controls."""
+        controls = Controls(**{**self.controls.to_dict(), **changes})
+        atomic_write_json(self.path, controls.to_dict())
+        self.controls = controls
+        return controls
@@ -0,0 +1,164 @@
+"""
+In-memory history of check cycles.
+
+Each cycle produces a CycleRecord (one PersonResult per person checked). The
+last `capacity` records are kept in a ring; everything since the worker
+started is folded into fixed-size aggregates:
+
+    cycle duration      LatencyHistogram (p50 / p95)
+    step latency        one LatencyHistogram per span name, fed by a tracer
+                        listener (navigate.*, availability, captcha.*, ...)
+    person outcomes     booked / no_slots / navigation / error / ... counts
+    error categories    span error tokens, e.g. navigate.office:page_maintenance
+
+so /status can answer from memory, without reading logs or traces, and the
+memory used doesn't grow with uptime.
+"""
+
+import math
+import time
+from collections import deque
+
+# outcomes of one person's check that count as "the check worked"
+OK_OUTCOMES = ("booked", "no_slots", "no_usable_slots")
+
+
+class PersonResult:
+    __slots__ = ("person_index", "outcome", "ok", "detail")
+
+    def __init__(self, person_index: int, outcome: str, ok: bool = False, detail: str = ""):
+        self.person_index = person_index
+        self.outcome = outcome   # booked | booking_failed | no_slots | no_usable_slots | navigation | error
+        self.ok = ok             # True only when booked
+        self.detail = detail
+
+    def describe(self) -> str:
+        return f"{self.outcome}: {self.detail}" if self.detail else self.outcome
+
+
+class CycleRecord:
+    __slots__ = ("number", "started", "duration_ms", "appointments_found", "backoff",
+                 "persons", "steps", "error")
+
+    def __init__(self, number: int, started: float = None):
+        self.number = number
+        self.started = started if started is not None else time.time()
+        self.duration_ms = None
+        self.appointments_found = False
+        self.backoff = 0        # seconds to add to the wait before the next cycle
+        self.persons = []       # PersonResult, in the order checked
+        self.steps = {}         # span name → total ms in this cycle
+        self.error = None       # exception that ended the cycle early
+
+    @property
+    def booked_any(self) -> bool:
+        return any(p.ok for p in self.persons)
+
+
+class LatencyHistogram:
+    """
+    Streaming percentiles in constant memory: counts in log-spaced buckets
+    (each 10% wider than the last, 1 ms to ~1 h), so p50/p95 are within 5%.
+    """
+
+    RATIO = 1.1
+    MAX_MS = 3_600_000
+    BUCKETS = int(math.log(MAX_MS) / math.log(RATIO)) + 2
+
+    __slots__ = ("counts", "count", "total_ms", "max_ms")
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def add(self, ms: float):
+        ms = max(0.0, ms)
+        index = 0 if ms < 1 else min(self.BUCKETS - 1, int(math.log(ms) / math.log(self.RATIO)) + 1)
+        self.counts[index] += 1
+        self.count += 1
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+
+    def percentile(self, pct: float) -> float:
+        if not self.count:
+            return None
+        rank = math.ceil(self.count * pct / 100)
+        seen = 0
+        for index, n in enumerate(self.counts):
+            seen += n
+            if seen >= rank:
+                if index == 0:
+                    return min(1.0, self.max_ms)
+                # geometric middle of the bucket, never above the largest value seen
+                return min(self.RATIO ** (index - 0.5), self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count) if self.count else None,
+            "p50_ms": round(self.percentile(50)) if self.count else None,
+            "p95_ms": round(self.percentile(95)) if self.count else None,
+            "max_ms": round(self.max_ms) if self.count else None,
+        }
+
+
+class CycleHistory:
+    # spans that wrap whole cycles / persons; their time is already in the cycle duration
+    CONTAINER_SPANS = ("cycle", "person")
+
+    def __init__(self, capacity: int = 100):
+        self.recent = deque(maxlen=capacity)
+        self.cycles = 0
+        self.failed_cycles = 0
+        self.cycle_duration = LatencyHistogram()
+        self.steps = {}         # span name → LatencyHistogram
+        self.outcomes = {}      # person outcome → count
+        self.errors = {}        # "span:category" → count
+        self._current_steps = {}
+
+    def observe_span(self, span):
+        """Tracer listener: step latencies and error categories."""
+        if span.duration_ms is None:
+            return
+        if span.status == "error":
+            key = f"{span.name}:{span.error}"
+            self.errors[key] = self.errors.get(key, 0) + 1
+        if span.name in self.CONTAINER_SPANS:
+            return
+        histogram = self.steps.get(span.name)
+        if histogram is None:
+            histogram = self.steps[span.name] = LatencyHistogram()
+        histogram.add(span.duration_ms)
+        self._current_steps[span.name] = self._current_steps.get(span.name, 0.0) + span.duration_ms
+
+    def record(self, cycle: CycleRecord):
+        cycle.steps = {name: round(ms, 1) for name, ms in self._current_steps.items()}
+        self._current_steps = {}
+        self.recent.append(cycle)
+        self.cycles += 1
+        if cycle.error or any(p.outcome not in OK_OUTCOMES for p in cycle.persons):
+            self.failed_cycles += 1
+        if cycle.duration_ms is not None:
+            self.cycle_duration.add(cycle.duration_ms)
+        for person in cycle.persons:
+            self.outcomes[person.outcome] = self.outcomes.get(person.outcome, 0) + 1
+
+    def summary(self, top: int = 4) -> dict:
+        checks = sum(self.outcomes.values())
+        ok_checks = sum(self.outcomes.get(o, 0) for o in OK_OUTCOMES)
+        steps = {name: h.summary() for name, h in self.steps.items()}
+        slowest = sorted(steps, key=lambda name: steps[name]["p95_ms"], reverse=True)[:top]
+        errors = sorted(self.errors.items(), key=lambda kv: kv[1], reverse=True)[:top]
+        return {
+            "cycles": self.cycles,
+            "kept": len(self.recent),
+            "cycle_success_rate": round(1 - self.failed_cycles / self.cycles, 3) if self.cycles else None,
+            "check_success_rate": round(ok_checks / checks, 3) if checks else None,
+            "cycle_duration": self.cycle_duration.summary(),
+            "slowest_steps": {name: steps[name] for name in slowest},
+            "outcomes": dict(self.outcomes),
+            "top_errors": dict(errors),
+        }
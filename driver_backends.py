@@ -0,0 +1,179 @@
+"""
+WebDriver backends: where the browser runs.
+
+    local    chromedriver + Chrome on this machine (default, what setup_driver
+             always did)
+    remote   a Selenium standalone or grid endpoint, so Chrome's CPU and
+             memory live somewhere else, e.g. locally
+
+                 docker run -d -p 4444:4444 --shm-size=2g selenium/standalone-chromium
+
+A local browser is relaunched for every person (a new process is the cheapest
+clean session). A remote session is expensive to create, so it is reused:
+`reset` checks the session with one round trip, deletes the site's cookies
+and storage (loading the site first if the last cycle ended elsewhere) and
+goes back to about:blank; a session that fails the check or the cleanup, or
+has been reused WEBDRIVER_SESSION_REUSE times, is replaced. The HTTP
+connection to the endpoint is kept alive by selenium's connection pool.
+
+Each backend keeps latency totals (session start, reset, health-check round
+trip) for /status.
+
+Environment:
+    WEBDRIVER_BACKEND          local | remote                (default local)
+    WEBDRIVER_REMOTE_URL       http://localhost:4444
+    WEBDRIVER_SESSION_REUSE    20 (0 = never replace a healthy session)
+"""
+
+import logging
+import os
+import time
+
+RESET_STORAGE_JS = """
+try { window.localStorage.clear(); } catch (e) {}
+try { window.sessionStorage.clear(); } catch (e) {}
+"""
+
+
+class BackendStats:
+    def __init__(self):
+        self.sessions = 0
+        self.session_ms = 0.0
+        self.resets = 0
+        self.reset_ms = 0.0
+        self.pings = 0
+        self.ping_ms = 0.0
+        self.health_failures = 0
+        self.last_error = None
+
+    def summary(self) -> dict:
+        return {
+            "sessions": self.sessions,
+            "avg_session_ms": round(self.session_ms / self.sessions) if self.sessions else None,
+            "resets": self.resets,
+            "avg_reset_ms": round(self.reset_ms / self.resets) if self.resets else None,
+            "avg_ping_ms": round(self.ping_ms / self.pings, 1) if self.pings else None,
+            "health_failures": self.health_failures,
+            "last_error": self.last_error,
+        }
+
+
+class DriverBackend:
+    name = None
+    local = False            # browser shares this machine's filesystem (user-data-dir etc.)
+    reuses_sessions = False
+
+    def __init__(self):
+        self.stats = BackendStats()
+
+    def _create(self, options):
+        raise NotImplementedError
+
+    def start(self, options):
+        """Create a new browser session."""
+        t0 = time.perf_counter()
+        try:
+            driver = self._create(options)
+        except Exception as e:
+            self.stats.last_error = f"start: {type(e).__name__}: {str(e).splitlines()[0] if str(e) else ''}"
+            raise
+        self.stats.sessions += 1
+        self.stats.session_ms += (time.perf_counter() - t0) * 1000
+        return driver
+
+    def health_check(self, driver) -> bool:
+        """One round trip to the browser; False when the session is gone."""
+        t0 = time.perf_counter()
+        try:
+            driver.execute_script("return 1")
+        except Exception as e:
+            self.stats.health_failures += 1
+            self.stats.last_error = f"health: {type(e).__name__}"
+            logging.warning(f"{self.name} WebDriver session failed its health check: {type(e).__name__}")
+            return False
+        self.stats.pings += 1
+        self.stats.ping_ms += (time.perf_counter() - t0) * 1000
+        return True
+
+    def reset(self, driver, origin: str) -> bool:
+        """Make `driver` a clean session again. False: quit it and start a new one."""
+        return False
+
+    def quit(self, driver):
+        try:
+            driver.quit()
+        except Exception:
+            pass
+
+    def describe(self) -> str:
+        return self.name
+
+    def summary(self) -> dict:
+        return {"name": self.describe(), **self.stats.summary()}
+
+
+class LocalChromeBackend(DriverBackend):
+    name = "local"
+    local = True
+
+    def _create(self, options):
+        from selenium import webdriver
+        from selenium.webdriver.chrome.service import Service
+        return webdriver.Chrome(service=Service(), options=options)
+
+
+class RemoteBackend(DriverBackend):
+    name = "remote"
+    reuses_sessions = True
+
+    def __init__(self, url: str, max_reuse: int = 20):
+        super().__init__()
+        self.url = url.rstrip("/")
+        self.max_reuse = max_reuse
+        self._uses = 0  # resets of the current session
+
+    def _create(self, options):
+        from selenium import webdriver
+        self._uses = 0
+        return webdriver.Remote(command_executor=self.url, options=options)
+
+    def reset(self, driver, origin: str) -> bool:
+        if self.max_reuse and self._uses >= self.max_reuse:
+            logging.info(f"Remote session used {self._uses} times — replacing it")
+            return False
+        if not self.health_check(driver):
+            return False
+        t0 = time.perf_counter()
+        try:
+            driver.switch_to.default_content()
+            # cookies and storage can only be cleared from a page of the site
+            # itself; a cycle that ended on an error page has to go back to it
+            if not driver.current_url.startswith(origin):
+                driver.get(origin)
+            driver.delete_all_cookies()
+            driver.execute_script(RESET_STORAGE_JS)
+            if driver.get_cookies():
+                raise RuntimeError("cookies survived delete_all_cookies")
+            driver.get("about:blank")
+        except Exception as e:
+            self.stats.last_error = f"reset: {type(e).__name__}"
+            logging.warning(f"Could not reset the remote session: {e}")
+            return False
+        self._uses += 1
+        self.stats.resets += 1
+        self.stats.reset_ms += (time.perf_counter() - t0) * 1000
+        return True
+
+    def describe(self) -> str:
+        return f"remote {self.url}"
+
+
+def create_backend(name: str = None, url: str = None) -> DriverBackend:
+    """Backend chosen by WEBDRIVER_BACKEND; falls back to local on an unknown name."""
+    name = (name or os.getenv("WEBDRIVER_BACKEND", "local")).strip().lower()
+    if name == "remote":
+        return RemoteBackend(url or os.getenv("WEBDRIVER_REMOTE_URL", "http://localhost:4444"),
+                             max_reuse=int(os.getenv("WEBDRIVER_SESSION_REUSE", 20)))
+    if name != "local":
+        logging.error(f"WEBDRIVER_BACKEND: unknown backend '{name}' (use local or remote) — using local")
+    return LocalChromeBackend()
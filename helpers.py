@@ -0,0 +1,262 @@
+"""
+Pure text helpers used by the appointment checker.
+
+Nothing in here touches Selenium, aiogram or Gemini, so the functions can be
+imported (and benchmarked) without launching Chrome or a Telegram bot.
+"""
+
+import logging
+import re
+from datetime import datetime
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# DATES
+# ─────────────────────────────────────────────────────────────────────────────
+
+_DATE_DOTTED = re.compile(r"^(\d{1,2})\.(\d{1,2})\.(\d{4})$")
+_DATE_ISO = re.compile(r"^(\d{4})-(\d{1,2})-(\d{1,2})$")
+_DATE_SLASHED = re.compile(r"^(\d{1,2})/(\d{1,2})/(\d{4})$")
+_DATE_DASHED = re.compile(r"^(\d{1,2})-(\d{1,2})-(\d{4})$")
+
+_DAYS_IN_MONTH = {
+    1: 31, 2: 29, 3: 31, 4: 30, 5: 31, 6: 30,
+    7: 31, 8: 31, 9: 30, 10: 31, 11: 30, 12: 31,
+}
+
+
+def _day_month(a: int, b: int) -> tuple:
+    """Resolve an ambiguous 'a/b' pair into (day, month)."""
+    if a > 12:
+        return a, b
+    if b > 12:
+        return b, a
+    return a, b
+
+
+def parse_and_format_date(raw: str) -> str:
+    if not raw or not raw.strip():
+        return ""
+
+    raw = raw.strip()
+    day = month = year = None
+
+    m = _DATE_DOTTED.match(raw)
+    if m:
+        day, month, year = int(m.group(1)), int(m.group(2)), int(m.group(3))
+
+    if day is None:
+        m = _DATE_ISO.match(raw)
+        if m:
+            year, month, day = int(m.group(1)), int(m.group(2)), int(m.group(3))
+
+    if day is None:
+        m = _DATE_SLASHED.match(raw) or _DATE_DASHED.match(raw)
+        if m:
+            day, month = _day_month(int(m.group(1)), int(m.group(2)))
+            year = int(m.group(3))
+
+    if day is None or month is None or year is None:
+        raise ValueError(f"Cannot parse date '{raw}' – unrecognised format")
+
+    if not (1 <= month <= 12):
+        raise ValueError(
+            f"Invalid month {month} in date '{raw}'. "
+            f"Parsed day={day}, month={month}, year={year}."
+        )
+    if not (1 <= day <= 31):
+        raise ValueError(
+            f"Invalid day {day} in date '{raw}'. "
+            f"Parsed day={day}, month={month}, year={year}."
+        )
+
+    if day > _DAYS_IN_MONTH.get(month, 31):
+        raise ValueError(f"Day {day} is too large for month {month} in date '{raw}'.")
+
+    formatted = f"{day:02d}.{month:02d}.{year}"
+    if formatted != raw:
+        logging.info(f"Date converted: '{raw}' → '{formatted}'")
+    return formatted
+
+
+# Slot values and labels on the appointment page, e.g. "5/21/2025 9:00:00 AM",
+# "21.05.2025 09:00" or a label "09:00 - 09:15" under a date heading.
+_SLOT_DATE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})|(\d{1,2})([./-])(\d{1,2})\5(\d{4})")
+_SLOT_TIME = re.compile(r"(\d{1,2}):(\d{2})(?::\d{2})?(?:\s*([AaPp])\.?[Mm]\.?)?")
+
+
+def parse_slot_datetime(*texts: str):
+    """
+    Find a date and a time of day in the given texts (searched in order) and
+    return them as a datetime, or None when no valid date is found. Slashed
+    dates are month/day/year, the way the site's ASP.NET backend writes them.
+    """
+    date_match = time_match = None
+    for text in texts:
+        if not text:
+            continue
+        if date_match is None:
+            date_match = _SLOT_DATE.search(text)
+            if date_match:
+                # the time normally follows the date in the same text
+                time_match = _SLOT_TIME.search(text, date_match.end()) or time_match
+        if time_match is None:
+            time_match = _SLOT_TIME.search(text)
+        if date_match and time_match:
+            break
+    if date_match is None:
+        return None
+
+    g = date_match.groups()
+    if g[0]:
+        year, month, day = int(g[0]), int(g[1]), int(g[2])
+    elif g[4] == "/":
+        month, day, year = int(g[3]), int(g[5]), int(g[6])
+    else:
+        day, month, year = int(g[3]), int(g[5]), int(g[6])
+
+    hour = minute = 0
+    if time_match:
+        hour, minute = int(time_match.group(1)), int(time_match.group(2))
+        meridiem = (time_match.group(3) or "").lower()
+        if meridiem == "p" and hour < 12:
+            hour += 12
+        elif meridiem == "a" and hour == 12:
+            hour = 0
+    try:
+        return datetime(year, month, day, hour, minute)
+    except ValueError:
+        return None
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# VISIBLE TEXT / CAPTCHA TEXT
+# ─────────────────────────────────────────────────────────────────────────────
+
+_WHITESPACE = re.compile(r"\s+")
+_DASHES = str.maketrans({"\u2013": "-", "\u2014": "-"})
+
+
+def normalize_visible_text(text: str) -> str:
+    if text is None:
+        return ""
+    return _WHITESPACE.sub(" ", text.translate(_DASHES)).strip().upper()
+
+
+def clean_captcha_text(text: str) -> str:
+    if not text:
+        return ""
+    return "".join(c for c in text if c.isalnum()).upper()
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# FORM ERROR CLASSIFICATION
+# ─────────────────────────────────────────────────────────────────────────────
+
+NOISE_PATTERNS = (
+    r"^[!\*\?\.\,\;\:\-\_\#\+]$",
+    r"^nachname$", r"^vorname$", r"^geburtsdatum$",
+    r"^reisepass\s*nr\.?$", r"^geschlecht$", r"^stra[sß]e$",
+    r"^postleitzahl$", r"^plz$", r"^ort$", r"^stadt$", r"^land$",
+    r"^telefon$", r"^e-?mail$", r"^geburtsname$",
+    r"^staatsangeh[öo]rigkeit", r"^geburtsland$", r"^geburtsort$",
+    r"^ausstellungsdatum$", r"^g[üu]ltig\s*bis$",
+    r"^ausstellende\s*beh[öo]rde$", r"^reisedokument",
+    r"^sicherheitscode$", r"^captcha$",
+    r"^last\s*name$", r"^first\s*name$", r"^date\s*of\s*birth$",
+    r"^passport\s*(no\.?|number)$", r"^sex$", r"^gender$",
+    r"^street$", r"^postal\s*code$", r"^zip\s*code$", r"^city$",
+    r"^country$", r"^telephone$", r"^phone$", r"^email$",
+    r"^place\s*of\s*birth$", r"^nationality$",
+    r"^issuing\s*authority$", r"^valid\s*until$",
+    r"^date\s*of\s*issue$", r"^security\s*code$",
+    r"^\(z\.?b\.?\s*\d", r"^\(e\.?g\.?\s*\d",
+    r"^dd\.mm\.yyyy$", r"^tt\.mm\.jjjj$",
+    r"^anzahl\s*der\s*personen\s*\d",
+    r"^number\s*of\s*persons\s*\d",
+    r"^startzeit\s", r"^start\s*time\s",
+    r"^termin\s", r"^appointment\s",
+    r"^weiter$", r"^next$", r"^zur[üu]ck$", r"^back$",
+    r"^submit$", r"^abschicken$",
+    r"^\*+$", r"^\s*$",
+)
+
+# One alternation instead of ~70 separate re.match() calls per text.
+_NOISE_RE = re.compile("|".join(f"(?:{p})" for p in NOISE_PATTERNS))
+
+ERROR_INDICATORS = (
+    "fehlt", "fehlerhaft", "ungültig", "erforderlich", "stimmt nicht",
+    "nicht überein", "ist nicht gültig", "bitte geben", "bitte wählen",
+    "pflichtfeld", "muss ausgefüllt", "darf nicht leer",
+    "is required", "is not valid", "is invalid", "does not match",
+    "is incorrect", "cannot be empty", "must be", "please enter",
+    "please select", "missing", "erroneous", "error", "failed",
+    "validation", "not match",
+    "text aus dem bild", "text from the picture",
+    "folgende angaben fehlen", "following information is missing",
+)
+
+CAPTCHA_KEYWORDS = (
+    "captcha", "sicherheitscode", "security code", "verification code",
+    "text from the picture", "text aus dem bild",
+    "bild stimmt nicht", "does not match",
+    "code is incorrect", "code is invalid",
+    "stimmt nicht mit ihrer eingabe", "nicht überein", "captchatext",
+)
+
+_CAPTCHA_FIELD_RE = re.compile(
+    r"field\s*'?\s*captcha|captcha.*validation\s*error|captchatext"
+)
+
+FIELD_KEYWORDS = (
+    "is not valid", "is required", "ist erforderlich", "fehlt",
+    "missing", "erroneous", "invalid", "ungültig", "pflichtfeld",
+    "muss ausgefüllt", "darf nicht leer", "bitte geben", "bitte wählen",
+    "please enter", "please select", "cannot be empty",
+)
+
+
+def is_noise(text: str) -> bool:
+    """True for field labels, hints and stray punctuation picked up as 'errors'."""
+    if not text:
+        return True
+    stripped = text.strip()
+    if not stripped:
+        return True
+    if len(stripped) <= 2 and not stripped.isalnum():
+        return True
+    return _NOISE_RE.match(stripped.lower()) is not None
+
+
+def looks_like_real_error(text: str) -> bool:
+    lower = text.strip().lower()
+    return any(indicator in lower for indicator in ERROR_INDICATORS)
+
+
+def classify_form_errors(error_texts: list) -> dict:
+    """
+    Sort already-filtered error texts into captcha / field / general buckets.
+
+    Returns the same dict shape as AppointmentChecker._get_all_form_errors.
+    """
+    result = {
+        "captcha_errors": [],
+        "field_errors": [],
+        "general_errors": [],
+        "raw_errors": list(error_texts),
+    }
+
+    for txt in error_texts:
+        lower = txt.lower()
+        is_captcha = (any(kw in lower for kw in CAPTCHA_KEYWORDS)
+                      or _CAPTCHA_FIELD_RE.search(lower) is not None)
+
+        if is_captcha:
+            result["captcha_errors"].append(txt)
+        elif any(kw in lower for kw in FIELD_KEYWORDS):
+            # "captcha" can't be in `lower` here, the keyword check above caught it
+            result["field_errors"].append(txt)
+        elif looks_like_real_error(txt):
+            result["general_errors"].append(txt)
+
+    return result
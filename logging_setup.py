@@ -0,0 +1,185 @@
+"""
+Queue-based logging pipeline.
+
+The event loop only puts records on a queue; a QueueListener thread formats
+them and writes to stdout and to a rotating log file on the data volume.
+Rotated files are gzip-compressed, rotation happens on size or age, and
+identical messages repeated within a short window are collapsed so a
+long-running deployment keeps its disk and CPU use flat.
+
+Environment:
+    LOG_LEVEL            INFO
+    LOG_FORMAT           text | json                 (default text)
+    LOG_FILE             <data volume>/bot.log
+    LOG_MAX_BYTES        5 MB
+    LOG_BACKUP_COUNT     5
+    LOG_ROTATE_HOURS     24   (0 disables age-based rotation)
+    LOG_REPEAT_WINDOW    60   seconds (0 disables repeat suppression)
+"""
+
+import copy
+import gzip
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import shutil
+import sys
+import time
+from collections import OrderedDict
+
+from storage import data_path
+
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(message)s"
+MAX_TRACEBACK_LINES = 12
+
+
+def _truncate_traceback(text: str) -> str:
+    lines = text.splitlines()
+    if len(lines) <= MAX_TRACEBACK_LINES:
+        return text
+    # keep the header and the innermost frames, which is where the error is
+    kept = [lines[0], f"  ... {len(lines) - MAX_TRACEBACK_LINES} lines skipped ..."]
+    kept.extend(lines[-(MAX_TRACEBACK_LINES - 1):])
+    return "\n".join(kept)
+
+
+class CompactFormatter(logging.Formatter):
+    """Plain text formatter with tracebacks cut down to the innermost frames."""
+
+    def formatException(self, ei) -> str:
+        return _truncate_traceback(super().formatException(ei))
+
+
+class JsonFormatter(CompactFormatter):
+    def format(self, record: logging.LogRecord) -> str:
+        payload = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        if record.exc_info:
+            payload["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:  # forwarded from the worker, already formatted
+            payload["exc"] = record.exc_text
+        return json.dumps(payload, ensure_ascii=False)
+
+
+class RepeatFilter(logging.Filter):
+    """
+    Let an identical (level, message) pair through at most once per `window`
+    seconds. The next copy that gets through says how many were dropped.
+    """
+
+    def __init__(self, window: float = 60.0, max_keys: int = 512):
+        super().__init__()
+        self.window = window
+        self.max_keys = max_keys
+        self._seen = OrderedDict()  # key → [last_emitted_at, suppressed]
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if self.window <= 0:
+            return True
+        key = (record.levelno, record.getMessage())
+        entry = self._seen.get(key)
+        now = record.created
+        if entry is not None and now - entry[0] < self.window:
+            entry[1] += 1
+            return False
+
+        if entry is not None and entry[1]:
+            record.msg = f"{record.getMessage()} (repeated {entry[1]}x in the last {now - entry[0]:.0f}s)"
+            record.args = ()
+        self._seen[key] = [now, 0]
+        self._seen.move_to_end(key)
+        while len(self._seen) > self.max_keys:
+            self._seen.popitem(last=False)
+        return True
+
+
+class _DeferredFormatQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler that leaves traceback formatting to the listener thread."""
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        return record
+
+
+def _gzip_namer(name: str) -> str:
+    return name + ".gz"
+
+
+def _gzip_rotator(source: str, dest: str):
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+class GzipRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """RotatingFileHandler that also rotates by age and gzips old files."""
+
+    def __init__(self, filename: str, max_bytes: int, backup_count: int,
+                 max_age_seconds: float = 0):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count,
+                         encoding="utf-8", delay=True)
+        self.max_age_seconds = max_age_seconds
+        self.namer = _gzip_namer
+        self.rotator = _gzip_rotator
+        self._opened_at = time.time()
+
+    def shouldRollover(self, record) -> bool:
+        if super().shouldRollover(record):
+            return True
+        if not self.max_age_seconds or time.time() - self._opened_at < self.max_age_seconds:
+            return False
+        try:
+            return os.path.getsize(self.baseFilename) > 0
+        except OSError:
+            return False
+
+    def doRollover(self):
+        super().doRollover()
+        self._opened_at = time.time()
+
+
+def setup_logging() -> logging.handlers.QueueListener:
+    """Install the queue pipeline on the root logger and start the listener thread."""
+    level = getattr(logging, os.getenv("LOG_LEVEL", "INFO").upper(), logging.INFO)
+    if os.getenv("LOG_FORMAT", "text").lower() == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = CompactFormatter(TEXT_FORMAT)
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    stream_handler.setFormatter(formatter)
+    handlers = [stream_handler]
+
+    try:
+        file_handler = GzipRotatingFileHandler(
+            os.getenv("LOG_FILE") or data_path("bot.log"),
+            max_bytes=int(os.getenv("LOG_MAX_BYTES", 5 * 1024 * 1024)),
+            backup_count=int(os.getenv("LOG_BACKUP_COUNT", 5)),
+            max_age_seconds=float(os.getenv("LOG_ROTATE_HOURS", 24)) * 3600,
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(file_handler)
+    except OSError as e:
+        print(f"File logging disabled: {e}", file=sys.stderr)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = _DeferredFormatQueueHandler(log_queue)
+    queue_handler.addFilter(RepeatFilter(float(os.getenv("LOG_REPEAT_WINDOW", 60))))
+
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,118 @@
+"""
+Page-state classifier for the appointment site.
+
+After every navigation step the checker runs PAGE_PROBE_JS (one WebDriver
+call) and hands the result to `classify_page`, a pure function that labels
+the page:
+
+    expected          the step we were heading for
+    maintenance       5xx, or a maintenance / server-error page title
+    rate_limited      429 or a "too many requests" page
+    session_expired   session timeout text, or bounced back to the start page
+    unknown           none of the above
+
+plus the transient `loading` (still the previous document, or not finished
+loading) while the checker polls. Error pages end the wait at once instead of
+running every WebDriverWait to its timeout, and `backoff_seconds` says how
+long to stay away before the next cycle.
+"""
+
+import re
+
+EXPECTED = "expected"
+MAINTENANCE = "maintenance"
+RATE_LIMITED = "rate_limited"
+SESSION_EXPIRED = "session_expired"
+UNKNOWN = "unknown"
+LOADING = "loading"
+
+# element ids the probe reports ("ids" when rendered, "hidden_ids" otherwise);
+# steps that have a distinctive one use it as marker
+PROBE_IDS = ("Office", "CalendarId", "Lastname")
+STEP_MARKERS = {"office": "Office", "calendar": "CalendarId", "form": "Lastname"}
+
+# first backoff per state; repeated hits double it up to MAX_BACKOFF_SECONDS
+BACKOFF_SECONDS = {MAINTENANCE: 900, RATE_LIMITED: 600, SESSION_EXPIRED: 0, UNKNOWN: 0}
+MAX_BACKOFF_SECONDS = 3600
+
+PAGE_PROBE_JS = """
+var ids = arguments[0], docs = [document];
+document.querySelectorAll("iframe").forEach(function (f) {
+    try { if (f.contentDocument) { docs.push(f.contentDocument); } } catch (e) {}
+});
+if (!window.__checkerPage) { window.__checkerPage = Math.random().toString(36).slice(2); }
+var found = [], hidden = [], radios = 0, text = "";
+docs.forEach(function (d) {
+    ids.forEach(function (id) {
+        var el = d.getElementById(id);
+        if (!el) { return; }
+        // later steps post Office / CalendarId back as hidden inputs; only a
+        // rendered field (or a select, which widgets often restyle) counts
+        var shown = el.tagName === "SELECT" || (el.type !== "hidden" && el.getClientRects().length > 0);
+        var list = shown ? found : hidden;
+        if (list.indexOf(id) < 0) { list.push(id); }
+    });
+    radios += d.querySelectorAll("input[type='radio']").length;
+    if (d.body) { text += " " + d.body.innerText.slice(0, 3000); }
+});
+var nav = performance.getEntriesByType("navigation")[0];
+return {
+    page: window.__checkerPage,
+    ready: document.readyState,
+    status: (nav && nav.responseStatus) || 0,
+    title: document.title,
+    ids: found,
+    hidden_ids: hidden,
+    radios: radios,
+    text: text.slice(0, 6000)
+};
+"""
+
+_RATE_LIMITED_RE = re.compile(
+    r"too many requests|zu viele anfragen|rate limit|request limit", re.IGNORECASE)
+_MAINTENANCE_RE = re.compile(
+    r"wartung|maintenance|service unavailable|server error|runtime error|bad gateway"
+    r"|gateway time-?out|internal error", re.IGNORECASE)
+_SESSION_RE = re.compile(
+    r"session (has )?expired|session timed? ?out|sitzung (ist )?abgelaufen|sitzung.{0,20}beendet",
+    re.IGNORECASE)
+
+
+def classify_page(probe: dict, step: str, previous_page: str = None) -> str:
+    """Label a PAGE_PROBE_JS result for navigation step `step`."""
+    if not probe:
+        return LOADING
+    status = probe.get("status") or 0
+    if status == 429:
+        return RATE_LIMITED
+    if status >= 500:
+        return MAINTENANCE
+    if probe.get("ready") != "complete" or (previous_page and probe.get("page") == previous_page):
+        return LOADING
+
+    ids = probe.get("ids") or ()
+    marker = STEP_MARKERS.get(step)
+    if marker and marker in ids:
+        return EXPECTED
+
+    title = probe.get("title", "")
+    text = f"{title} {probe.get('text', '')}"
+    if _RATE_LIMITED_RE.search(text):
+        return RATE_LIMITED
+    # ordinary pages say "server error" in help texts; a 5xx was handled above
+    if _MAINTENANCE_RE.search(title):
+        return MAINTENANCE
+    if _SESSION_RE.search(text) or (step != "office" and "Office" in ids):
+        return SESSION_EXPIRED
+    if marker is None:
+        # steps without a distinctive element: a fresh page with no error text
+        return EXPECTED
+    return UNKNOWN
+
+
+def backoff_seconds(state: str, streak: int) -> int:
+    """How long to wait after `streak` consecutive cycles ended on `state`."""
+    base = BACKOFF_SECONDS.get(state, 0)
+    if not base:
+        return 0
+    return min(base * 2 ** max(0, streak - 1), MAX_BACKOFF_SECONDS)
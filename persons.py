@@ -0,0 +1,229 @@
+"""
+Persons configuration store.
+
+The people to book for live in a JSON file on the data volume (PERSONS_FILE,
+default <data volume>/persons.json): a list of objects with the same keys as
+AppointmentChecker.PERSONAL_DATA_1, optionally plus EarliestDate, LatestDate
+and ExcludedWeekdays to restrict which slots may be booked for that person.
+When the file is missing, or is removed while running, the built-in entries
+are used.
+
+The whole file is validated in one pass (required fields, dates through
+parse_and_format_date, numeric dropdown codes) and every entry is turned into
+a Person with its form payload already normalised, so filling the form does
+no parsing. The polling loop calls `check_for_changes()` between cycles; a
+valid new file replaces the current list in one assignment, an invalid one is
+reported and ignored.
+"""
+
+import json
+import logging
+import os
+from datetime import datetime
+
+from helpers import parse_and_format_date
+from slots import NO_PREFERENCES, SlotPreferences, parse_weekdays
+from storage import data_path
+
+# (form element id, persons-file key) in the order the form is filled
+TEXT_FIELDS = (
+    "Lastname", "Firstname", "DateOfBirth", "TraveldocumentNumber", "Street",
+    "Postcode", "City", "Telephone", "Email", "LastnameAtBirth", "PlaceOfBirth",
+    "TraveldocumentDateOfIssue", "TraveldocumentValidUntil",
+)
+DATE_FIELDS = ("DateOfBirth", "TraveldocumentDateOfIssue", "TraveldocumentValidUntil")
+DROPDOWN_FIELDS = (
+    "Sex", "Country", "NationalityAtBirth", "CountryOfBirth",
+    "NationalityForApplication", "TraveldocumentIssuingAuthority",
+)
+REQUIRED_FIELDS = TEXT_FIELDS + DROPDOWN_FIELDS
+SEX_CODES = ("1", "2")  # 1=Female, 2=Male
+# optional slot constraints: dates like the ones above, weekdays as "Sat, Sun" or a list
+PREFERENCE_DATE_FIELDS = ("EarliestDate", "LatestDate")
+PREFERENCE_WEEKDAYS_FIELD = "ExcludedWeekdays"
+
+
+class PersonsError(ValueError):
+    """Raised with every problem found in a persons file, one per line."""
+
+    def __init__(self, problems: list):
+        super().__init__("\n".join(problems))
+        self.problems = problems
+
+
+class Person:
+    __slots__ = ("data", "key", "text_fields", "dropdowns", "slot_prefs")
+
+    def __init__(self, data: dict, text_fields: tuple, dropdowns: tuple,
+                 slot_prefs: SlotPreferences = NO_PREFERENCES):
+        self.data = data
+        # the passport number identifies a person across edits of the file
+        self.key = data["TraveldocumentNumber"].strip().upper()
+        self.text_fields = text_fields
+        self.dropdowns = dropdowns
+        self.slot_prefs = slot_prefs
+
+    @property
+    def name(self) -> str:
+        return f"{self.data['Firstname']} {self.data['Lastname']}"
+
+
+def _validate_entry(index: int, entry) -> tuple:
+    """Return (Person or None, problems) for one entry."""
+    where = f"Person {index + 1}"
+    if not isinstance(entry, dict):
+        return None, [f"{where}: expected an object, got {type(entry).__name__}"]
+
+    problems = []
+    data = {}
+    for field, value in entry.items():
+        data[field] = str(value).strip() if isinstance(value, (str, int)) else value
+
+    for field in REQUIRED_FIELDS:
+        if not isinstance(data.get(field), str) or not data[field]:
+            problems.append(f"{where}: '{field}' is missing or empty")
+    if problems:
+        return None, problems
+
+    formatted = {}
+    for field in DATE_FIELDS:
+        try:
+            formatted[field] = parse_and_format_date(data[field])
+        except ValueError as e:
+            problems.append(f"{where}: '{field}': {e}")
+
+    for field in DROPDOWN_FIELDS:
+        if not data[field].isdigit():
+            problems.append(f"{where}: '{field}' must be a numeric option code, got '{data[field]}'")
+    if data["Sex"] not in SEX_CODES:
+        problems.append(f"{where}: 'Sex' must be one of {', '.join(SEX_CODES)}")
+
+    bounds = {}
+    for field in PREFERENCE_DATE_FIELDS:
+        if data.get(field):
+            try:
+                bounds[field] = datetime.strptime(parse_and_format_date(str(data[field])), "%d.%m.%Y").date()
+            except ValueError as e:
+                problems.append(f"{where}: '{field}': {e}")
+    if len(bounds) == 2 and bounds["EarliestDate"] > bounds["LatestDate"]:
+        problems.append(f"{where}: 'EarliestDate' is after 'LatestDate'")
+    excluded = frozenset()
+    if data.get(PREFERENCE_WEEKDAYS_FIELD):
+        try:
+            excluded = parse_weekdays(data[PREFERENCE_WEEKDAYS_FIELD])
+        except (TypeError, ValueError) as e:
+            problems.append(f"{where}: '{PREFERENCE_WEEKDAYS_FIELD}': {e}")
+        if len(excluded) == 7:
+            problems.append(f"{where}: '{PREFERENCE_WEEKDAYS_FIELD}' excludes every day")
+
+    if problems:
+        return None, problems
+
+    text_fields = tuple((f, formatted.get(f, data[f])) for f in TEXT_FIELDS)
+    dropdowns = tuple((f, data[f]) for f in DROPDOWN_FIELDS)
+    prefs = SlotPreferences(bounds.get("EarliestDate"), bounds.get("LatestDate"), excluded)
+    return Person(data, text_fields, dropdowns, prefs if prefs.constrained else NO_PREFERENCES), []
+
+
+def validate_persons(entries) -> list:
+    """Validate every entry and return Person objects, or raise PersonsError with all problems."""
+    if not isinstance(entries, list) or not entries:
+        raise PersonsError(["Persons file must contain a non-empty JSON list"])
+
+    persons, problems, seen = [], [], {}
+    for i, entry in enumerate(entries):
+        person, entry_problems = _validate_entry(i, entry)
+        problems.extend(entry_problems)
+        if person is None:
+            continue
+        if person.key in seen:
+            problems.append(f"Person {i + 1}: same TraveldocumentNumber as person {seen[person.key] + 1}")
+        seen[person.key] = i
+        persons.append(person)
+
+    if problems:
+        raise PersonsError(problems)
+    return persons
+
+
+def diff_persons(old: list, new: list) -> list:
+    """Human readable differences between two Person lists (field names only, no values)."""
+    old_by_key = {p.key: p for p in old}
+    new_by_key = {p.key: p for p in new}
+    lines = []
+    for p in new:
+        before = old_by_key.get(p.key)
+        if before is None:
+            lines.append(f"+ {p.name}")
+            continue
+        changed = sorted(k for k in set(before.data) | set(p.data)
+                         if before.data.get(k) != p.data.get(k))
+        if changed:
+            lines.append(f"~ {p.name}: {', '.join(changed)}")
+    for p in old:
+        if p.key not in new_by_key:
+            lines.append(f"- {p.name}")
+    if not lines and [p.key for p in old] != [p.key for p in new]:
+        lines.append("↕ order changed")
+    return lines
+
+
+class PersonsStore:
+    def __init__(self, defaults: list, path: str = None):
+        self.path = path or os.getenv("PERSONS_FILE") or data_path("persons.json")
+        self.defaults = validate_persons(defaults)
+        self.persons = self.defaults
+        self.source = "built-in"
+        self.last_diff = []
+        self.last_error = None
+        self._signature = None
+        self.check_for_changes()
+
+    def _file_signature(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def check_for_changes(self) -> bool:
+        """Reload the file if it changed since the last look. Returns True when persons were swapped."""
+        signature = self._file_signature()
+        if signature == self._signature:
+            return False
+        self._signature = signature
+        if signature is None:
+            return self._fall_back_to_defaults()
+
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                raw = json.load(f)
+            if isinstance(raw, dict):
+                raw = raw.get("persons")
+            persons = validate_persons(raw)
+        except (OSError, ValueError) as e:
+            self.last_error = str(e)
+            logging.error(f"Persons file {self.path} rejected:\n{e}")
+            return False
+
+        diff = diff_persons(self.persons, persons)
+        self.persons = persons
+        self.source = self.path
+        self.last_error = None
+        if not diff:
+            return False
+        self.last_diff = diff
+        logging.info(f"Persons reloaded from {self.path}: {'; '.join(diff)}")
+        return True
+
+    def _fall_back_to_defaults(self) -> bool:
+        """The file was removed: go back to the built-in list (if it wasn't in use already)."""
+        self.last_error = None
+        if self.source == "built-in":
+            return False
+        diff = diff_persons(self.persons, self.defaults)
+        self.persons = self.defaults
+        self.source = "built-in"
+        self.last_diff = [f"{self.path} removed, using the built-in list"] + diff
+        logging.warning(f"Persons file {self.path} removed — using the built-in list")
+        return True
@@ -0,0 +1,153 @@
+"""
+On-demand profiling of check cycles (Telegram /profile).
+
+Nothing here runs until `CycleProfiler.arm(n)` is called: the polling loop
+only checks the `armed` flag. Once armed, the next n cycles run under
+cProfile and tracemalloc, the event loop is sampled for lag, and every
+WebDriver command is counted. After the last cycle `end_cycle()` returns a
+plain-text report and everything is switched off again.
+"""
+
+import asyncio
+import cProfile
+import io
+import pstats
+import time
+import tracemalloc
+
+MAX_PROFILE_CYCLES = 20
+LAG_SAMPLE_INTERVAL = 0.1
+
+
+class CycleProfiler:
+    def __init__(self):
+        self.armed = False
+        self.remaining = 0
+        self._profile = None
+        self._started_at = None
+        self._cycles_done = 0
+        self._lag_samples = []
+        self._lag_task = None
+        self._driver_calls = {}  # command → [count, total seconds]
+        self._instrumented = []
+
+    def arm(self, cycles: int) -> int:
+        """Profile the next `cycles` cycles. Returns the clamped number."""
+        cycles = max(1, min(int(cycles), MAX_PROFILE_CYCLES))
+        if not self.armed:
+            self._reset()
+        self.remaining = cycles
+        self.armed = True
+        return cycles
+
+    def _reset(self):
+        self._profile = None
+        self._started_at = None
+        self._cycles_done = 0
+        self._lag_samples = []
+        self._driver_calls = {}
+        self._instrumented = []
+
+    # ─── DRIVER CALL COUNTING ────────────────────────────────────────────
+
+    def instrument_driver(self, driver):
+        """Count and time every WebDriver command sent through `driver`."""
+        if driver is None or "execute" in vars(driver):
+            return
+        original = driver.execute
+        calls = self._driver_calls
+
+        def counting_execute(driver_command, params=None):
+            t0 = time.perf_counter()
+            try:
+                return original(driver_command, params)
+            finally:
+                entry = calls.setdefault(driver_command, [0, 0.0])
+                entry[0] += 1
+                entry[1] += time.perf_counter() - t0
+
+        driver.execute = counting_execute
+        self._instrumented.append(driver)
+
+    def _uninstrument_drivers(self):
+        for driver in self._instrumented:
+            vars(driver).pop("execute", None)
+        self._instrumented = []
+
+    # ─── EVENT LOOP LAG ──────────────────────────────────────────────────
+
+    async def _sample_lag(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            t0 = loop.time()
+            await asyncio.sleep(LAG_SAMPLE_INTERVAL)
+            self._lag_samples.append(max(0.0, loop.time() - t0 - LAG_SAMPLE_INTERVAL))
+
+    # ─── CYCLE HOOKS ─────────────────────────────────────────────────────
+
+    def start_cycle(self, driver=None):
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._started_at = time.perf_counter()
+            tracemalloc.start(10)
+            self._lag_task = asyncio.get_running_loop().create_task(self._sample_lag())
+        self.instrument_driver(driver)
+        self._profile.enable()
+
+    def end_cycle(self):
+        """Stop measuring this cycle. Returns the report after the last armed cycle, else None."""
+        self._profile.disable()
+        self._cycles_done += 1
+        self.remaining -= 1
+        if self.remaining > 0:
+            return None
+
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        if self._lag_task:
+            self._lag_task.cancel()
+            self._lag_task = None
+        self._uninstrument_drivers()
+        report = self._build_report(snapshot)
+        self.armed = False
+        self._reset()
+        return report
+
+    # ─── REPORT ──────────────────────────────────────────────────────────
+
+    def _build_report(self, snapshot) -> str:
+        wall = time.perf_counter() - self._started_at
+        out = io.StringIO()
+        out.write(f"Profile of {self._cycles_done} cycle(s), {wall:.1f}s wall time\n\n")
+
+        out.write("== Top functions by cumulative time ==\n")
+        stats = pstats.Stats(self._profile, stream=out)
+        stats.strip_dirs().sort_stats("cumulative").print_stats(25)
+
+        out.write("\n== Top allocation sites ==\n")
+        snapshot = snapshot.filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        ))
+        for stat in snapshot.statistics("lineno")[:15]:
+            frame = stat.traceback[0]
+            out.write(f"{stat.size / 1024:9.1f} KiB {stat.count:7d} blocks  "
+                      f"{frame.filename}:{frame.lineno}\n")
+
+        out.write("\n== WebDriver calls ==\n")
+        total = sum(c for c, _ in self._driver_calls.values())
+        out.write(f"{total} commands\n")
+        for command, (count, seconds) in sorted(
+                self._driver_calls.items(), key=lambda kv: kv[1][1], reverse=True):
+            out.write(f"{command:<32}{count:>6}{seconds * 1000:>12.0f} ms\n")
+
+        out.write("\n== Event loop lag ==\n")
+        lags = sorted(self._lag_samples)
+        if lags:
+            p50 = lags[len(lags) // 2]
+            p95 = lags[min(len(lags) - 1, int(len(lags) * 0.95))]
+            out.write(f"{len(lags)} samples  p50 {p50 * 1000:.0f} ms  "
+                      f"p95 {p95 * 1000:.0f} ms  max {lags[-1] * 1000:.0f} ms\n")
+        else:
+            out.write("no samples\n")
+        return out.getvalue()
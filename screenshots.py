@@ -0,0 +1,114 @@
+"""
+Screenshot service.
+
+Captures are taken only when something is going to use them (confirmation
+page, manual CAPTCHA fallback) and kept as raw PNG bytes in a small ring in
+memory. Encoding — downscale to SCREENSHOT_MAX_WIDTH and re-encode as
+SCREENSHOT_FORMAT (JPEG by default) — happens in a worker thread right before
+the image is sent, so the event loop never does image work.
+
+Environment:
+    SCREENSHOT_MAX_WIDTH   1280
+    SCREENSHOT_FORMAT      JPEG | WEBP | PNG
+    SCREENSHOT_QUALITY     70
+    SCREENSHOT_RING_SIZE   5
+"""
+
+import asyncio
+import io
+import logging
+import os
+import time
+from collections import deque
+
+_pil_image = None
+
+
+def _load_pil():
+    """Import PIL.Image on first encode; returns None when Pillow isn't installed."""
+    global _pil_image
+    if _pil_image is None:
+        try:
+            from PIL import Image
+            _pil_image = Image
+        except ImportError:
+            _pil_image = False
+    return _pil_image or None
+
+
+_EXTENSIONS = {"JPEG": "jpg", "WEBP": "webp", "PNG": "png"}
+
+
+class Capture:
+    __slots__ = ("label", "taken_at", "png")
+
+    def __init__(self, label: str, png: bytes):
+        self.label = label
+        self.taken_at = time.time()
+        self.png = png
+
+
+class ScreenshotService:
+    def __init__(self, max_width: int = None, fmt: str = None, quality: int = None,
+                 ring_size: int = None):
+        self.max_width = max_width or int(os.getenv("SCREENSHOT_MAX_WIDTH", 1280))
+        self.format = (fmt or os.getenv("SCREENSHOT_FORMAT", "JPEG")).upper()
+        if self.format not in _EXTENSIONS:
+            self.format = "JPEG"
+        self.quality = quality or int(os.getenv("SCREENSHOT_QUALITY", 70))
+        self.ring = deque(maxlen=ring_size or int(os.getenv("SCREENSHOT_RING_SIZE", 5)))
+        self.captures_taken = 0
+        self.encodes = 0
+        self.encode_seconds = 0.0
+        self.bytes_sent = 0
+
+    def capture(self, driver, label: str):
+        """Grab the current viewport. Returns a Capture, or None if the driver failed."""
+        try:
+            png = driver.get_screenshot_as_png()
+        except Exception as e:
+            logging.warning(f"Screenshot '{label}' failed: {e}")
+            return None
+        capture = Capture(label, png)
+        self.ring.append(capture)
+        self.captures_taken += 1
+        return capture
+
+    def encode(self, capture: Capture) -> tuple:
+        """Downscale and re-encode. Returns (bytes, filename). Blocking — use encode_async."""
+        Image = _load_pil()
+        if Image is None or (self.format == "PNG" and not self.max_width):
+            return capture.png, f"{capture.label}.png"
+
+        image = Image.open(io.BytesIO(capture.png))
+        if self.max_width and image.width > self.max_width:
+            height = round(image.height * self.max_width / image.width)
+            image = image.resize((self.max_width, height), Image.LANCZOS)
+        if self.format == "JPEG" and image.mode != "RGB":
+            image = image.convert("RGB")
+
+        out = io.BytesIO()
+        image.save(out, format=self.format, quality=self.quality, optimize=True)
+        return out.getvalue(), f"{capture.label}.{_EXTENSIONS[self.format]}"
+
+    async def encode_async(self, capture: Capture) -> tuple:
+        t0 = time.perf_counter()
+        data, filename = await asyncio.to_thread(self.encode, capture)
+        elapsed = time.perf_counter() - t0
+        self.encodes += 1
+        self.encode_seconds += elapsed
+        logging.info(f"Encoded screenshot '{capture.label}': {len(capture.png)} → {len(data)} bytes "
+                     f"in {elapsed * 1000:.0f} ms")
+        return data, filename
+
+    def record_sent(self, nbytes: int):
+        self.bytes_sent += nbytes
+
+    def stats(self) -> dict:
+        return {
+            "captures": self.captures_taken,
+            "in_memory": len(self.ring),
+            "in_memory_bytes": sum(len(c.png) for c in self.ring),
+            "avg_encode_ms": (self.encode_seconds / self.encodes * 1000) if self.encodes else 0.0,
+            "bytes_sent": self.bytes_sent,
+        }
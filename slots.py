@@ -0,0 +1,219 @@
+"""
+Appointment slots on the availability page.
+
+SLOT_EXTRACTION_JS reads every slot radio button (position, id, value, label
+text and the text around it) in a single WebDriver round trip. Each entry
+becomes a Slot whose datetime is parsed once, in-process. `rank_slots` drops
+the slots a person can't use (SlotPreferences, built from the optional
+EarliestDate / LatestDate / ExcludedWeekdays keys of a persons entry) and
+orders the rest earliest first; the checker clicks the winner with
+SLOT_CLICK_JS.
+
+SlotTracker remembers which slots were visible last time, per office and
+CalendarId, so each cycle reports only what appeared or vanished (and how
+long a vanished slot was visible). The snapshot lives on the data volume
+(slots.json) and is rewritten only when it changes.
+"""
+
+import logging
+from collections import deque
+from datetime import date, datetime
+
+from helpers import parse_slot_datetime
+from storage import atomic_write_json, data_path, load_json
+
+WEEKDAYS = ("mon", "tue", "wed", "thu", "fri", "sat", "sun")
+
+SLOT_EXTRACTION_JS = """
+return Array.from(document.querySelectorAll("input[type='radio']")).map(function (r, i) {
+    var label = (r.id && document.querySelector("label[for='" + r.id + "']")) || r.closest("label");
+    var row = r.closest("tr") || r.parentElement;
+    var table = r.closest("table");
+    var heading = table ? table.querySelector("th, caption") : null;
+    var context = [heading ? heading.innerText : "", row ? row.innerText : ""].join(" ");
+    return {
+        index: i,
+        id: r.id || "",
+        value: r.value || "",
+        label: label ? label.innerText.trim() : "",
+        context: context.replace(/\\s+/g, " ").trim().slice(0, 200)
+    };
+});
+"""
+
+SLOT_CLICK_JS = """
+var r = document.querySelectorAll("input[type='radio']")[arguments[0]];
+if (!r) { return false; }
+r.scrollIntoView(true);
+r.click();
+return r.checked;
+"""
+
+
+class Slot:
+    __slots__ = ("index", "id", "value", "label", "context", "when")
+
+    def __init__(self, index: int, id: str, value: str, label: str, context: str = ""):
+        self.index = index
+        self.id = id
+        self.value = value
+        self.label = label
+        self.context = context
+        self.when = parse_slot_datetime(value, label, context)
+
+    @property
+    def key(self) -> str:
+        """Identifies the same slot across cycles (the radio value is the booking time)."""
+        return self.value or self.id or f"{self.label}|{self.context}"
+
+    @classmethod
+    def from_dict(cls, d: dict) -> "Slot":
+        return cls(d["index"], d.get("id", ""), d.get("value", ""), d.get("label", ""), d.get("context", ""))
+
+    def describe(self) -> str:
+        if self.when is not None:
+            return self.when.strftime("%a %d.%m.%Y %H:%M")
+        return f"{self.label} on {self.value}" if self.label else self.value or f"slot #{self.index + 1}"
+
+
+def parse_weekdays(raw) -> frozenset:
+    """'Sat, Sun' or ['saturday', 'sunday'] → {5, 6}. Raises ValueError on unknown names."""
+    if isinstance(raw, str):
+        raw = raw.split(",")
+    days = set()
+    for name in raw:
+        key = str(name).strip().lower()[:3]
+        if not key:
+            continue
+        if key not in WEEKDAYS:
+            raise ValueError(f"unknown weekday '{str(name).strip()}' (use {', '.join(WEEKDAYS)})")
+        days.add(WEEKDAYS.index(key))
+    return frozenset(days)
+
+
+class SlotPreferences:
+    __slots__ = ("earliest", "latest", "excluded_weekdays")
+
+    def __init__(self, earliest: date = None, latest: date = None, excluded_weekdays: frozenset = frozenset()):
+        self.earliest = earliest
+        self.latest = latest
+        self.excluded_weekdays = excluded_weekdays
+
+    @property
+    def constrained(self) -> bool:
+        return bool(self.earliest or self.latest or self.excluded_weekdays)
+
+    def allows(self, slot: Slot) -> bool:
+        if not self.constrained:
+            return True
+        if slot.when is None:
+            return False  # can't tell, so don't book a date the person may not be able to make
+        day = slot.when.date()
+        if self.earliest and day < self.earliest:
+            return False
+        if self.latest and day > self.latest:
+            return False
+        return day.weekday() not in self.excluded_weekdays
+
+    def describe(self) -> str:
+        parts = []
+        if self.earliest:
+            parts.append(f"from {self.earliest:%d.%m.%Y}")
+        if self.latest:
+            parts.append(f"until {self.latest:%d.%m.%Y}")
+        if self.excluded_weekdays:
+            parts.append("not on " + ", ".join(WEEKDAYS[d].title() for d in sorted(self.excluded_weekdays)))
+        return " ".join(parts) or "any date"
+
+
+NO_PREFERENCES = SlotPreferences()
+
+
+def rank_slots(slots: list, prefs: SlotPreferences = None) -> list:
+    """Usable slots, best first: earliest datetime, then undated slots in page order."""
+    prefs = prefs or NO_PREFERENCES
+    usable = [s for s in slots if prefs.allows(s)]
+    usable.sort(key=lambda s: (s.when is None, s.when or datetime.min, s.index))
+    return usable
+
+
+# ─── CHANGES BETWEEN CYCLES ──────────────────────────────────────────────
+
+def format_duration(seconds: float) -> str:
+    seconds = int(max(0, seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    if seconds < 3600:
+        return f"{seconds // 60}m"
+    return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+
+
+class SlotDiff:
+    __slots__ = ("appeared", "vanished", "visible")
+
+    def __init__(self, appeared: list, vanished: list, visible: int):
+        self.appeared = appeared  # Slot objects
+        self.vanished = vanished  # (description, seconds visible)
+        self.visible = visible
+
+    def __bool__(self) -> bool:
+        return bool(self.appeared or self.vanished)
+
+    def describe(self) -> str:
+        lines = []
+        if self.appeared:
+            lines.append(f"🆕 {len(self.appeared)} new slot(s):")
+            lines.extend(f"  + {s.describe()}" for s in self.appeared)
+        if self.vanished:
+            lines.append(f"⌛ {len(self.vanished)} slot(s) gone:")
+            lines.extend(f"  - {d} (visible {format_duration(t)})" for d, t in self.vanished)
+        lines.append(f"📅 {self.visible} slot(s) visible now")
+        return "\n".join(lines)
+
+
+class SlotTracker:
+    def __init__(self, path: str = None, history: int = 200):
+        self.path = path or data_path("slots.json")
+        raw = load_json(self.path, default={})
+        # "office|calendar_id" → {slot key: [first_seen (epoch s), description]}
+        self._seen = raw if isinstance(raw, dict) else {}
+        self.appeared_total = 0
+        self.vanished_total = 0
+        self.lifetimes = deque(maxlen=history)  # seconds visible, most recent vanished slots
+
+    def update(self, office: str, calendar_id: str, slots: list, now: float) -> SlotDiff:
+        """
+        Diff `slots` against the last confirmed list. `slots` is None when the
+        check couldn't read the page; that says nothing about which slots are
+        gone, so nothing is compared or stored.
+        """
+        scope = f"{office}|{calendar_id}"
+        previous = self._seen.get(scope, {})
+        if slots is None:
+            return SlotDiff([], [], len(previous))
+        current = {s.key: s for s in slots}
+
+        appeared = [s for k, s in current.items() if k not in previous]
+        vanished = [(entry[1], now - entry[0]) for k, entry in previous.items() if k not in current]
+        if appeared or vanished:
+            self._seen[scope] = {k: previous.get(k) or [now, s.describe()] for k, s in current.items()}
+            self.appeared_total += len(appeared)
+            self.vanished_total += len(vanished)
+            self.lifetimes.extend(t for _, t in vanished)
+            self._save()
+        return SlotDiff(appeared, vanished, len(current))
+
+    def _save(self):
+        try:
+            atomic_write_json(self.path, self._seen)
+        except OSError as e:
+            logging.warning(f"Could not save slot snapshot: {e}")
+
+    def stats(self) -> dict:
+        lifetimes = sorted(self.lifetimes)
+        return {
+            "visible": sum(len(v) for v in self._seen.values()),
+            "appeared": self.appeared_total,
+            "vanished": self.vanished_total,
+            "median_lifetime_s": lifetimes[len(lifetimes) // 2] if lifetimes else None,
+        }
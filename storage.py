@@ -0,0 +1,45 @@
+"""
+Paths on the persistent data volume.
+
+On Fly the volume is mounted at /app/data (see fly.toml). When that directory
+doesn't exist (local development) files go to ./data next to bot.py instead.
+"""
+
+import json
+import logging
+import os
+
+DATA_DIR = os.getenv("DATA_DIR", "/app/data")
+_LOCAL_DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
+
+
+def data_dir() -> str:
+    base = DATA_DIR if os.path.isdir(DATA_DIR) else _LOCAL_DATA_DIR
+    os.makedirs(base, exist_ok=True)
+    return base
+
+
+def data_path(*parts: str) -> str:
+    return os.path.join(data_dir(), *parts)
+
+
+def load_json(path: str, default=None):
+    """Read a JSON file; `default` when it is missing or unreadable."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+    except (OSError, ValueError) as e:
+        logging.warning(f"Ignoring unreadable {path}: {e}")
+        return default
+
+
+def atomic_write_json(path: str, data):
+    """Write JSON so that readers (and a crash mid-write) only ever see a complete file."""
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# the modules live at the repository root; tests only import the ones that
+# don't need selenium / aiogram / genai
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,65 @@
+import asyncio
+
+import pytest
+
+from clients import ApiClient, CircuitBreaker, CircuitOpenError, telegram_trips
+from clock import SimulatedClock
+
+
+class ModelError(Exception):
+    pass
+
+
+def fail(exc):
+    raise exc
+
+
+def test_breaker_opens_and_half_open_probe_closes_on_model_error():
+    clock = SimulatedClock()
+    api = ApiClient("gemini", 1, trips=lambda exc: not isinstance(exc, ModelError), clock=clock)
+    for _ in range(api.breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            api.call(fail, ConnectionError("down"))
+    assert api.breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError):
+        api.call(lambda: "ok")
+
+    clock.advance(api.breaker.reset_seconds)
+    assert api.breaker.state == CircuitBreaker.HALF_OPEN
+    # the trial call reached the dependency; only the request was refused
+    with pytest.raises(ModelError):
+        api.call(fail, ModelError("model not found"))
+    assert api.breaker.state == CircuitBreaker.CLOSED
+    assert api.call(lambda: "ok") == "ok"
+
+
+def test_half_open_probe_reopens_on_transport_error():
+    clock = SimulatedClock()
+    api = ApiClient("gemini", 1, clock=clock)
+    for _ in range(api.breaker.failure_threshold):
+        with pytest.raises(ConnectionError):
+            api.call(fail, ConnectionError("down"))
+    clock.advance(api.breaker.reset_seconds)
+    with pytest.raises(ConnectionError):
+        api.call(fail, ConnectionError("still down"))
+    assert api.breaker.state == CircuitBreaker.OPEN
+
+
+def test_telegram_breaker_ignores_refused_requests():
+    clock = SimulatedClock()
+    api = ApiClient("telegram", 1, trips=telegram_trips, clock=clock)
+    for _ in range(api.breaker.failure_threshold + 1):
+        with pytest.raises(ValueError):
+            api.call(fail, ValueError("Bad Request: chat not found"))
+    assert api.breaker.state == CircuitBreaker.CLOSED
+    assert telegram_trips(ConnectionResetError("reset by peer"))
+    assert telegram_trips(asyncio.TimeoutError())
+
+
+def test_telegram_trips_on_outages_not_on_bad_requests():
+    errors = pytest.importorskip("aiogram.exceptions")
+    assert telegram_trips(errors.TelegramServerError(None, "Internal Server Error"))
+    assert telegram_trips(errors.TelegramRetryAfter(None, "Too Many Requests", 5))
+    assert telegram_trips(errors.TelegramNetworkError(None, "Cannot connect"))
+    assert not telegram_trips(errors.TelegramBadRequest(None, "message is too long"))
+    assert not telegram_trips(errors.TelegramForbiddenError(None, "bot was blocked by the user"))
@@ -0,0 +1,46 @@
+import pytest
+
+from clock import ClockWait, SimulatedClock
+
+
+class FakeDriver:
+    """Has an element from `appears_at` (virtual seconds) on, or never."""
+
+    def __init__(self, clock, appears_at=None):
+        self.clock = clock
+        self.appears_at = appears_at
+        self.polls = 0
+
+    def find(self, _driver):
+        self.polls += 1
+        return self.appears_at is not None and self.clock.monotonic() >= self.appears_at
+
+
+def test_wait_returns_once_condition_holds():
+    clock = SimulatedClock()
+    driver = FakeDriver(clock, appears_at=2.2)
+    assert ClockWait(clock, driver, timeout=10).until(driver.find) is True
+    assert clock.monotonic() == pytest.approx(2.5)
+    assert driver.polls == 6
+
+
+def test_wait_times_out_in_virtual_time():
+    clock = SimulatedClock()
+    driver = FakeDriver(clock)
+    with pytest.raises(TimeoutError):
+        ClockWait(clock, driver, timeout=8).until(driver.find)
+    assert clock.monotonic() == pytest.approx(8)
+
+
+def test_ignored_exceptions_count_as_not_yet():
+    clock = SimulatedClock()
+    calls = []
+
+    def flaky(_driver):
+        calls.append(clock.monotonic())
+        if len(calls) < 3:
+            raise LookupError("stale")
+        return "el"
+
+    assert ClockWait(clock, None, timeout=5, ignored_exceptions=(LookupError,)).until(flaky) == "el"
+    assert calls == [0.0, 0.5, 1.0]
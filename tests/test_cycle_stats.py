@@ -0,0 +1,30 @@
+from cycle_stats import CycleHistory, CycleRecord, PersonResult
+from tracing import Tracer
+
+
+def test_listener_feeds_history_until_removed():
+    tracer = Tracer()
+    history = CycleHistory()
+    tracer.add_listener(history.observe_span)
+    with tracer.span("navigate.office"):
+        pass
+    tracer.remove_listener(history.observe_span)
+    with tracer.span("navigate.office"):
+        pass
+    assert history.steps["navigate.office"].count == 1
+    assert tracer.listeners == []
+
+
+def test_summary_rates_and_percentiles():
+    history = CycleHistory(capacity=3)
+    for n in range(5):
+        cycle = CycleRecord(n, started=0)
+        cycle.duration_ms = 1000 * (n + 1)
+        cycle.persons = [PersonResult(0, "no_slots"), PersonResult(1, "error" if n == 4 else "no_slots")]
+        history.record(cycle)
+    summary = history.summary()
+    assert summary["cycles"] == 5 and summary["kept"] == 3
+    assert summary["cycle_success_rate"] == 0.8
+    assert summary["check_success_rate"] == 0.9
+    assert 2850 <= summary["cycle_duration"]["p50_ms"] <= 3150
+    assert summary["cycle_duration"]["max_ms"] == 5000
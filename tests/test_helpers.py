@@ -0,0 +1,37 @@
+from datetime import datetime
+
+from helpers import parse_slot_datetime
+
+
+def test_day_month_order_by_separator():
+    assert parse_slot_datetime("05.03.2030 09:00") == datetime(2030, 3, 5, 9, 0)
+    assert parse_slot_datetime("05-03-2030 09:00") == datetime(2030, 3, 5, 9, 0)
+    # slashed dates are month/day/year (ASP.NET)
+    assert parse_slot_datetime("3/5/2030 9:00:00 AM") == datetime(2030, 3, 5, 9, 0)
+    assert parse_slot_datetime("2030-03-05T09:00") == datetime(2030, 3, 5, 9, 0)
+
+
+def test_impossible_dates_are_none():
+    assert parse_slot_datetime("2/31/2030 9:00 AM") is None
+    assert parse_slot_datetime("13.13.2030") is None
+    assert parse_slot_datetime("09:00 - 09:15") is None
+    assert parse_slot_datetime("", None) is None
+
+
+def test_year_boundary():
+    assert parse_slot_datetime("12/31/2030 11:45:00 PM") == datetime(2030, 12, 31, 23, 45)
+    assert parse_slot_datetime("01.01.2031 00:15") == datetime(2031, 1, 1, 0, 15)
+
+
+def test_am_pm():
+    assert parse_slot_datetime("5/21/2030 12:30:00 AM") == datetime(2030, 5, 21, 0, 30)
+    assert parse_slot_datetime("5/21/2030 12:30:00 PM") == datetime(2030, 5, 21, 12, 30)
+    assert parse_slot_datetime("5/21/2030 1:15 p.m.") == datetime(2030, 5, 21, 13, 15)
+    assert parse_slot_datetime("21.05.2030 13:15") == datetime(2030, 5, 21, 13, 15)
+
+
+def test_time_and_date_from_different_texts():
+    # radio value without a date, label with the time, date in the heading above
+    assert parse_slot_datetime("", "09:00 - 09:15", "Mittwoch, 21.05.2030") == datetime(2030, 5, 21, 9, 0)
+    # a date with no time anywhere is midnight
+    assert parse_slot_datetime("21.05.2030") == datetime(2030, 5, 21)
@@ -0,0 +1,48 @@
+import page_state
+
+
+def probe(**overrides):
+    result = {"page": "p2", "ready": "complete", "status": 200, "title": "Termin", "ids": [],
+              "hidden_ids": [], "radios": 0, "text": ""}
+    result.update(overrides)
+    return result
+
+
+def test_marker_step_is_expected():
+    assert page_state.classify_page(probe(ids=["Office"]), "office", "p1") == page_state.EXPECTED
+    assert page_state.classify_page(probe(ids=["Lastname"], hidden_ids=["Office", "CalendarId"]),
+                                    "form", "p1") == page_state.EXPECTED
+
+
+def test_later_step_with_hidden_office_field_is_not_expired():
+    # the site posts Office / CalendarId back on every step as hidden inputs
+    state = page_state.classify_page(probe(hidden_ids=["Office", "CalendarId"], text="Anzahl der Personen"),
+                                     "persons", "p1")
+    assert state == page_state.EXPECTED
+
+
+def test_bounced_back_to_office_select_is_expired():
+    state = page_state.classify_page(probe(ids=["Office"]), "persons", "p1")
+    assert state == page_state.SESSION_EXPIRED
+
+
+def test_error_pages_and_loading():
+    assert page_state.classify_page(probe(status=503), "persons") == page_state.MAINTENANCE
+    assert page_state.classify_page(probe(text="Zu viele Anfragen"), "calendar", "p1") == page_state.RATE_LIMITED
+    assert page_state.classify_page(probe(page="p1"), "persons", "p1") == page_state.LOADING
+    assert page_state.classify_page(probe(ready="interactive"), "persons", "p1") == page_state.LOADING
+
+
+def test_maintenance_needs_status_or_title():
+    assert page_state.classify_page(probe(title="Wartungsarbeiten"), "persons", "p1") == page_state.MAINTENANCE
+    assert page_state.classify_page(probe(title="Runtime Error"), "calendar", "p1") == page_state.MAINTENANCE
+    assert page_state.classify_page(probe(status=502, title="Termin"), "persons", "p1") == page_state.MAINTENANCE
+
+
+def test_ordinary_pages_with_error_wording_are_not_maintenance():
+    info = "Bei einem Server Error wenden Sie sich bitte an die Botschaft. Internal error codes: see FAQ."
+    assert page_state.classify_page(probe(text=info), "info", "p1") == page_state.EXPECTED
+    assert page_state.classify_page(probe(text="In case of a runtime error reload the page"),
+                                    "persons", "p1") == page_state.EXPECTED
+    # a marker step that lacks its marker stays unknown rather than backing off
+    assert page_state.classify_page(probe(text="server error"), "form", "p1") == page_state.UNKNOWN
@@ -0,0 +1,49 @@
+import json
+import os
+
+from persons import PersonsStore
+
+PERSON = {
+    "Lastname": "Muster", "Firstname": "Max", "DateOfBirth": "01.02.1990",
+    "TraveldocumentNumber": "P123", "Street": "Gasse 1", "Postcode": "1010", "City": "Wien",
+    "Telephone": "+431234", "Email": "max@example.com", "LastnameAtBirth": "Muster",
+    "PlaceOfBirth": "Wien", "TraveldocumentDateOfIssue": "01.01.2020",
+    "TraveldocumentValidUntil": "01.01.2030", "Sex": "2", "Country": "1",
+    "NationalityAtBirth": "1", "CountryOfBirth": "1", "NationalityForApplication": "1",
+    "TraveldocumentIssuingAuthority": "1",
+}
+
+
+def write(path, entries, mtime):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(entries, f)
+    os.utime(path, ns=(mtime, mtime))
+
+
+def test_rejected_then_restored_file_clears_error(tmp_path):
+    path = str(tmp_path / "persons.json")
+    store = PersonsStore(defaults=[PERSON], path=path)
+    write(path, [dict(PERSON, Sex="9")], 1_000_000_000)
+    assert store.check_for_changes() is False
+    assert store.last_error
+
+    # same content as the list in use: nothing swapped, but the error is gone
+    write(path, [PERSON], 2_000_000_000)
+    assert store.check_for_changes() is False
+    assert store.last_error is None
+
+
+def test_removed_file_falls_back_to_defaults(tmp_path):
+    path = str(tmp_path / "persons.json")
+    other = dict(PERSON, TraveldocumentNumber="P999", Firstname="Erika")
+    write(path, [other], 1_000_000_000)
+    store = PersonsStore(defaults=[PERSON], path=path)
+    assert store.source == path
+    assert [p.key for p in store.persons] == ["P999"]
+
+    os.remove(path)
+    assert store.check_for_changes() is True
+    assert store.source == "built-in"
+    assert [p.key for p in store.persons] == ["P123"]
+    assert "removed" in store.last_diff[0]
+    assert store.check_for_changes() is False
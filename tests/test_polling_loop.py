@@ -0,0 +1,181 @@
+"""
+AppointmentChecker.run_polling_loop on SimulatedClock: hours of cycles, with
+their sleeps, page waits, backoffs and CAPTCHA timeouts, in well under a
+second. Only the steps that need Selenium itself (driver restart, clicking
+through to the slot page, reading the radios, the booking form) are replaced;
+the driver and the Telegram bot are fakes.
+"""
+
+import asyncio
+import threading
+import time
+
+import pytest
+
+import bot
+import page_state
+import storage
+from clock import SimulatedClock
+from slots import Slot
+
+MAINTENANCE_CYCLE = 20   # the site answers 503
+STUCK_CYCLE = 40         # the slot page never finishes loading
+ERROR_CYCLE = 60         # the cycle itself blows up
+SLOTS_CYCLE = 150        # slots appear; nobody answers the CAPTCHA
+ANSWER_CYCLE = 151       # the operator answers after 30 s
+
+
+class FakeDriver:
+    """Answers PAGE_PROBE_JS with the page the current cycle should see."""
+
+    def __init__(self, checker):
+        self.checker = checker
+        self.navigations = 0
+
+    def execute_script(self, script, *args):
+        cycle = self.checker.check_count
+        probe = {"page": f"p{self.navigations}", "ready": "complete", "status": 200,
+                 "title": "Termine", "ids": ["CalendarId"], "hidden_ids": [], "radios": 0, "text": ""}
+        if cycle == MAINTENANCE_CYCLE:
+            probe.update(status=503, ids=[])
+        elif cycle == STUCK_CYCLE:
+            probe.update(ready="loading", ids=[])
+        return probe
+
+    def get_screenshot_as_png(self):
+        return b"\x89PNG"
+
+
+class FakeBot:
+    def __init__(self, clock):
+        self.clock = clock
+        self.checker = None
+        self.messages = []
+        self.captcha_requests = []
+        self.cancelled = []
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self.messages.append(text)
+
+    async def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        pass
+
+    async def send_document(self, chat_id, document, caption=None, **kwargs):
+        pass
+
+    async def request_captcha(self, request_id, label, data, filename, timeout):
+        self.captcha_requests.append(request_id)
+        if self.checker.check_count >= ANSWER_CYCLE:
+            self.clock.call_later(30, self.checker.receive_manual_captcha, request_id, "abc123")
+
+    async def cancel_captcha(self, request_id, note):
+        self.cancelled.append(request_id)
+
+    def count(self, prefix: str) -> int:
+        return sum(m.startswith(prefix) for m in self.messages)
+
+
+@pytest.fixture
+def checker(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DATA_DIR", str(tmp_path))
+    monkeypatch.setenv("BROWSER_CACHE", "off")
+    monkeypatch.setenv("BROWSER_CACHE_DIR", str(tmp_path / "browser"))
+    monkeypatch.delenv("PERSONS_FILE", raising=False)
+    monkeypatch.delenv("WEBDRIVER_BACKEND", raising=False)
+
+    clock = SimulatedClock()
+    fake_bot = FakeBot(clock)
+    monkeypatch.setattr(bot, "bot", fake_bot)
+    checker = bot.AppointmentChecker(clock=clock)
+    fake_bot.checker = checker
+    checker.driver = FakeDriver(checker)
+    captcha_png = tmp_path / "captcha.png"
+    captcha_png.write_bytes(b"\x89PNG")
+
+    def navigate():
+        checker.driver.navigations += 1
+        checker.clock.sleep(2)  # clicking through office / calendar / persons
+        return checker._wait_for_page("calendar") == page_state.EXPECTED
+
+    def check_slots():
+        if checker.check_count < SLOTS_CYCLE:
+            return False, []
+        return True, [Slot(0, "r0", "15.03.2030 09:00", "09:00")]
+
+    async def book(slots):
+        code = await checker._request_manual_captcha(str(captcha_png))
+        return (True, [f"Booked with {code}"], None) if code else (False, ["CAPTCHA not answered"], None)
+
+    run_cycle = checker._run_single_check_cycle
+
+    async def cycle():
+        if checker.check_count == ERROR_CYCLE:
+            raise RuntimeError("browser went away")
+        return await run_cycle()
+
+    checker._restart_driver = lambda: None
+    checker._navigate_to_appointment_list = navigate
+    checker._check_appointments_available = check_slots
+    checker._select_and_book_appointment = book
+    checker._run_single_check_cycle = cycle
+    return checker
+
+
+def test_polling_loop_runs_hours_on_simulated_clock(checker):
+    clock, fake_bot = checker.clock, bot.bot
+    bot.tracer.add_listener(checker.cycle_history.observe_span)
+    t0 = time.perf_counter()
+    try:
+        asyncio.run(checker.run_polling_loop())
+    finally:
+        bot.tracer.remove_listener(checker.cycle_history.observe_span)
+    elapsed = time.perf_counter() - t0
+
+    assert elapsed < 5
+    assert all(checker.persons_booked)
+    assert checker.check_count == ANSWER_CYCLE
+    # 60 s intervals plus the 900 s maintenance backoff: hours of virtual time
+    assert clock.monotonic() > ANSWER_CYCLE * 60 + 900
+
+    assert fake_bot.count("🚀 Appointment polling started") == 1
+    assert fake_bot.count("📊 Status update") == ANSWER_CYCLE // 10
+    assert fake_bot.count("🚧 Appointment site is maintenance") == 1
+    assert fake_bot.count("✅ Appointment site is reachable again") == 1
+    assert fake_bot.count(f"⚠️ Error in check #{ERROR_CYCLE}") == 1
+    # both persons' prompts in the slots cycle expired after the full 120 s
+    assert fake_bot.count("⏰ Timeout! No CAPTCHA received") == 2
+    assert len(fake_bot.captcha_requests) == 4
+    assert len(fake_bot.cancelled) == 2
+    assert fake_bot.count("🎉🎉🎉 ALL APPOINTMENTS BOOKED") == 1
+
+    history = checker.cycle_history
+    assert history.cycles == ANSWER_CYCLE
+    assert history.outcomes["navigation"] == 3   # maintenance (then back off) + stuck page for both
+    assert history.outcomes["booking_failed"] == 2
+    assert history.outcomes["booked"] == 2
+    # durations come from the simulated clock: two 120 s CAPTCHA timeouts in one cycle
+    assert history.cycle_duration.max_ms >= 240_000
+    assert history.steps["captcha.solve"].count == 4
+
+
+def test_selenium_steps_leave_the_loop_free(checker):
+    """A shutdown arriving mid-navigation is handled while the browser is still busy."""
+    navigating, stop_seen = threading.Event(), threading.Event()
+
+    def navigate():
+        navigating.set()
+        # on the event loop this would block the very task that sets stop_seen
+        return stop_seen.wait(timeout=2)
+
+    checker._navigate_to_appointment_list = navigate
+
+    async def main():
+        cycle = asyncio.ensure_future(checker._run_single_check_cycle())
+        await asyncio.to_thread(navigating.wait, 2)
+        checker.request_stop()
+        stop_seen.set()
+        return await cycle
+
+    record = asyncio.run(main())
+    # the first person's check finished normally; the second was skipped
+    assert [p.outcome for p in record.persons] == ["no_slots"]
@@ -0,0 +1,78 @@
+from datetime import date
+
+from slots import NO_PREFERENCES, Slot, SlotPreferences, SlotTracker, parse_weekdays, rank_slots
+
+
+def slot(index, value):
+    return Slot(index, f"r{index}", value, value[-5:])
+
+
+def test_tracker_reports_appeared_and_vanished(tmp_path):
+    tracker = SlotTracker(path=str(tmp_path / "slots.json"))
+    a, b = slot(0, "15.03.2030 09:00"), slot(1, "15.03.2030 10:00")
+
+    diff = tracker.update("TEHERAN", "1", [a, b], now=1000)
+    assert [s.key for s in diff.appeared] == [a.key, b.key] and not diff.vanished
+
+    assert not tracker.update("TEHERAN", "1", [a, b], now=1060)
+
+    diff = tracker.update("TEHERAN", "1", [b], now=1300)
+    assert not diff.appeared
+    assert diff.vanished == [(a.describe(), 300)]
+    assert diff.visible == 1
+    assert tracker.stats()["vanished"] == 1
+
+
+def test_failed_check_changes_nothing(tmp_path):
+    path = str(tmp_path / "slots.json")
+    tracker = SlotTracker(path=path)
+    a = slot(0, "15.03.2030 09:00")
+    tracker.update("TEHERAN", "1", [a], now=1000)
+
+    diff = tracker.update("TEHERAN", "1", None, now=1060)
+    assert not diff
+    assert diff.visible == 1
+    # the next readable check sees the same list: no "gone" and "new again" notices
+    assert not tracker.update("TEHERAN", "1", [a], now=1120)
+    assert tracker.stats() == {"visible": 1, "appeared": 1, "vanished": 0, "median_lifetime_s": None}
+    # and the snapshot on disk survives a restart
+    assert not SlotTracker(path=path).update("TEHERAN", "1", [a], now=1180)
+
+
+def test_confirmed_empty_list_vanishes_slots(tmp_path):
+    tracker = SlotTracker(path=str(tmp_path / "slots.json"))
+    tracker.update("TEHERAN", "1", [slot(0, "15.03.2030 09:00")], now=1000)
+    diff = tracker.update("TEHERAN", "1", [], now=1600)
+    assert len(diff.vanished) == 1 and diff.visible == 0
+
+
+def ranked(slots, prefs=NO_PREFERENCES):
+    return [s.index for s in rank_slots(slots, prefs)]
+
+
+def test_rank_earliest_first_across_the_year_boundary():
+    slots = [slot(0, "01/02/2031 9:00:00 AM"), slot(1, "12/31/2030 3:00:00 PM"), slot(2, "12/31/2030 9:00:00 AM")]
+    assert ranked(slots) == [2, 1, 0]
+
+
+def test_rank_ties_and_undated_slots_keep_page_order():
+    slots = [Slot(0, "r0", "", "later"), slot(1, "21.05.2030 09:00"), Slot(2, "r2", "", "later too"),
+             slot(3, "21.05.2030 09:00"), slot(4, "20.05.2030 15:00")]
+    assert ranked(slots) == [4, 1, 3, 0, 2]
+
+
+def test_rank_applies_bounds_and_weekdays():
+    slots = [slot(0, "16.05.2030 09:00"),   # Thursday, before the earliest date
+             slot(1, "17.05.2030 09:00"),   # Friday
+             slot(2, "18.05.2030 09:00"),   # Saturday, excluded
+             slot(3, "20.05.2030 09:00"),   # Monday, last allowed day
+             slot(4, "21.05.2030 09:00")]   # after the latest date
+    prefs = SlotPreferences(date(2030, 5, 17), date(2030, 5, 20), parse_weekdays("Sat, Sun"))
+    assert ranked(slots, prefs) == [1, 3]
+
+
+def test_rank_drops_undated_slots_only_when_constrained():
+    slots = [Slot(0, "r0", "", "no date"), slot(1, "17.05.2030 09:00")]
+    assert ranked(slots) == [1, 0]
+    assert ranked(slots, SlotPreferences(excluded_weekdays=frozenset({6}))) == [1]
+    assert ranked(slots, SlotPreferences(earliest=date(2030, 1, 1))) == [1]
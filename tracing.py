@@ -0,0 +1,270 @@
+"""
+Lightweight span tracing for check cycles.
+
+    with tracer.span("captcha.capture", selector="#Captcha_CaptchaImage") as span:
+        ...
+        span.set(retries=2)
+
+Spans nest through a ContextVar (cycle → person → navigate.* / availability /
+form.fill / captcha.* / submit), carry free-form attributes, and are handed to
+a JsonlSpanWriter that buffers them in memory and appends them to a rotating
+JSONL file on the data volume from a background task.
+
+Summarise recorded traces with:
+
+    python tracing.py summarize [FILE ...]
+"""
+
+import argparse
+import asyncio
+import contextvars
+import glob
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+
+from storage import data_path
+
+TRACE_FILE_NAME = "traces.jsonl"
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    __slots__ = ("trace_id", "span_id", "parent_id", "name", "start",
+                 "_t0", "duration_ms", "attributes", "status", "error")
+
+    def __init__(self, name: str, parent: "Span" = None, attributes: dict = None):
+        self.name = name
+        self.trace_id = parent.trace_id if parent else _new_id()
+        self.span_id = _new_id()
+        self.parent_id = parent.span_id if parent else None
+        self.start = time.time()
+        self._t0 = time.perf_counter()
+        self.duration_ms = None
+        self.attributes = attributes or {}
+        self.status = "ok"
+        self.error = None
+
+    def set(self, **attributes):
+        self.attributes.update(attributes)
+
+    def set_error(self, category: str, message: str = None):
+        """Mark the span failed. `category` is a short token used for grouping."""
+        self.status = "error"
+        self.error = category
+        if message:
+            self.attributes["error_message"] = message[:300]
+
+    def end(self):
+        if self.duration_ms is None:
+            self.duration_ms = round((time.perf_counter() - self._t0) * 1000, 3)
+
+    def to_dict(self) -> dict:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "name": self.name,
+            "start": round(self.start, 3),
+            "duration_ms": self.duration_ms,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes,
+        }
+
+
+class JsonlSpanWriter:
+    """
+    Buffered, rotating JSONL sink.
+
+    `submit` only appends to an in-memory deque, so it is safe to call from the
+    event loop. A background task started with `start()` writes the buffer out
+    in a worker thread every `flush_interval` seconds; `flush()` writes
+    synchronously and is meant for shutdown.
+    """
+
+    def __init__(self, path: str = None, max_bytes: int = 5 * 1024 * 1024,
+                 backup_count: int = 5, flush_interval: float = 5.0,
+                 max_buffer: int = 10_000):
+        self.path = path or data_path(TRACE_FILE_NAME)
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self._buffer = deque(maxlen=max_buffer)
+        self._lock = threading.Lock()
+        self._task = None
+        self.dropped = 0
+
+    def submit(self, span: Span):
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(span.to_dict())
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await asyncio.to_thread(self.flush)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self._buffer:
+                try:
+                    await asyncio.to_thread(self.flush)
+                except Exception as e:
+                    logging.warning(f"Trace flush failed: {e}")
+
+    def _drain(self) -> list:
+        batch = []
+        while self._buffer:
+            batch.append(self._buffer.popleft())
+        return batch
+
+    def flush(self):
+        with self._lock:
+            batch = self._drain()
+            if not batch:
+                return
+            self._rotate_if_needed()
+            with open(self.path, "a", encoding="utf-8") as f:
+                for record in batch:
+                    f.write(json.dumps(record, ensure_ascii=False, default=str))
+                    f.write("\n")
+
+    def _rotate_if_needed(self):
+        try:
+            if os.path.getsize(self.path) < self.max_bytes:
+                return
+        except OSError:
+            return
+        for i in range(self.backup_count - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+class Tracer:
+    def __init__(self, writer: JsonlSpanWriter = None):
+        self.writer = writer
+        self.listeners = []  # called with every finished span (in-memory stats)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        span = Span(name, _current_span.get(), attributes)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            if span.status == "ok":
+                span.set_error(type(e).__name__, str(e))
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+            if self.writer is not None:
+                self.writer.submit(span)
+            for listener in tuple(self.listeners):
+                try:
+                    listener(span)
+                except Exception as e:
+                    logging.debug(f"Span listener failed: {e}")
+
+    def current(self):
+        return _current_span.get()
+
+
+tracer = Tracer()
+
+
+def configure_tracing(path: str = None) -> JsonlSpanWriter:
+    """Attach a JSONL writer to the module tracer. Call `writer.start()` inside the loop."""
+    tracer.writer = JsonlSpanWriter(path)
+    return tracer.writer
+
+
+# ─────────────────────────────────────────────────────────────────────────────
+# CLI
+# ─────────────────────────────────────────────────────────────────────────────
+
+def _percentile(sorted_values: list, pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = (len(sorted_values) - 1) * pct / 100
+    lo = int(k)
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (k - lo)
+
+
+def summarize(paths: list) -> str:
+    durations = {}
+    errors = {}
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                name = record.get("name")
+                if name is None or record.get("duration_ms") is None:
+                    continue
+                durations.setdefault(name, []).append(record["duration_ms"])
+                if record.get("status") == "error":
+                    errors[name] = errors.get(name, 0) + 1
+
+    lines = [f"{'span':<24}{'count':>8}{'errors':>8}{'p50 ms':>12}{'p95 ms':>12}"]
+    for name in sorted(durations):
+        values = sorted(durations[name])
+        lines.append(
+            f"{name:<24}{len(values):>8}{errors.get(name, 0):>8}"
+            f"{_percentile(values, 50):>12.1f}{_percentile(values, 95):>12.1f}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Inspect recorded check-cycle traces.")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_sum = sub.add_parser("summarize", help="p50/p95 duration per span name")
+    p_sum.add_argument("files", nargs="*",
+                       help="trace files (default: traces.jsonl* on the data volume)")
+    args = parser.parse_args(argv)
+
+    files = args.files or sorted(glob.glob(data_path(TRACE_FILE_NAME) + "*"))
+    if not files:
+        print("No trace files found.")
+        return 1
+    print(summarize(files))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
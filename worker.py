@@ -0,0 +1,282 @@
+"""
+Checker worker process and its supervisor.
+
+The Telegram front end (bot process) and the Selenium/Gemini checker (worker
+process) talk over a duplex multiprocessing Pipe. Every message is a tuple
+whose first element names it:
+
+    worker → bot   ("send_message", chat_id, text)
+                   ("send_photo", chat_id, data, filename, caption)
+                   ("send_document", chat_id, data, filename, caption)
+                   ("captcha_request", request_id, label, data, filename, timeout)
+                   ("captcha_cancel", request_id, note)
+                   ("status", snapshot_dict)      latest view for /status
+                   ("state", state_dict)          what a restarted worker needs
+                   ("log", record_dict)           forwarded log records
+    bot → worker   ("captcha_reply", request_id, code)
+                   ("profile", cycles)
+                   ("controls", controls_dict)    /pause, /resume, /interval
+                   ("check_now",)
+                   ("shutdown", deadline_seconds)
+
+The supervisor restarts the worker with backoff when it dies and hands the
+last reported state to the new one.
+"""
+
+import asyncio
+import copy
+import logging
+import logging.handlers
+import multiprocessing
+import os
+import threading
+import time
+
+from logging_setup import CompactFormatter
+
+RESTART_DELAY = 5
+MAX_RESTART_DELAY = 300
+HEALTHY_RUN_SECONDS = 600  # a worker that lived this long resets the backoff
+STOP_GRACE_SECONDS = 5     # after the worker's own deadline, before it is terminated
+
+
+class Channel:
+    """Thread-safe sender plus a reader thread for one end of a Pipe."""
+
+    def __init__(self, conn):
+        self.conn = conn
+        self._send_lock = threading.Lock()
+        self._reader = None
+
+    def send(self, *message) -> bool:
+        try:
+            with self._send_lock:
+                self.conn.send(message)
+            return True
+        except (OSError, EOFError, BrokenPipeError):
+            return False
+
+    def start_reader(self, loop, callback):
+        """Call `callback(message)` on `loop` for every message; `(\"_closed\",)` at EOF."""
+
+        def read():
+            while True:
+                try:
+                    message = self.conn.recv()
+                except (EOFError, OSError):
+                    loop.call_soon_threadsafe(callback, ("_closed",))
+                    return
+                loop.call_soon_threadsafe(callback, message)
+
+        self._reader = threading.Thread(target=read, name="ipc-reader", daemon=True)
+        self._reader.start()
+
+
+class BufferedUpload:
+    """Bytes to send as a photo/document (the worker's stand-in for aiogram's BufferedInputFile)."""
+
+    def __init__(self, data: bytes, filename: str):
+        self.data = data
+        self.filename = filename
+
+
+class FileUpload:
+    """A file to send as a photo/document (the worker's stand-in for aiogram's FSInputFile)."""
+
+    def __init__(self, path: str, filename: str = None):
+        self.path = path
+        self.filename = filename or os.path.basename(path)
+
+
+def _input_file_bytes(input_file) -> tuple:
+    """(bytes, filename) from a BufferedUpload or FileUpload."""
+    data = getattr(input_file, "data", None)
+    if data is None:
+        with open(input_file.path, "rb") as f:
+            data = f.read()
+    return data, input_file.filename
+
+
+class WorkerBot:
+    """Stand-in for aiogram.Bot inside the worker: forwards sends to the bot process."""
+
+    def __init__(self, channel: Channel):
+        self._channel = channel
+
+    async def send_message(self, chat_id, text, **kwargs):
+        self._channel.send("send_message", chat_id, text)
+
+    async def send_photo(self, chat_id, photo, caption=None, **kwargs):
+        data, filename = _input_file_bytes(photo)
+        self._channel.send("send_photo", chat_id, data, filename, caption)
+
+    async def send_document(self, chat_id, document, caption=None, **kwargs):
+        data, filename = _input_file_bytes(document)
+        self._channel.send("send_document", chat_id, data, filename, caption)
+
+    async def request_captcha(self, request_id: str, label: str, data: bytes, filename: str, timeout: float):
+        """Have the bot process relay a CAPTCHA to the operators (see captcha_relay.py)."""
+        self._channel.send("captcha_request", request_id, label, data, filename, timeout)
+
+    async def cancel_captcha(self, request_id: str, note: str):
+        self._channel.send("captcha_cancel", request_id, note)
+
+
+class _ForwardingQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler for the worker. The traceback travels in exc_text, already cut
+    down by CompactFormatter, so the bot process logs it the same way it logs
+    its own (and RepeatFilter keys on the message alone).
+    """
+
+    def __init__(self, queue):
+        super().__init__(queue)
+        self.setFormatter(CompactFormatter())
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = self.formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+
+class _LogForwarder:
+    """Queue-like sink for QueueHandler that ships records to the bot process."""
+
+    def __init__(self, channel: Channel):
+        self._channel = channel
+
+    def put_nowait(self, record: logging.LogRecord):
+        self._channel.send("log", record.__dict__)
+
+
+def forward_logging(channel: Channel, level: int = logging.INFO):
+    """
+    Route the worker's root logger to the bot process, which owns the log
+    file. Records are sent without exc_info, so they are picklable.
+    """
+    root = logging.getLogger()
+    for h in list(root.handlers):
+        root.removeHandler(h)
+    root.addHandler(_ForwardingQueueHandler(_LogForwarder(channel)))
+    root.setLevel(level)
+
+
+class CheckerSupervisor:
+    """
+    Runs `target(conn, state, *args)` in a spawned process and keeps it alive.
+
+    `on_message` is awaited for every message that isn't handled here
+    (status/state/log/_closed); `on_state(state)` is called whenever the
+    worker reports a state that differs from the last one.
+    """
+
+    def __init__(self, target, on_message, args: tuple = (), on_state=None, state: dict = None):
+        self.target = target
+        self.on_message = on_message
+        self.on_state = on_state
+        self.args = args
+        self.state = state or {}
+        self.status = {}
+        self.restarts = 0
+        self._channel = None
+        self._process = None
+        self._inbox = None
+        self._stopping = False
+        self._stop_event = None  # set by stop(); cuts the restart backoff short
+
+    @property
+    def alive(self) -> bool:
+        return self._process is not None and self._process.is_alive()
+
+    def send(self, *message) -> bool:
+        if self._channel is None or not self.alive:
+            return False
+        return self._channel.send(*message)
+
+    def _start(self):
+        ctx = multiprocessing.get_context("spawn")
+        parent_conn, child_conn = ctx.Pipe(duplex=True)
+        self._process = ctx.Process(target=self.target, args=(child_conn, dict(self.state)) + self.args,
+                                    name="checker-worker", daemon=True)
+        self._process.start()
+        child_conn.close()
+        self._channel = Channel(parent_conn)
+        self._channel.start_reader(asyncio.get_running_loop(), self._inbox.put_nowait)
+        logging.info(f"Checker worker started (pid {self._process.pid})")
+
+    async def _pump(self):
+        """Handle messages until the worker's end of the pipe closes."""
+        while True:
+            message = await self._inbox.get()
+            kind = message[0]
+            if kind == "_closed":
+                return
+            if kind == "log":
+                logging.getLogger().handle(logging.makeLogRecord(message[1]))
+            elif kind == "status":
+                self.status = message[1]
+            elif kind == "state":
+                if message[1] != self.state:
+                    self.state = message[1]
+                    if self.on_state:
+                        self.on_state(self.state)
+            else:
+                try:
+                    await self.on_message(message)
+                except Exception as e:
+                    logging.error(f"Failed to handle worker message '{kind}': {e}")
+
+    async def run(self):
+        """Run the worker until it exits cleanly (exit code 0) or stop() is called."""
+        self._inbox = asyncio.Queue()
+        self._stop_event = asyncio.Event()
+        if self._stopping:
+            self._stop_event.set()
+        delay = RESTART_DELAY
+        while True:
+            started = time.monotonic()
+            self._start()
+            await self._pump()
+            await asyncio.to_thread(self._process.join)
+            exitcode = self._process.exitcode
+            self._channel.conn.close()
+            self.status = dict(self.status, running=False)
+
+            if exitcode == 0 or self._stopping:
+                logging.info(f"Checker worker exited (code {exitcode})")
+                return exitcode
+
+            if time.monotonic() - started >= HEALTHY_RUN_SECONDS:
+                delay = RESTART_DELAY
+            self.restarts += 1
+            logging.error(f"Checker worker died (code {exitcode}); restarting in {delay}s "
+                          f"(restart #{self.restarts})")
+            try:
+                await asyncio.wait_for(self._stop_event.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+            delay = min(delay * 2, MAX_RESTART_DELAY)
+            if self._stopping:
+                logging.info("Checker worker not restarted: shutting down")
+                return exitcode
+
+    async def stop(self, deadline: float = 20):
+        """
+        Ask the worker to finish what it is doing within `deadline` seconds and
+        exit; terminate it if it is still alive STOP_GRACE_SECONDS later.
+        """
+        self._stopping = True
+        if self._stop_event is not None:
+            self._stop_event.set()
+        if not self.alive:
+            return
+        self.send("shutdown", deadline)
+        await asyncio.to_thread(self._process.join, deadline + STOP_GRACE_SECONDS)
+        if self._process.is_alive():
+            logging.warning("Checker worker did not stop in time; terminating")
+            self._process.terminate()
+            await asyncio.to_thread(self._process.join, 5)